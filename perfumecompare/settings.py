@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'perfumes.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -64,6 +65,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'perfumes.context_processors.catalog_version',
             ],
         },
     },
@@ -125,3 +127,68 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Featured perfumes (home page slider)
+# The pool is rotated when the TTL expires or by `manage.py refresh_featured`
+
+FEATURED_POOL_SIZE = 50
+FEATURED_POOL_TTL = 60 * 60
+
+# Number of ranked neighbours stored per perfume by `manage.py build_similarity_index`
+SIMILAR_PERFUMES_TOP_K = 12
+
+# Memory-mapped NumPy matrix for "smells like" search (`manage.py build_scent_vectors`)
+SCENT_VECTORS_DIR = BASE_DIR / 'var' / 'scent_vectors'
+
+# Raw Fragrantica responses kept by `manage.py import_perfumes` for re-runs and offline replays
+IMPORT_HTTP_CACHE_DIR = BASE_DIR / 'var' / 'http_cache'
+
+# Pages and card fragments are cached per process; they are keyed by versions kept in
+# 'catalog_state', which every process (web workers, imports, other commands) reads and bumps.
+# Point 'catalog_state' at Redis or memcached when the server processes don't share a disk.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'perfumes',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'catalog_state': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache' / 'catalog_state',
+        'TIMEOUT': None,
+    },
+}
+CATALOG_STATE_CACHE = 'catalog_state'
+
+# Anonymous page cache lifetime; entries are also dropped when the catalog version changes
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Resized copies of perfume images (`manage.py build_image_derivatives`, also rendered on import).
+# Widths cover the 40px admin thumbnail up to a 2x card; formats are offered best-compressed first.
+IMAGE_DERIVATIVE_WIDTHS = (80, 160, 240, 320)
+IMAGE_DERIVATIVE_FORMATS = ('avif', 'webp', 'jpeg')
+# How long the list of derivatives present for an image is cached
+IMAGE_DERIVATIVES_CACHE_TIMEOUT = 60 * 60
+
+# Views over their @query_budget raise when this is on (the test suite turns it on); otherwise
+# they log a warning, plus an X-Query-Budget-Exceeded header while DEBUG is on
+QUERY_BUDGET_STRICT = False
+# Recent requests per view kept for the /_perf/ stats endpoint
+PERFORMANCE_STATS_WINDOW = 500
+
+# Synthetic catalogs, results and baselines of `manage.py benchmark`
+BENCHMARK_DIR = BASE_DIR / 'var' / 'benchmarks'
+
+# Most perfumes on one compare page, and how long a built comparison stays cached
+# (entries are keyed by the catalog version, so edits never serve stale data)
+COMPARE_MAX_PERFUMES = 4
+COMPARE_CACHE_TIMEOUT = 60 * 60
+
+# JSON API (perfumes/api.py): default and largest search page, most IDs per bulk request
+API_PAGE_SIZE = 24
+API_MAX_PAGE_SIZE = 100
+API_MAX_IDS = 100
+
+# Approved reviews shown per page on the detail page ("Show more reviews" loads the next one)
+REVIEWS_PAGE_SIZE = 10
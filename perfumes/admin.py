@@ -1,7 +1,15 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db.models import Count
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import Perfume
 from .models import Review
+from .models import Accord, Note
+from .models import ImageJob
+from .images import derivative_url
+from .reviews import refresh_review_stats
+from .search import search_queryset
 
 
 @admin.register(Perfume)
@@ -14,9 +22,10 @@ class PerfumeAdmin(admin.ModelAdmin):
         "gender",
         "rating_value",
         "year",
+        "approved_review_count",
     )
     list_filter = ("brand", "country", "gender", "year")
-    search_fields = ("name", "brand", "country", "top_notes", "middle_notes", "base_notes")
+    search_fields = ("name", "brand")  # searched through the full-text index, see get_search_results
     ordering = ("brand", "name")
     list_per_page = 25
 
@@ -25,7 +34,7 @@ class PerfumeAdmin(admin.ModelAdmin):
             "fields": ("name", "brand", "url", "country", "gender", "year")
         }),
         ("Ratings", {
-            "fields": ("rating_value", "rating_count")
+            "fields": ("rating_value", "rating_count", "approved_review_count", "latest_review_at")
         }),
         ("Notes", {
             "fields": ("top_notes", "middle_notes", "base_notes")
@@ -41,14 +50,24 @@ class PerfumeAdmin(admin.ModelAdmin):
         }),
     )
 
-    readonly_fields = ("image_preview",)
+    readonly_fields = ("image_preview", "approved_review_count", "latest_review_at")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search name, brand, notes, perfumers and accords via the full-text index, best matches first."""
+        if not search_term.strip():
+            return queryset, False
+        results = search_queryset(queryset, [(search_term, None)])
+        # A clicked column header wins; otherwise the list ordering only breaks ties in rank
+        if ORDER_VAR not in request.GET:
+            results = results.order_by("-search_rank", *queryset.query.order_by)
+        return results, False
 
     def thumbnail(self, obj):
         """Show a small thumbnail in list view."""
         if obj.image:
             return format_html(
                 '<img src="{}" width="40" height="40" style="border-radius:6px;object-fit:cover;" />',
-                obj.image.url,
+                derivative_url(obj.image.name, 80) or obj.image.url,
             )
         elif obj.image_url:
             return format_html(
@@ -63,7 +82,7 @@ class PerfumeAdmin(admin.ModelAdmin):
         if obj.image:
             return format_html(
                 '<img src="{}" width="180" style="border-radius:10px;box-shadow:0 0 6px #aaa;" />',
-                obj.image.url,
+                derivative_url(obj.image.name, 360) or obj.image.url,
             )
         elif obj.image_url:
             return format_html(
@@ -78,8 +97,47 @@ class PerfumeAdmin(admin.ModelAdmin):
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('perfume', 'name', 'approved', 'created_at')
     list_filter = ('approved',)
+    list_select_related = ('perfume',)  # the perfume column (and __str__) would otherwise query per row
     search_fields = ('name', 'content')
+    raw_id_fields = ('perfume',)
     actions = ['approve_reviews']
 
     def approve_reviews(self, request, queryset):
-        queryset.update(approved=True)
+        queryset = queryset.filter(approved=False)
+        perfume_ids = set(queryset.values_list('perfume_id', flat=True))
+        queryset.update(approved=True, updated_at=timezone.now())
+        # update() skips the post_save signal; this also re-keys those perfumes' cached review lists
+        refresh_review_stats(perfume_ids)
+
+
+@admin.register(Accord)
+class AccordAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('perfume', 'host', 'state', 'attempts', 'next_attempt_at', 'last_error', 'updated_at')
+    list_filter = ('state', 'host')
+    list_select_related = ('perfume',)
+    search_fields = ('perfume__name', 'url', 'last_error')
+    raw_id_fields = ('perfume',)
+    actions = ['retry_now']
+
+    def changelist_view(self, request, extra_context=None):
+        """Show the queue's totals per state above the list."""
+        counts = dict(ImageJob.objects.values_list('state').annotate(Count('id')).order_by())
+        summary = ", ".join(f"{counts.get(state, 0)} {label.lower()}" for state, label in ImageJob.STATE_CHOICES)
+        extra_context = {**(extra_context or {}), 'title': f"Image queue: {summary}"}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    @admin.action(description="Retry the selected jobs now")
+    def retry_now(self, request, queryset):
+        queryset.update(state=ImageJob.QUEUED, attempts=0, next_attempt_at=timezone.now(), last_error="")
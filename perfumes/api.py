@@ -0,0 +1,216 @@
+# perfumes/api.py
+"""
+Read-only JSON API over the catalog, for the frontend and partners instead of scraping pages.
+
+Perfume objects carry only the columns asked for with `?fields=name,brand,rating_value` (the ID
+is always included), and only those columns are selected. Responses are compact JSON with the
+same catalog ETag / Last-Modified validators as the HTML pages, so an unchanged catalog costs a
+304; anonymous responses are also page-cached per URL like the pages.
+
+    GET /api/perfumes/?q=&gender=&country=&accord=&rating=&limit=&cursor=   filtered search
+    GET /api/perfumes/bulk/?ids=1,2,3                                        perfumes by ID
+    GET /api/perfumes/<id>/similar/?limit=                                   similar perfumes
+    GET /api/compare/?perfumes=1&perfumes=2                                  side-by-side comparison
+    GET /api/suggestions/?q=                                                 autosuggest
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from .caching import cache_anonymous_page, catalog_conditional
+from .compare import compare, parse_compare_ids
+from .instrumentation import query_budget
+from .models import Perfume
+from .pagination import CursorPaginator
+from .search import search_queryset
+from .similarity import similar_perfumes, top_k
+from .suggest import suggest_perfumes
+from .taxonomy import normalize_name
+
+# Columns a client may ask for; all of them are loaded by perfumes.compare as well
+FIELDS = (
+    "id", "name", "brand", "url", "country", "gender", "year", "rating_value", "rating_count",
+    "top_notes", "middle_notes", "base_notes",
+    "mainaccord1", "mainaccord2", "mainaccord3", "mainaccord4", "mainaccord5",
+    "perfumer1", "perfumer2", "description", "image", "image_url",
+)
+DEFAULT_FIELDS = ("id", "name", "brand", "gender", "year", "rating_value", "rating_count", "image", "image_url")
+
+
+class InvalidParameter(ValueError):
+    pass
+
+
+def _page_size():
+    return getattr(settings, "API_PAGE_SIZE", 24)
+
+
+def _max_page_size():
+    return getattr(settings, "API_MAX_PAGE_SIZE", 100)
+
+
+def _max_ids():
+    return getattr(settings, "API_MAX_IDS", 100)
+
+
+def _json(payload, status=200):
+    return JsonResponse(payload, status=status, json_dumps_params={"separators": (",", ":"), "ensure_ascii": False})
+
+
+def api_view(view):
+    """GET/HEAD only, with InvalidParameter turned into a 400 JSON error."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except InvalidParameter as error:
+            return _json({"error": str(error)}, status=400)
+    return require_safe(wrapper)
+
+
+def requested_fields(request):
+    """Fields named in `?fields=` (the ID first), or DEFAULT_FIELDS."""
+    value = request.GET.get("fields", "").strip()
+    if not value:
+        return DEFAULT_FIELDS
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(FIELDS))
+    if unknown:
+        raise InvalidParameter(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(FIELDS)}")
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+def serialize(perfume, fields):
+    data = {}
+    for field in fields:
+        value = getattr(perfume, field)
+        if field == "image":
+            value = value.url if value else None
+        data[field] = value
+    return data
+
+
+def _int(request, name, default, maximum):
+    value = request.GET.get(name, "").strip()
+    if not value:
+        return default
+    if not (value.isascii() and value.isdigit()) or int(value) < 1:
+        raise InvalidParameter(f"`{name}` must be a positive whole number")
+    return min(int(value), maximum)
+
+
+def _ids(request, name):
+    """IDs from `?name=1,2,3` and/or repeated `?name=` values, first occurrence kept, in order."""
+    ids = []
+    for value in request.GET.getlist(name):
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if not (part.isascii() and part.isdigit()):
+                raise InvalidParameter(f"`{name}` takes perfume IDs, got {part!r}")
+            if int(part) not in ids:
+                ids.append(int(part))
+    if len(ids) > _max_ids():
+        raise InvalidParameter(f"At most {_max_ids()} IDs per request")
+    return ids
+
+
+@catalog_conditional
+@cache_anonymous_page
+@query_budget(4)
+@api_view
+def perfume_search(request):
+    fields = requested_fields(request)
+    perfumes = Perfume.objects.all()
+
+    gender = request.GET.get("gender")
+    country = request.GET.get("country")
+    accord = request.GET.get("accord")
+    rating = request.GET.get("rating")
+    query = request.GET.get("q")
+
+    if gender:
+        perfumes = perfumes.filter(gender__iexact=gender)
+    if country:
+        perfumes = perfumes.filter(country__iexact=country)
+    if accord:
+        perfumes = perfumes.filter(main_accords__name=normalize_name(accord))
+    if rating:
+        try:
+            perfumes = perfumes.filter(rating_value__gte=float(rating))
+        except ValueError:
+            raise InvalidParameter("`rating` must be a number")
+
+    # 🔎 Name/brand text goes through the full-text index, best matches first
+    if query:
+        perfumes = search_queryset(perfumes, [(query, ["name", "brand"])])
+        ordering = ("-search_rank", "name", "id")
+    else:
+        ordering = ("name", "id")
+
+    # The cursor is built from the ordering columns, so those are loaded too
+    perfumes = perfumes.only(*fields, "name")
+    page = CursorPaginator(perfumes, ordering, _int(request, "limit", _page_size(), _max_page_size())).page(
+        request.GET.get("cursor")
+    )
+    return _json({"results": [serialize(perfume, fields) for perfume in page], "next": page.next_cursor})
+
+
+@catalog_conditional
+@cache_anonymous_page
+@query_budget(3)
+@api_view
+def perfume_bulk(request):
+    fields = requested_fields(request)
+    ids = _ids(request, "ids")
+    found = Perfume.objects.only(*fields).in_bulk(ids) if ids else {}
+    return _json({
+        "results": [serialize(found[pk], fields) for pk in ids if pk in found],
+        "missing": [pk for pk in ids if pk not in found],
+    })
+
+
+@catalog_conditional
+@cache_anonymous_page
+@query_budget(4)
+@api_view
+def perfume_similar(request, pk):
+    fields = requested_fields(request)
+    limit = _int(request, "limit", 4, top_k())
+    if not Perfume.objects.filter(pk=pk).exists():
+        return _json({"error": f"No perfume with ID {pk}"}, status=404)
+    similar = similar_perfumes(Perfume(pk=pk), limit=limit, fields=fields)
+    return _json({"perfume": pk, "results": [serialize(perfume, fields) for perfume in similar]})
+
+
+@catalog_conditional
+@cache_anonymous_page
+@query_budget(3)
+@api_view
+def compare_api(request):
+    fields = requested_fields(request)
+    # ⚖️ Same cached comparison as the compare page
+    comparison = compare(parse_compare_ids(request.GET.getlist("perfumes")))
+    ids = [str(perfume.pk) for perfume in comparison.perfumes]
+    return _json({
+        "perfumes": [serialize(perfume, fields) for perfume in comparison.perfumes],
+        "differs": {row["key"]: row["differs"] for row in comparison.rows},
+        "shared_notes": [
+            {"note": shared["note"], "layers": {pk: layer for pk, layer in zip(ids, shared["layers"]) if layer}}
+            for shared in comparison.shared_notes
+        ],
+    })
+
+
+@catalog_conditional
+@query_budget(3)
+@api_view
+def suggestions_api(request):
+    query = request.GET.get("q", "").strip()
+    limit = _int(request, "limit", 10, 25)
+    # Served from the in-process prefix index, no page cache needed
+    results = suggest_perfumes(query, limit=limit) if query else []
+    return _json({"results": [suggestion._asdict() for suggestion in results]})
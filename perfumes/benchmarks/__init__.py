@@ -0,0 +1,24 @@
+# perfumes/benchmarks/__init__.py
+"""Synthetic catalogs, the Fragrantica stub and the benchmarks behind `manage.py benchmark` and `benchmark_import`."""
+from .catalog import SIZES, CatalogGenerator
+from .database import benchmark_database
+from .importbench import MODES as IMPORT_MODES
+from .importbench import run_import, write_catalog_csv
+from .runner import SCENARIOS, BenchmarkRunner, BenchmarkUnavailable, compare_to_baseline
+from .stubserver import FragranticaStub, add_stub_arguments, stub_options
+
+__all__ = [
+    "IMPORT_MODES",
+    "SCENARIOS",
+    "SIZES",
+    "BenchmarkRunner",
+    "BenchmarkUnavailable",
+    "CatalogGenerator",
+    "FragranticaStub",
+    "add_stub_arguments",
+    "benchmark_database",
+    "compare_to_baseline",
+    "run_import",
+    "stub_options",
+    "write_catalog_csv",
+]
@@ -0,0 +1,166 @@
+# perfumes/benchmarks/catalog.py
+"""
+Seeded synthetic catalogs for benchmarking.
+
+Perfumes get brands, countries, genders, years, ratings, notes and accords drawn from skewed
+distributions shaped like the real dataset (a few very common accords and notes, a long tail of
+rare ones), plus reviews. The search index and accord/note links are built as in a real import.
+Similar-perfume lists are drawn from perfumes sharing the first accord rather than scored,
+because scoring the whole catalog is O(n²) and would dominate the setup time of a large run.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from ..models import Perfume, Review, SimilarPerfume
+from ..reviews import refresh_review_stats
+from ..search import index_perfumes
+from ..similarity import top_k
+from ..taxonomy import sync_taxonomy
+
+SIZES = {"1k": 1_000, "50k": 50_000, "500k": 500_000}
+
+ACCORDS = [
+    "woody", "citrus", "floral", "aromatic", "sweet", "fresh spicy", "warm spicy", "white floral",
+    "fruity", "powdery", "amber", "musky", "rose", "vanilla", "green", "fresh", "balsamic", "earthy",
+    "leather", "patchouli", "aquatic", "oud", "tobacco", "smoky", "lavender", "iris", "yellow floral",
+    "soft spicy", "honey", "coffee", "cherry", "coconut", "tuberose", "marine", "ozonic", "animalic",
+    "rum", "whiskey", "almond", "cacao", "caramel", "mossy", "herbal", "salty", "tropical", "violet",
+    "metallic", "conifer", "anis", "mineral", "lactonic", "cinnamon", "savory", "sour", "nutty",
+    "beeswax", "camphor", "soapy", "terpenic", "bitter",
+]
+NOTES = [
+    "bergamot", "lemon", "mandarin orange", "grapefruit", "pink pepper", "cardamom", "lavender",
+    "rose", "jasmine", "iris", "orange blossom", "violet", "geranium", "neroli", "ylang-ylang",
+    "tuberose", "lily-of-the-valley", "magnolia", "peony", "freesia", "apple", "pear", "blackcurrant",
+    "raspberry", "peach", "plum", "coconut", "pineapple", "cinnamon", "nutmeg", "clove", "saffron",
+    "black pepper", "ginger", "vetiver", "cedar", "sandalwood", "patchouli", "oud", "guaiac wood",
+    "oakmoss", "amber", "ambroxan", "musk", "white musk", "vanilla", "tonka bean", "benzoin",
+    "labdanum", "incense", "myrrh", "leather", "tobacco", "coffee", "cacao", "honey", "caramel",
+    "praline", "almond", "rum", "cognac", "sea notes", "salt", "mint", "basil", "rosemary", "sage",
+    "thyme", "violet leaf", "fig leaf", "green tea", "bamboo", "birch", "cypress", "pine", "juniper",
+    "elemi", "olibanum", "cashmeran", "heliotrope", "mimosa", "osmanthus", "lotus", "water lily",
+    "cyclamen", "aldehydes", "calone", "cashmere wood", "papyrus", "cypriol", "styrax", "tolu balsam",
+    "opoponax", "castoreum", "civet", "ambrette", "orris root", "carrot seeds", "rhubarb", "tomato leaf",
+]
+WORDS = [
+    "Noir", "Blanc", "Oud", "Rose", "Velvet", "Midnight", "Amber", "Silk", "Wild", "Eau", "Intense",
+    "Absolu", "Sport", "Night", "Bloom", "Gold", "Santal", "Iris", "Ocean", "Leather", "Tobacco",
+    "Vanilla", "Musk", "Jasmine", "Cedar", "Citrus", "Royal", "Black", "White", "Private", "Elixir",
+    "Legend", "Spirit", "Code", "Pure", "Mystic", "Desert", "Garden", "Storm", "Aqua", "Fire", "Dream",
+]
+COUNTRIES = ["France", "Italy", "USA", "United Kingdom", "Germany", "Spain", "UAE", "Japan", "Brazil", "Russia"]
+GENDERS = ["women", "men", "unisex"]
+REVIEWERS = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+REVIEW_TEXTS = [
+    "Lasts all day and gets compliments.", "Too sweet for me after an hour.", "A classic, smells expensive.",
+    "Nice opening but the drydown is generic.", "Perfect for summer evenings.", "Beast mode projection.",
+    "Soft skin scent, great for the office.", "Smells like a mix of its notes, nothing special.",
+]
+
+
+def _zipf_weights(count, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class CatalogGenerator:
+    def __init__(self, seed=42, reviews_per_perfume=2.0, approved_share=0.8, batch_size=5000, log=None):
+        self.random = random.Random(seed)
+        self.reviews_per_perfume = reviews_per_perfume
+        self.approved_share = approved_share
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.accord_weights = _zipf_weights(len(ACCORDS))
+        self.note_weights = _zipf_weights(len(NOTES), 0.9)
+
+    def _pick(self, values, weights, count):
+        picked = []
+        while len(picked) < count:
+            value = self.random.choices(values, weights)[0]
+            if value not in picked:
+                picked.append(value)
+        return picked
+
+    def _notes(self, low, high):
+        return ", ".join(self._pick(NOTES, self.note_weights, self.random.randint(low, high)))
+
+    def brands(self, size):
+        return [f"{self.random.choice(WORDS)} House {number}" for number in range(max(20, size // 40))]
+
+    def perfume(self, number, brands):
+        accords = self._pick(ACCORDS, self.accord_weights, self.random.randint(3, 5))
+        rated = self.random.random() < 0.9
+        name = f"{' '.join(self.random.sample(WORDS, self.random.randint(1, 3)))} {number}"
+        brand = self.random.choices(brands, _zipf_weights(len(brands), 0.8))[0]
+        return Perfume(
+            name=name,
+            brand=brand,
+            url=f"https://www.fragrantica.com/perfume/{slugify(brand)}/{slugify(name)}.html",
+            country=self.random.choice(COUNTRIES),
+            gender=self.random.choices(GENDERS, (45, 35, 20))[0],
+            rating_value=round(self.random.triangular(2.5, 4.8, 3.9), 2) if rated else None,
+            rating_count=int(self.random.paretovariate(1.2) * 20) if rated else None,
+            year=str(self.random.randint(1950, 2024)),
+            top_notes=self._notes(1, 5),
+            middle_notes=self._notes(1, 6),
+            base_notes=self._notes(1, 6),
+            perfumer1=f"Perfumer {self.random.randint(1, 400)}",
+            perfumer2=f"Perfumer {self.random.randint(1, 400)}" if self.random.random() < 0.3 else "",
+            **{f"mainaccord{position}": accord for position, accord in enumerate(accords, start=1)},
+        )
+
+    def generate(self, size):
+        """Add `size` perfumes with their reviews, search index, accord/note links and similar lists."""
+        brands = self.brands(size)
+        start = Perfume.objects.count()
+        for offset in range(0, size, self.batch_size):
+            count = min(self.batch_size, size - offset)
+            with transaction.atomic():
+                perfumes = Perfume.objects.bulk_create(
+                    [self.perfume(start + offset + i, brands) for i in range(count)]
+                )
+                ids = [perfume.pk for perfume in perfumes]
+                index_perfumes(ids)
+                sync_taxonomy(ids)
+                Review.objects.bulk_create(self.reviews(ids))
+                refresh_review_stats(ids)
+            self.log(f"   {offset + count}/{size} perfumes")
+        self.similar_lists()
+
+    def reviews(self, perfume_ids):
+        now = timezone.now()
+        for pk in perfume_ids:
+            # Mostly a handful, occasionally many
+            for _ in range(int(self.random.expovariate(1 / self.reviews_per_perfume)) if self.reviews_per_perfume else 0):
+                yield Review(
+                    perfume_id=pk,
+                    name=self.random.choice(REVIEWERS),
+                    content=self.random.choice(REVIEW_TEXTS),
+                    approved=self.random.random() < self.approved_share,
+                    created_at=now - timedelta(minutes=self.random.randint(0, 60 * 24 * 365 * 3)),
+                )
+
+    def similar_lists(self):
+        """top_k() neighbours per perfume, drawn from perfumes sharing its first accord."""
+        k = top_k()
+        by_accord = {}
+        for pk, accord in Perfume.objects.values_list("id", "mainaccord1").iterator(chunk_size=10000):
+            by_accord.setdefault(accord, []).append(pk)
+        SimilarPerfume.objects.all().delete()
+        batch = []
+        for group in by_accord.values():
+            for pk in group:
+                others = self.random.sample(group, min(k + 1, len(group)))
+                neighbours = [other for other in others if other != pk][:k]
+                batch.extend(
+                    SimilarPerfume(perfume_id=pk, similar_id=other, score=round(1 - rank * 0.05, 3), rank=rank)
+                    for rank, other in enumerate(neighbours, start=1)
+                )
+                if len(batch) >= self.batch_size * k:
+                    SimilarPerfume.objects.bulk_create(batch)
+                    batch = []
+        SimilarPerfume.objects.bulk_create(batch)
+        Perfume.objects.update(similar_indexed_at=timezone.now())
@@ -0,0 +1,25 @@
+# perfumes/benchmarks/database.py
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(name, keep_path=None):
+    """
+    Run the block against a separate test database so the real catalog is never touched. With
+    `keep_path` (SQLite) the database is a file that survives for the next run; otherwise it is
+    created fresh (in memory on SQLite) and dropped afterwards.
+    """
+    keepdb = keep_path is not None
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    if connection.vendor == "sqlite":
+        if keepdb:
+            test_settings["NAME"] = str(keep_path)
+    else:
+        test_settings["NAME"] = name
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
@@ -0,0 +1,79 @@
+# perfumes/benchmarks/importbench.py
+"""
+Importer throughput runs behind `manage.py benchmark_import`.
+
+A synthetic CSV in the dataset's format is imported by the real `import_perfumes` command,
+pointed at a FragranticaStub, once per worker count / rate limit combination. Each run reports
+rows and bytes per second, requests, retries and time blocked on the rate limiter, what the stub
+did (429s, slow and malformed responses) and wall time plus SQL per importer stage.
+"""
+import csv
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command, load_command_class
+
+from ..importer.rows import CSV_COLUMNS
+from ..models import Perfume
+from .catalog import CatalogGenerator
+
+MODES = ("default", "bulk", "incremental")
+
+
+def write_catalog_csv(path, rows, seed=42):
+    """A `;`-separated CSV of `rows` synthetic perfumes with the dataset's columns."""
+    generator = CatalogGenerator(seed=seed)
+    brands = generator.brands(rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Perfume", "Brand", *CSV_COLUMNS])
+        for number in range(rows):
+            perfume = generator.perfume(number, brands)
+            values = []
+            for field in CSV_COLUMNS.values():
+                value = getattr(perfume, field)
+                # The dataset writes decimals with a comma
+                values.append("" if value is None else str(value).replace(".", ",") if field == "rating_value" else value)
+            writer.writerow([perfume.name, perfume.brand, *values])
+
+
+def run_import(csv_path, rows, stub, mode="default", workers=4, rate=10.0, burst=1, image_rate=10.0,
+               max_retries=5, batch_size=50, inline_images=False, derivatives=True):
+    """Import `csv_path` into an empty catalog through `stub`; returns the run's numbers."""
+    Perfume.objects.all().delete()
+    cache.clear()
+    stub.stats.clear()
+    command = load_command_class("perfumes", "import_perfumes")
+    start = time.perf_counter()
+    call_command(
+        command, str(csv_path),
+        workers=workers, rate=rate, burst=burst, image_rate=image_rate, max_retries=max_retries,
+        batch_size=batch_size, base_url=stub.base_url, no_cache=True, no_journal=True,
+        bulk=mode == "bulk", incremental=mode == "incremental",
+        inline_images=inline_images, no_derivatives=not derivatives,
+        stdout=StringIO(), stderr=StringIO(),
+    )
+    seconds = time.perf_counter() - start
+
+    page_client, image_client = command.clients
+    fetched = page_client.stats + image_client.stats
+    return {
+        "mode": mode,
+        "workers": workers,
+        "rate": rate,
+        "image_rate": image_rate,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 2),
+        "requests": fetched["requests"],
+        "bytes": fetched["bytes"],
+        "bytes_per_s": round(fetched["bytes"] / seconds),
+        "retries": fetched["retries"],
+        "responses_429": fetched["429s"],
+        "rate_limit_wait_s": round(page_client.limiter.waited + image_client.limiter.waited, 3),
+        "slowdowns": page_client.limiter.throttled + image_client.limiter.throttled,
+        "outcome": dict(command.pipeline.writer.stats),
+        "stages": command.pipeline.timer.summary(),
+        "stub": dict(stub.stats),
+    }
@@ -0,0 +1,308 @@
+# perfumes/benchmarks/runner.py
+"""
+Scenario runner: requests each public view many times and reports latency percentiles, SQL
+query counts, response sizes and memory, either through the Django test client (in process,
+no network) or over HTTP against a local WSGI/ASGI server running in a background thread.
+
+Query counts and SQL time come from the Server-Timing header PerformanceMiddleware adds, so
+both modes measure the same thing. Each scenario is run twice: "cold" clears the cache before
+every request (page and fragment caches, cached ID lists), "warm" leaves it alone.
+"""
+import gc
+import http.client
+import platform
+import random
+import re
+import resource
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Perfume
+
+SCENARIOS = (
+    "home", "perfume_list", "perfume_list_filtered", "filter_gender", "filter_search",
+    "perfume_detail", "compare_perfumes", "perfume_suggestions",
+)
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class BenchmarkUnavailable(Exception):
+    pass
+
+
+class ScenarioData:
+    """Random but seeded request parameters drawn from the catalog under test."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.ids = list(Perfume.objects.values_list("id", flat=True))
+        # Drawn with the seeded generator; ORDER BY RANDOM() would differ from run to run
+        picked = self.random.sample(self.ids, min(200, len(self.ids)))
+        sample = Perfume.objects.filter(pk__in=picked).order_by("id").values("name", "brand", "gender", "mainaccord1")
+        self.names = [row["name"] for row in sample]
+        self.brands = [row["brand"] for row in sample if row["brand"]]
+        self.accords = [row["mainaccord1"] for row in sample if row["mainaccord1"]]
+        self.genders = sorted({row["gender"] for row in sample if row["gender"]})
+
+    def url(self, scenario):
+        pick = self.random.choice
+        if scenario == "home":
+            return reverse("home")
+        if scenario == "perfume_list":
+            return reverse("perfume_list")
+        if scenario == "perfume_list_filtered":
+            return f"{reverse('perfume_list')}?{urlencode({'gender': pick(self.genders), 'accord': pick(self.accords), 'rating': 3})}"
+        if scenario == "filter_gender":
+            return f"{reverse('filter_perfumes')}?{urlencode({'gender': pick(self.genders)})}"
+        if scenario == "filter_search":
+            return f"{reverse('filter_perfumes')}?{urlencode({'brand': pick(self.brands).split()[0]})}"
+        if scenario == "perfume_detail":
+            return reverse("perfume_detail", args=[pick(self.ids)])
+        if scenario == "compare_perfumes":
+            ids = self.random.sample(self.ids, min(4, len(self.ids)))
+            return f"{reverse('compare_perfumes')}?{urlencode([('perfumes', pk) for pk in ids])}"
+        if scenario == "perfume_suggestions":
+            name = pick(self.names)
+            return f"{reverse('perfume_suggestions')}?{urlencode({'q': name[:self.random.randint(2, 5)]})}"
+        raise ValueError(f"Unknown scenario {scenario!r}")
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(samples, elapsed=None):
+    latencies = sorted(sample["ms"] for sample in samples)
+    queries = [sample["queries"] for sample in samples if sample["queries"] is not None]
+    result = {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["status"] >= 400),
+        "p50_ms": round(_percentile(latencies, 0.5), 2),
+        "p95_ms": round(_percentile(latencies, 0.95), 2),
+        "p99_ms": round(_percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "queries_max": max(queries) if queries else None,
+        "queries_avg": round(statistics.fmean(queries), 2) if queries else None,
+        "sql_ms_avg": round(statistics.fmean(sample["sql_ms"] for sample in samples), 2),
+        "bytes_avg": round(statistics.fmean(sample["bytes"] for sample in samples)),
+    }
+    peaks = [sample["peak_kb"] for sample in samples if "peak_kb" in sample]
+    if peaks:
+        result["peak_kb_max"] = max(peaks)
+    if elapsed:
+        result["requests_per_s"] = round(len(samples) / elapsed, 1)
+    return result
+
+
+def _sample(status, started, headers_timing, size):
+    match = SERVER_TIMING.search(headers_timing or "")
+    return {
+        "status": status,
+        "ms": (time.perf_counter() - started) * 1000,
+        "queries": int(match.group(2)) if match else None,
+        "sql_ms": float(match.group(1)) if match else 0.0,
+        "bytes": size,
+    }
+
+
+class BenchmarkRunner:
+    def __init__(self, requests=100, concurrency=4, server=None, seed=42, log=None):
+        self.requests = requests
+        self.concurrency = concurrency
+        self.server = server  # None (test client), "wsgi" or "asgi"
+        self.seed = seed
+        self.log = log or (lambda message: None)
+
+    def run(self, scenarios=SCENARIOS):
+        data = ScenarioData(self.seed)
+        results = {}
+        with self.serving() as address:
+            for scenario in scenarios:
+                results[scenario] = {}
+                for variant in ("cold", "warm"):
+                    cold = variant == "cold"
+                    # Don't let garbage left by the previous scenario be collected on this one's clock
+                    gc.collect()
+                    if address:
+                        results[scenario][variant] = self.measure_http(address, data, scenario, cold)
+                    else:
+                        results[scenario][variant] = self.measure_client(data, scenario, cold)
+                    numbers = results[scenario][variant]
+                    self.log(
+                        f"   {scenario:<22} {variant:<4} p50 {numbers['p50_ms']:>8.2f} ms  "
+                        f"p95 {numbers['p95_ms']:>8.2f} ms  {numbers['queries_max']} queries"
+                    )
+        return {"meta": self.meta(), "scenarios": results}
+
+    def meta(self):
+        return {
+            "created": timezone.now().isoformat(),
+            "catalog_size": Perfume.objects.count(),
+            "seed": self.seed,
+            "mode": self.server or "client",
+            "requests": self.requests,
+            "concurrency": self.concurrency if self.server else 1,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+    def measure_client(self, data, scenario, cold):
+        client = Client()
+        # One untimed request so URL resolution, template loading and the facet index are ready
+        client.get(data.url(scenario))
+        samples = []
+        for _ in range(self.requests):
+            url = data.url(scenario)
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            samples.append(_sample(response.status_code, started, response.get("Server-Timing"), len(response.content)))
+
+        # Memory is measured on a separate pass; tracing slows every allocation down
+        tracemalloc.start()
+        try:
+            for sample in samples[:max(1, self.requests // 5)]:
+                if cold:
+                    cache.clear()
+                tracemalloc.reset_peak()
+                client.get(data.url(scenario))
+                sample["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+        return summarize(samples)
+
+    def measure_http(self, address, data, scenario, cold):
+        host, port = address
+        local = threading.local()
+
+        def fetch(url):
+            if not hasattr(local, "connection"):
+                local.connection = http.client.HTTPConnection(host, port, timeout=60)
+            if cold:
+                cache.clear()  # The server runs in this process, so this is its cache too
+            started = time.perf_counter()
+            local.connection.request("GET", url, headers={"Host": "localhost"})
+            response = local.connection.getresponse()
+            body = response.read()
+            if response.getheader("Connection", "").lower() == "close":
+                local.connection.close()
+                del local.connection
+            return _sample(response.status, started, response.getheader("Server-Timing"), len(body))
+
+        fetch(data.url(scenario))
+        urls = [data.url(scenario) for _ in range(self.requests)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            samples = list(pool.map(fetch, urls))
+        return summarize(samples, elapsed=time.perf_counter() - started)
+
+    def serving(self):
+        if self.server == "wsgi":
+            return _wsgi_server()
+        if self.server == "asgi":
+            return _asgi_server()
+        return _no_server()
+
+
+class _no_server:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _wsgi_server:
+    """Django's threaded development server (as runserver uses it) on a free local port."""
+
+    def __enter__(self):
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+
+        class QuietHandler(WSGIRequestHandler):
+            # Headers and body go out in separate writes; with Nagle on each response waits ~40 ms for an ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler, allow_reuse_address=False)
+        self.httpd.set_app(get_internal_wsgi_application())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.httpd.server_address[:2]
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+        return False
+
+
+class _asgi_server:
+    """uvicorn serving the project's ASGI application; uvicorn is optional."""
+
+    def __enter__(self):
+        try:
+            import uvicorn
+        except ImportError:
+            raise BenchmarkUnavailable("The ASGI benchmark needs uvicorn: pip install uvicorn")
+        import socket
+
+        from django.core.asgi import get_asgi_application
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(get_asgi_application(), host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise BenchmarkUnavailable("uvicorn did not start")
+            time.sleep(0.05)
+        return ("127.0.0.1", port)
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+        return False
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2, floor_ms=2.0):
+    """
+    Regressions of `results` against `baseline`: a p50 slower by more than `tolerance` (a
+    fraction) and by more than `floor_ms`, a p95 slower by more than twice that (tail latency is
+    much noisier), or any scenario running more SQL queries.
+    """
+    regressions = []
+    for scenario, variants in results["scenarios"].items():
+        for variant, numbers in variants.items():
+            before = baseline.get("scenarios", {}).get(scenario, {}).get(variant)
+            if not before:
+                continue
+            for metric, scale in (("p50_ms", 1), ("p95_ms", 2)):
+                limit = max(before[metric] * (1 + tolerance * scale), before[metric] + floor_ms * scale)
+                if numbers[metric] > limit:
+                    regressions.append(
+                        f"{scenario} ({variant}) {metric} {numbers[metric]:.2f} ms, baseline {before[metric]:.2f} ms"
+                    )
+            if (numbers["queries_max"] or 0) > (before.get("queries_max") or 0):
+                regressions.append(
+                    f"{scenario} ({variant}) runs {numbers['queries_max']} queries, baseline {before['queries_max']}"
+                )
+    return regressions
@@ -0,0 +1,198 @@
+# perfumes/benchmarks/stubserver.py
+"""
+Local stand-in for Fragrantica, so `import_perfumes` can be run and measured without the live site.
+
+Any `*.html` path is answered with a synthetic perfume page (og:description, an itemprop image
+pointing back at the stub, padding up to a realistic page size); `/mdimg/...jpg` paths with one
+of a small pool of real JPEGs. Latency, the share of 429 answers, bodies trickled out slowly and
+malformed pages are all configurable, and every request is counted. Point the importer at it with
+`--base-url`: the client keeps each URL's path and swaps the host.
+"""
+import hashlib
+import io
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+FILLER = (
+    '<div class="cell"><span class="vote-button-legend">love</span><span class="vote-button-legend">like</span>'
+    '<span class="vote-button-legend">ok</span><div class="voting-small-chart-size" style="width: 42%"></div></div>\n'
+)
+MALFORMED = ("truncated", "no_metadata", "unclosed", "binary")
+
+
+def add_stub_arguments(parser):
+    """Stub behaviour options shared by `fragrantica_stub` and `benchmark_import`."""
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before each response starts (default: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered 429 (0-1)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--slow-body", type=float, default=0.0, help="Share of responses trickled out in small chunks (0-1)")
+    parser.add_argument("--slow-delay", type=float, default=0.01, help="Pause between the chunks of a slow body")
+    parser.add_argument("--malformed", type=float, default=0.0, help="Share of pages served broken (0-1)")
+    parser.add_argument("--page-kb", type=int, default=120, help="Approximate size of a perfume page in KB")
+    parser.add_argument("--stub-seed", type=int, default=42, help="Seed for the stub's random choices")
+
+
+def stub_options(options):
+    return {
+        "latency": options["latency"],
+        "jitter": options["jitter"],
+        "rate_429": options["rate_429"],
+        "retry_after": options["retry_after"],
+        "slow_body": options["slow_body"],
+        "slow_delay": options["slow_delay"],
+        "malformed": options["malformed"],
+        "page_kb": options["page_kb"],
+        "seed": options["stub_seed"],
+    }
+
+
+def _image_pool(count, seed):
+    """`count` distinct JPEGs of a typical product shot size, so content-hash dedupe sees real variety."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(count):
+        image = Image.new("RGB", (375, 500), tuple(rng.randrange(256) for _ in range(3)))
+        bottle = Image.new("RGB", (150, 300), tuple(rng.randrange(256) for _ in range(3)))
+        image.paste(bottle, (112, 150))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        pool.append(buffer.getvalue())
+    return pool
+
+
+class FragranticaStub:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.02, rate_429=0.0, retry_after=0.5,
+                 slow_body=0.0, slow_delay=0.01, malformed=0.0, page_kb=120, images=50, seed=42):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.slow_body = slow_body
+        self.slow_delay = slow_delay
+        self.malformed = malformed
+        self.padding = FILLER * max(0, page_kb * 1024 // len(FILLER))
+        self.images = _image_pool(images, seed)
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+
+    def _roll(self, share):
+        with self._lock:
+            return self._random.random() < share
+
+    def _count(self, **amounts):
+        with self._lock:
+            self.stats.update(amounts)
+
+    def page(self, path):
+        """HTML for the perfume page at `path`; a `malformed` share of pages comes back broken."""
+        number = int(hashlib.md5(path.encode()).hexdigest()[:8], 16)
+        slug = path.rsplit("/", 1)[-1].removesuffix(".html")
+        title = slug.replace("-", " ")
+        html = (
+            f"<!DOCTYPE html><html><head><title>{title} - a fragrance</title>"
+            f'<meta property="og:description" content="{title} is a fragrance for women and men. '
+            f'Top notes are bergamot and pink pepper; middle notes are rose and iris; base notes are musk &amp; amber.">'
+            f'<meta property="og:image" content="https://fimgs.net/mdimg/perfume/o.{number}.jpg">'
+            f"</head><body><div id=\"main-content\"><h1>{title}</h1>"
+            f'<div class="cell"><img itemprop="image" src="https://fimgs.net/mdimg/perfume-thumbs/375x500.{number}.jpg"></div>'
+            f"<div itemprop=\"description\"><p>{title} was launched in {1950 + number % 75}.</p></div>"
+            f"{self.padding}</div></body></html>"
+        )
+        if not self._roll(self.malformed):
+            return html.encode()
+        with self._lock:
+            kind = self._random.choice(MALFORMED)
+            cut = self._random.randrange(20, 400)
+            noise = self._random.randbytes(2048)
+        self._count(malformed=1)
+        if kind == "truncated":
+            return html[:cut].encode()
+        if kind == "no_metadata":
+            return f"<html><body><h1>{title}</h1>{self.padding}</body></html>".encode()
+        if kind == "unclosed":
+            return html.replace("</div>", "").replace('">', '"', 3).encode()
+        return noise
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._count(requests=1)
+                time.sleep(stub.latency + random.uniform(0, stub.jitter))
+                if stub._roll(stub.rate_429):
+                    stub._count(throttled=1)
+                    return self.respond(429, "text/plain", b"Too Many Requests", {"Retry-After": str(stub.retry_after)})
+                path = self.path.split("?", 1)[0]
+                if path.endswith(".jpg"):
+                    number = int("".join(ch for ch in path if ch.isdigit()) or 0)
+                    return self.respond(200, "image/jpeg", stub.images[number % len(stub.images)])
+                if path.endswith(".html"):
+                    return self.respond(200, "text/html; charset=utf-8", stub.page(path))
+                stub._count(not_found=1)
+                return self.respond(404, "text/plain", b"Not Found")
+
+            def respond(self, status, content_type, body, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                stub._count(bytes=len(body))
+                if status == 200 and stub._roll(stub.slow_body):
+                    stub._count(slow=1)
+                    chunk = max(1024, len(body) // 20)
+                    for start in range(0, len(body), chunk):
+                        self.wfile.write(body[start:start + chunk])
+                        self.wfile.flush()
+                        time.sleep(stub.slow_delay)
+                else:
+                    self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,120 @@
+# perfumes/caching.py
+"""
+Page and fragment caching for the public catalog pages.
+
+Every cache key embeds a catalog version that is bumped whenever a perfume or review is saved or
+deleted, so stale entries are never read again and simply expire. Whole pages are cached for
+anonymous GETs only; card fragments are cached per perfume.
+
+The same bump records a catalog timestamp, which backs the ETag / Last-Modified headers so
+browsers and proxies can revalidate with a 304 without the view running at all.
+
+Versions and the timestamp live in the CATALOG_STATE_CACHE backend, which every process shares
+(web workers, imports and other management commands); the pages and fragments keyed by them can
+stay in a fast per-process cache.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.middleware.cache import CacheMiddleware
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+CATALOG_VERSION_KEY = "perfumes:catalog_version"
+CATALOG_STAMP_KEY = "perfumes:catalog_stamp"
+
+
+def state_cache():
+    return caches[getattr(settings, "CATALOG_STATE_CACHE", DEFAULT_CACHE_ALIAS)]
+
+
+def get_version(key):
+    return state_cache().get(key, 0)
+
+
+def bump_version(key):
+    try:
+        state_cache().incr(key)
+    except ValueError:
+        # Start from the clock, so a lost counter never comes back as a version old entries were keyed by
+        state_cache().set(key, int(time.time()), None)
+
+
+def catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+    state_cache().set(CATALOG_STAMP_KEY, timezone.now(), None)
+
+
+def catalog_last_modified():
+    """
+    When the catalog last changed, as recorded by `bump_catalog_version`. A cold cache starts the
+    clock now rather than reading `updated_at` columns, which say nothing about deletions.
+    """
+    stamp = state_cache().get(CATALOG_STAMP_KEY)
+    if stamp is None:
+        stamp = timezone.now()
+        state_cache().add(CATALOG_STAMP_KEY, stamp, None)
+        stamp = state_cache().get(CATALOG_STAMP_KEY, stamp)
+    return stamp
+
+
+def _page_timeout():
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 60 * 5)
+
+
+def cache_anonymous_page(view):
+    """
+    Like `cache_page`, but keyed by the catalog version and skipped for logged-in users and for
+    requests carrying flash messages. Views that branch on request headers should mark them with
+    `vary_on_headers` below this decorator.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.user.is_authenticated or get_messages(request):
+            return view(request, *args, **kwargs)
+        middleware = CacheMiddleware(
+            lambda req: view(req, *args, **kwargs),
+            page_timeout=_page_timeout(),
+            key_prefix=f"catalog.{catalog_version()}",
+        )
+        return middleware(request)
+    return wrapper
+
+
+def _catalog_etag(request, *args, **kwargs):
+    # Full pages and htmx/XHR partials share a URL, so they need different validators
+    variant = "partial" if request.headers.get("HX-Request") or request.headers.get("x-requested-with") else "page"
+    return f"{catalog_last_modified().timestamp():.6f}-{variant}"
+
+
+def _catalog_last_modified(request, *args, **kwargs):
+    return catalog_last_modified()
+
+
+def catalog_conditional(view):
+    """
+    Answer If-None-Match / If-Modified-Since from the catalog timestamp before the view runs.
+    Only successful responses keep the validators: an error (e.g. an API 400) must not be
+    revalidated into a 304. Responses carrying flash messages get none either, so a browser
+    never revalidates its way back to a stale message.
+    """
+    conditional = condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if get_messages(request):
+            return view(request, *args, **kwargs)
+        response = conditional(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            for header in ("ETag", "Last-Modified"):
+                if header in response:
+                    del response[header]
+        return response
+    return wrapper
@@ -0,0 +1,164 @@
+# perfumes/compare.py
+"""
+Side-by-side comparison data for `compare_perfumes`.
+
+Requested IDs are cleaned up (digits only, duplicates dropped, at most COMPARE_MAX_PERFUMES),
+the perfumes are loaded in one query, and everything compare_table.html shows is worked out once:
+each perfume's cells with its notes and accords marked shared or not, whether the perfumes differ
+on each row, and the matrix of notes at least two of them share. That is cached under the sorted
+ID tuple and the catalog version, so every ordering of a shared link uses the same entry; only the
+column order is applied per request.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .caching import catalog_version
+from .models import Perfume, split_notes
+from .taxonomy import ACCORD_FIELDS, LAYER_FIELDS, normalize_name
+
+COMPARE_KEY = "perfumes:compare:{version}:{ids}"
+
+LOADED_FIELDS = (
+    "id", "name", "brand", "url", "image", "image_url", "country", "gender", "year", "rating_value", "rating_count",
+    "top_notes", "middle_notes", "base_notes", *ACCORD_FIELDS, "perfumer1", "perfumer2", "description",
+)
+LAYER_NAMES = {"top_notes": "top", "middle_notes": "heart", "base_notes": "base"}
+
+# (key, label, icon, how the cells are shown)
+ROWS = (
+    ("country", "Country", "🌍", "text"),
+    ("gender", "Gender", "👤", "text"),
+    ("year", "Year", "📅", "text"),
+    ("rating", "Rating", "⭐", "rating"),
+    ("top_notes", "Top Notes", "🌸", "tags"),
+    ("middle_notes", "Middle Notes", "🌺", "tags"),
+    ("base_notes", "Base Notes", "🪵", "tags"),
+    ("accords", "Main Accords", "🎵", "tags"),
+    ("perfumers", "Perfumer(s)", "👨‍🔬", "text"),
+    ("description", "Description", "📝", "description"),
+)
+
+
+def _max_perfumes():
+    return getattr(settings, "COMPARE_MAX_PERFUMES", 4)
+
+
+def _timeout():
+    return getattr(settings, "COMPARE_CACHE_TIMEOUT", 60 * 60)
+
+
+def parse_compare_ids(values):
+    """Perfume IDs from `?perfumes=` values: numbers only, first occurrence kept, capped."""
+    ids = []
+    for value in values:
+        value = value.strip()
+        if value.isascii() and value.isdigit() and int(value) not in ids:
+            ids.append(int(value))
+            if len(ids) >= _max_perfumes():
+                break
+    return ids
+
+
+def _cells(perfume):
+    """Row key -> cell value for one perfume; notes and accords as lists of names until rendered."""
+    cells = {
+        "country": perfume.country or "",
+        "gender": perfume.gender or "",
+        "year": perfume.year or "",
+        "rating": (perfume.rating_value, perfume.rating_count),
+        "accords": list(dict.fromkeys(
+            normalize_name(getattr(perfume, field)) for field in ACCORD_FIELDS if normalize_name(getattr(perfume, field))
+        )),
+        "perfumers": ", ".join(name for name in (perfume.perfumer1, perfume.perfumer2) if name),
+        "description": Truncator(perfume.description or "").words(40),
+    }
+    for field in LAYER_FIELDS.values():
+        cells[field] = list(dict.fromkeys(normalize_name(note) for note in split_notes(getattr(perfume, field))))
+    return cells
+
+
+def _tags_html(tags):
+    """Badges for one notes/accords cell, rendered once per comparison instead of looped over per request."""
+    if not tags:
+        return mark_safe("<span>–</span>")
+    return mark_safe("".join(
+        f'<span class="accord-badge shared-tag" title="Shared with another perfume here">{escape(name)}</span>'
+        if shared else f'<span class="accord-badge">{escape(name)}</span>'
+        for name, shared in tags
+    ))
+
+
+def _comparable(key, value):
+    if key == "rating":
+        return value[0]  # The number of ratings always differs; the score is what matters
+    return frozenset(value) if isinstance(value, list) else value
+
+
+def build_comparison(ids):
+    """The order-independent comparison of the perfumes with these IDs (missing ones are left out)."""
+    perfumes = {perfume.pk: perfume for perfume in Perfume.objects.filter(pk__in=ids).only(*LOADED_FIELDS)}
+    cells = {pk: _cells(perfume) for pk, perfume in perfumes.items()}
+
+    # note -> {perfume id: layer it appears in}, and how many perfumes list each accord
+    note_layers, accord_counts = {}, {}
+    for pk, values in cells.items():
+        for field, layer in LAYER_NAMES.items():
+            for note in values[field]:
+                note_layers.setdefault(note, {}).setdefault(pk, layer)
+        for accord in values["accords"]:
+            accord_counts[accord] = accord_counts.get(accord, 0) + 1
+
+    differs = {
+        key: len({_comparable(key, values[key]) for values in cells.values()}) > 1
+        for key, _, _, _ in ROWS
+    }
+    for pk, values in cells.items():
+        for field in LAYER_NAMES:
+            values[field] = _tags_html([(note, len(note_layers[note]) > 1) for note in values[field]])
+        values["accords"] = _tags_html([(accord, accord_counts[accord] > 1) for accord in values["accords"]])
+    shared_notes = sorted(
+        ((note, layers) for note, layers in note_layers.items() if len(layers) > 1),
+        key=lambda item: (-len(item[1]), item[0]),
+    )
+    return {"perfumes": perfumes, "cells": cells, "differs": differs, "shared_notes": shared_notes}
+
+
+class Comparison:
+    """A cached comparison laid out in the order the IDs were requested."""
+
+    def __init__(self, ids, data):
+        self.perfumes = [data["perfumes"][pk] for pk in ids if pk in data["perfumes"]]
+        order = [perfume.pk for perfume in self.perfumes]
+        # Keys the rendered table's fragment cache; column order matters there
+        self.key = ",".join(map(str, order))
+        self.rows = [
+            {
+                "key": key, "label": label, "icon": icon, "kind": kind,
+                "differs": data["differs"][key],
+                "cells": [data["cells"][pk][key] for pk in order],
+            }
+            for key, label, icon, kind in ROWS
+        ]
+        self.shared_notes = [
+            {"note": note, "count": len(layers), "layers": [layers.get(pk) for pk in order]}
+            for note, layers in data["shared_notes"]
+        ]
+
+    @property
+    def differing_rows(self):
+        return sum(1 for row in self.rows if row["differs"])
+
+
+def compare(ids):
+    """Comparison of the perfumes `ids` (as cleaned by parse_compare_ids), served from the cache when possible."""
+    if not ids:
+        return Comparison([], build_comparison([]))  # An empty IN () never reaches the database
+    key = COMPARE_KEY.format(version=catalog_version(), ids=",".join(map(str, sorted(ids))))
+    data = cache.get(key)
+    if data is None:
+        data = build_comparison(ids)
+        cache.set(key, data, _timeout())
+    return Comparison(ids, data)
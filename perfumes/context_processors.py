@@ -0,0 +1,7 @@
+# perfumes/context_processors.py
+from .caching import catalog_version as current_catalog_version
+
+
+def catalog_version(request):
+    """Expose the catalog version so templates can key `{% cache %}` fragments on it."""
+    return {"catalog_version": current_catalog_version()}
@@ -0,0 +1,197 @@
+# perfumes/facets.py
+"""
+Facet counts for the list and filter views.
+
+The catalog is held as NumPy columns with one row per perfume, sorted by ID: for gender, country
+and brand the code of the row's value, for accords one (row, accord code) pair per link, and the
+rating. Filters become boolean row masks, and counting a facet under the applied filters is one
+`bincount` over the masked codes, with no GROUP BY query. Memory and time grow with the catalog
+size, not with the number of facet values or the largest ID.
+Saving or deleting a perfume bumps a version key in the shared catalog state cache
+(perfumes.caching), and each process rebuilds its index on the next request.
+"""
+import threading
+
+import numpy as np
+
+from .caching import bump_version, get_version
+from .models import Perfume, PerfumeAccord
+from .taxonomy import normalize_name
+
+FACET_VERSION_KEY = "perfumes:facet_version"
+
+FACETS = ("gender", "country", "brand", "accord", "rating")
+RATING_BANDS = (4, 3, 2)
+
+# Saves touching these fields change facet membership
+FACET_FIELDS = {
+    "gender", "country", "brand", "rating_value",
+    "mainaccord1", "mainaccord2", "mainaccord3", "mainaccord4", "mainaccord5",
+}
+
+# Long facets only show their most populated values
+FACET_LIMITS = {"brand": 30, "country": 30, "accord": 40}
+
+# Facets holding one value per perfume, stored as a code column
+COLUMN_FACETS = ("gender", "country", "brand")
+
+_state = {"index": None, "version": None}
+_lock = threading.Lock()
+
+
+class FacetIndex:
+    def __init__(self, rows, accord_rows):
+        # key -> code per facet; codes index `keys`
+        self.codes = {facet: {} for facet in FACETS}
+        self.keys = {facet: [] for facet in FACETS}
+        self.labels = {facet: {} for facet in FACETS}
+
+        rows = sorted(rows)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.columns = {}
+        for position, facet in enumerate(COLUMN_FACETS, start=1):
+            self.columns[facet] = np.array([self._code(facet, row[position]) for row in rows], dtype=np.int32)
+        self.ratings = np.array([np.nan if row[4] is None else row[4] for row in rows], dtype=np.float64)
+
+        pairs = [(pk, self._code("accord", accord, accord)) for pk, accord in accord_rows]
+        pks = np.array([pk for pk, _ in pairs], dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.ids, pks), max(len(self.ids) - 1, 0))
+        known = self.ids[positions] == pks if len(self.ids) else np.zeros(len(pks), dtype=bool)
+        self.accord_rows = positions[known]
+        self.accord_codes = np.array([code for _, code in pairs], dtype=np.int32)[known]
+
+        for band in RATING_BANDS:
+            self._code("rating", str(band), f"{band}★ & Up")
+        self.all = np.ones(len(self.ids), dtype=bool)
+
+    def _code(self, facet, value, label=None):
+        """Code of `value`'s key in `facet`, registered on first sight; -1 for blank values."""
+        key = value if label is not None else normalize_name(value)
+        if not key:
+            return -1
+        code = self.codes[facet].get(key)
+        if code is None:
+            code = self.codes[facet][key] = len(self.keys[facet])
+            self.keys[facet].append(key)
+            self.labels[facet][key] = label if label is not None else value.strip()
+        return code
+
+    @classmethod
+    def from_catalog(cls):
+        return cls(
+            Perfume.objects.order_by("id").values_list("id", "gender", "country", "brand", "rating_value").iterator(chunk_size=5000),
+            PerfumeAccord.objects.values_list("perfume_id", "accord__name").iterator(chunk_size=5000),
+        )
+
+    def mask_of(self, ids):
+        """Row mask of the perfumes with these IDs."""
+        return np.isin(self.ids, np.fromiter(ids, dtype=np.int64))
+
+    def _mask_of_codes(self, facet, codes):
+        if facet == "accord":
+            mask = np.zeros(len(self.ids), dtype=bool)
+            mask[self.accord_rows[np.isin(self.accord_codes, codes)]] = True
+            return mask
+        return np.isin(self.columns[facet], codes)
+
+    def resolve(self, facet, value, contains=False):
+        """Row mask for a filter value: an exact facet key, else (with `contains`) every key containing it."""
+        if facet == "rating":
+            try:
+                threshold = float(value)
+            except ValueError:
+                return None
+            return self.ratings >= threshold
+        key = normalize_name(value)
+        if key in self.codes[facet]:
+            return self._mask_of_codes(facet, [self.codes[facet][key]])
+        if contains:
+            return self._mask_of_codes(facet, [code for candidate, code in self.codes[facet].items() if key in candidate])
+        return None
+
+    def _tally(self, facet, mask):
+        """Count of masked perfumes per code of `facet`."""
+        if facet == "rating":
+            rated = self.ratings[mask]
+            return np.array([np.count_nonzero(rated >= band) for band in RATING_BANDS])
+        if facet == "accord":
+            codes = self.accord_codes[mask[self.accord_rows]]
+        else:
+            codes = self.columns[facet][mask]
+            codes = codes[codes >= 0]
+        return np.bincount(codes, minlength=len(self.keys[facet]))
+
+    def counts(self, selected, chosen=None):
+        """
+        Counts for every facet value given `selected` ({facet: row mask}); `chosen` ({facet: key})
+        marks the options currently picked. A facet's own selection is left out when counting that
+        facet, so users see what switching the value would give.
+        """
+        chosen = chosen or {}
+        result = {"total": int(np.count_nonzero(self._mask(selected)))}
+        for facet in FACETS:
+            tally = self._tally(facet, self._mask(selected, skip=facet))
+            shown = set(np.flatnonzero(tally).tolist())
+            if chosen.get(facet) in self.codes[facet]:
+                shown.add(self.codes[facet][chosen[facet]])
+            options = []
+            for code in shown:
+                key = self.keys[facet][code]
+                options.append({
+                    "key": key,
+                    "label": self.labels[facet][key],
+                    "count": int(tally[code]),
+                    "selected": key == chosen.get(facet),
+                })
+            if facet == "rating":
+                options.sort(key=lambda option: -float(option["key"]))
+            else:
+                options.sort(key=lambda option: (-option["count"], option["label"]))
+                if facet in FACET_LIMITS:
+                    options = options[:FACET_LIMITS[facet]]
+            result[facet] = options
+        return result
+
+    def _mask(self, selected, skip=None):
+        mask = self.all
+        for facet, rows in selected.items():
+            if facet != skip:
+                mask = mask & rows
+        return mask
+
+
+def get_facet_index():
+    version = get_version(FACET_VERSION_KEY)
+    if _state["index"] is None or _state["version"] != version:
+        with _lock:
+            if _state["index"] is None or _state["version"] != version:
+                _state["index"] = FacetIndex.from_catalog()
+                _state["version"] = version
+    return _state["index"]
+
+
+def invalidate_facets():
+    bump_version(FACET_VERSION_KEY)
+
+
+def facet_counts(params, contains=(), extra=None):
+    """
+    Facet counts for the filters in `params` (a QueryDict). Facets listed in `contains` match
+    keys by substring, as the matching view does; `extra` maps facets the index can't express
+    (e.g. full-text brand search) to a queryset whose IDs stand in for that filter.
+    """
+    index = get_facet_index()
+    extra = extra or {}
+    selected, chosen = {}, {}
+    for facet in FACETS:
+        value = (params.get(facet) or "").strip()
+        if not value:
+            continue
+        chosen[facet] = value if facet == "rating" else normalize_name(value)
+        if facet in extra:
+            selected[facet] = index.mask_of(extra[facet].values_list("id", flat=True))
+            continue
+        mask = index.resolve(facet, value, contains=facet in contains)
+        if mask is not None:
+            selected[facet] = mask
+    return index.counts(selected, chosen)
@@ -0,0 +1,46 @@
+# perfumes/featured.py
+import random
+
+from django.conf import settings
+
+from .caching import state_cache
+from .models import Perfume
+
+FEATURED_POOL_KEY = "perfumes:featured_pool"
+
+
+def _pool_size():
+    return getattr(settings, "FEATURED_POOL_SIZE", 50)
+
+
+def _pool_ttl():
+    return getattr(settings, "FEATURED_POOL_TTL", 60 * 60)
+
+
+def refresh_featured_pool():
+    """Pick a fresh random pool of featured perfume IDs and store it in the shared state cache."""
+    # Only IDs are loaded here, never full model instances
+    candidates = Perfume.objects.exclude(image="").exclude(image__isnull=True)
+    ids = list(candidates.values_list("id", flat=True))
+    if not ids:
+        ids = list(Perfume.objects.values_list("id", flat=True))
+
+    pool = random.sample(ids, min(_pool_size(), len(ids)))
+    state_cache().set(FEATURED_POOL_KEY, pool, _pool_ttl())
+    return pool
+
+
+def get_featured_pool():
+    """Return the cached pool of featured IDs, rebuilding it once the TTL expires."""
+    pool = state_cache().get(FEATURED_POOL_KEY)
+    if pool is None:
+        pool = refresh_featured_pool()
+    return pool
+
+
+def get_featured_perfumes(count=5):
+    """Fetch `count` random perfumes from the featured pool by primary key."""
+    pool = get_featured_pool()
+    ids = random.sample(pool, min(count, len(pool)))
+    found = Perfume.objects.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
@@ -0,0 +1,221 @@
+# perfumes/images.py
+"""
+Storage of perfume images, plus pre-rendered derivatives: smaller widths and AVIF/WebP encodings.
+
+Downloaded images are checked to decode with Pillow and stored under their content hash,
+`perfumes/ab/abcdef….jpg`, so every perfume showing the same picture shares one file and
+re-imports never add copies.
+
+For an image stored as `perfumes/375x500.1.jpg` the derivatives live under
+`derivatives/perfumes/375x500.1/` as `<width>w.<ext>`. The original keeps serving as the
+full-width JPEG. Which derivatives exist is read with one directory listing per image and
+cached under the catalog version, so templates can emit `srcset` without touching the disk on
+every render. Derivatives written by another process (`manage.py build_image_derivatives`) show
+up once that process bumps the version.
+"""
+import hashlib
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, features
+
+from .caching import catalog_version
+
+IMAGES_DIR = "perfumes"
+DERIVATIVES_DIR = "derivatives"
+DERIVATIVES_KEY_PREFIX = "perfumes:derivatives:"
+
+# format -> (Pillow format name, file extension, MIME type, save options)
+FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif", {"quality": 50}),
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+# Pillow format name -> extension images of that format are stored with
+STORED_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "AVIF": "avif"}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def verify_image(content):
+    """Extension for `content` if it decodes completely as a supported image; raises InvalidImage otherwise."""
+    try:
+        with Image.open(BytesIO(content)) as image:
+            image_format = image.format
+            image.verify()
+        # verify() checks the structure only; a full decode catches truncated downloads
+        with Image.open(BytesIO(content)) as image:
+            image.load()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e) or e.__class__.__name__)
+    if image_format not in STORED_EXTENSIONS:
+        raise InvalidImage(f"unsupported image format {image_format}")
+    return STORED_EXTENSIONS[image_format]
+
+
+def content_name(content, extension):
+    """Storage name of an image with these bytes: `perfumes/<2 hex>/<sha256>.<ext>`."""
+    digest = hashlib.sha256(content).hexdigest()
+    return f"{IMAGES_DIR}/{digest[:2]}/{digest}.{extension}"
+
+
+def store_image(content, name=None):
+    """
+    Store verified image bytes under their content name (pass `name` when already computed);
+    an existing identical file is reused. Returns (name, whether a new file was written).
+    """
+    name = name or content_name(content, verify_image(content))
+    if default_storage.exists(name):
+        return name, False
+    saved = default_storage.save(name, ContentFile(content))
+    # Another writer may have stored the same bytes in between; keep theirs
+    if saved != name:
+        default_storage.delete(saved)
+    return name, True
+
+
+def attach_image(perfume, content, name=None, rendered=None):
+    """Point `perfume.image` (unsaved) at the stored copy of `content`, storing it and its derivatives if new."""
+    perfume.image.name, written = store_image(content, name)
+    if written and rendered:
+        save_derivatives(perfume.image.name, rendered)
+
+
+def derivative_widths():
+    return tuple(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", (80, 160, 240, 320)))
+
+
+def derivative_formats():
+    """Configured formats this Pillow build can actually write, best compression first."""
+    wanted = getattr(settings, "IMAGE_DERIVATIVE_FORMATS", ("avif", "webp", "jpeg"))
+    return tuple(fmt for fmt in wanted if fmt == "jpeg" or features.check(fmt))
+
+
+def _lookup_timeout():
+    return getattr(settings, "IMAGE_DERIVATIVES_CACHE_TIMEOUT", 60 * 60)
+
+
+def derivative_dir(image_name):
+    path = PurePosixPath(image_name)
+    return str(PurePosixPath(DERIVATIVES_DIR, path.parent, path.stem))
+
+
+def derivative_name(image_name, width, fmt):
+    return f"{derivative_dir(image_name)}/{width}w.{FORMATS[fmt][1]}"
+
+
+def _cache_key(image_name):
+    return f"{DERIVATIVES_KEY_PREFIX}{catalog_version()}:{hashlib.md5(image_name.encode('utf-8')).hexdigest()}"
+
+
+def render_derivatives(content, widths=None, formats=None, skip=()):
+    """
+    Encode `content` (the bytes of an image) at every derivative width narrower than the image
+    itself, plus the full width in the non-JPEG formats. Returns [(width, format, bytes)];
+    (width, format) pairs in `skip` are not rendered.
+    """
+    widths = derivative_widths() if widths is None else widths
+    formats = derivative_formats() if formats is None else formats
+    with Image.open(BytesIO(content)) as image:
+        # Only the header has been read so far; nothing is decoded when every derivative exists
+        full_width, full_height = image.size
+        plan = {}
+        for width in sorted({w for w in widths if w < full_width} | {full_width}):
+            todo = [
+                fmt for fmt in formats
+                if (width, fmt) not in skip and not (fmt == "jpeg" and width == full_width)
+            ]
+            if todo:
+                plan[width] = todo
+        if not plan:
+            return []
+
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        rendered = []
+        for width, todo in plan.items():
+            height = max(1, round(full_height * width / full_width))
+            resized = image if width == full_width else image.resize((width, height), Image.LANCZOS)
+            for fmt in todo:
+                pil_format, _, _, options = FORMATS[fmt]
+                frame = resized.convert("RGB") if fmt == "jpeg" and resized.mode == "RGBA" else resized
+                buffer = BytesIO()
+                frame.save(buffer, format=pil_format, **options)
+                rendered.append((width, fmt, buffer.getvalue()))
+    return rendered
+
+
+def save_derivatives(image_name, rendered):
+    for width, fmt, data in rendered:
+        name = derivative_name(image_name, width, fmt)
+        # Storage would otherwise save under a new, suffixed name
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(data))
+    cache.delete(_cache_key(image_name))
+
+
+def delete_derivatives(image_name):
+    directory = derivative_dir(image_name)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        files = []
+    for file_name in files:
+        default_storage.delete(f"{directory}/{file_name}")
+    cache.delete(_cache_key(image_name))
+    return len(files)
+
+
+def _stored(image_name):
+    """{(width, format)} of the derivatives on disk for `image_name`."""
+    try:
+        _, files = default_storage.listdir(derivative_dir(image_name))
+    except FileNotFoundError:
+        return set()
+    extensions = {ext: fmt for fmt, (_, ext, _, _) in FORMATS.items()}
+    stored = set()
+    for file_name in files:
+        stem, _, ext = file_name.partition(".")
+        if stem.endswith("w") and stem[:-1].isdigit() and ext in extensions:
+            stored.add((int(stem[:-1]), extensions[ext]))
+    return stored
+
+
+def generate_derivatives(image_name, force=False):
+    """Render and store the missing derivatives of a stored image; returns how many were written."""
+    with default_storage.open(image_name, "rb") as f:
+        rendered = render_derivatives(f.read(), skip=set() if force else _stored(image_name))
+    if rendered:
+        save_derivatives(image_name, rendered)
+    return len(rendered)
+
+
+def available_derivatives(image_name):
+    """{format: [(width, url), ...] narrowest first} for the derivatives of `image_name`, cached."""
+    key = _cache_key(image_name)
+    found = cache.get(key)
+    if found is None:
+        found = {}
+        for width, fmt in sorted(_stored(image_name)):
+            found.setdefault(fmt, []).append((width, default_storage.url(derivative_name(image_name, width, fmt))))
+        cache.set(key, found, _lookup_timeout())
+    return found
+
+
+def derivative_url(image_name, min_width):
+    """URL of the narrowest JPEG/WebP derivative at least `min_width` wide, if there is one."""
+    found = available_derivatives(image_name)
+    for fmt in ("jpeg", "webp"):
+        for width, url in found.get(fmt, []):
+            if width >= min_width:
+                return url
+    return None
@@ -0,0 +1,22 @@
+# perfumes/importer/__init__.py
+"""Building blocks for `manage.py import_perfumes`: rate limiting, HTTP client, parsing, the pipeline and the image queue."""
+from .client import FetchResult, FragranticaClient, NotCached, RateLimited
+from .httpcache import HttpCache
+from .imagequeue import ImageQueueWorker, enqueue_images
+from .parsing import parse_perfume_page
+from .pipeline import ImportPipeline, ScrapeJob
+from .ratelimit import TokenBucket
+
+__all__ = [
+    "FetchResult",
+    "FragranticaClient",
+    "HttpCache",
+    "ImageQueueWorker",
+    "ImportPipeline",
+    "NotCached",
+    "RateLimited",
+    "ScrapeJob",
+    "TokenBucket",
+    "enqueue_images",
+    "parse_perfume_page",
+]
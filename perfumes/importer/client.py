@@ -0,0 +1,129 @@
+# perfumes/importer/client.py
+"""
+HTTP client for Fragrantica pages and images, safe to share between worker threads.
+
+Each thread gets its own cloudscraper session. Every request first takes a token from the
+shared rate limiter; a 429 throttles that limiter (and so the whole pool) and the request is
+retried, up to `max_retries` times before `RateLimited` is raised for that URL.
+
+With an HttpCache, stored responses are returned without touching the network or the limiter
+("use"), always refetched and stored again ("refresh"), or the only source allowed ("offline").
+Responses are cached under the URL actually fetched, so a run against a stub server (`base_url`)
+never replays as, or from, the real site.
+"""
+import random
+import threading
+from collections import Counter, namedtuple
+from urllib.parse import urlsplit, urlunsplit
+
+import cloudscraper
+import requests
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0',
+]
+
+BASE_HEADERS = {
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.google.com/",
+}
+
+
+class RateLimited(Exception):
+    """Raised when a URL keeps answering 429 after every retry."""
+
+
+class NotCached(Exception):
+    """Raised in offline mode for a URL the cache holds no copy of."""
+
+
+class FetchResult(namedtuple("FetchResult", ["url", "status", "headers", "content"])):
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+
+class FragranticaClient:
+    CACHE_MODES = ("use", "refresh", "offline")
+
+    def __init__(self, limiter, max_retries=10, timeout=15, base_url=None, backoff=2.0, cache=None, cache_mode="use"):
+        if cache_mode not in self.CACHE_MODES:
+            raise ValueError(f"cache_mode must be one of {self.CACHE_MODES}")
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.backoff = backoff
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self.stats = Counter()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = cloudscraper.create_scraper()
+        return self._local.session
+
+    def rewrite(self, url):
+        """Point `url` at `base_url` (e.g. a local stub server), keeping its path and query."""
+        if not self.base_url:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, base.path + parts.path, parts.query, ""))
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def fetch(self, url):
+        """GET `url` from the cache or the network. Returns a FetchResult for any non-429 status."""
+        url = self.rewrite(url)
+        if self.cache is not None and self.cache_mode != "refresh":
+            cached = self.cache.get(url, ignore_ttl=self.cache_mode == "offline")
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+            if self.cache_mode == "offline":
+                raise NotCached(url)
+
+        result = self._download(url)
+        self._count("requests")
+        self._count("bytes", len(result.content))
+        if self.cache is not None:
+            self.cache.put(url, result)
+        return result
+
+    def _download(self, url):
+        """GET `url` (already rewritten), honouring the rate limiter."""
+        for attempt in range(self.max_retries):
+            self.limiter.acquire()
+            headers = dict(BASE_HEADERS, **{"User-Agent": random.choice(USER_AGENTS)})
+            try:
+                res = self.session.get(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+            except requests.RequestException:
+                # Connection errors and timeouts are retried like a 429, without the slowdown
+                if attempt == self.max_retries - 1:
+                    raise
+                self._count("retries")
+                continue
+            if res.status_code == 429:
+                self.limiter.throttle(self._retry_after(res, attempt))
+                self._count("429s")
+                if attempt < self.max_retries - 1:
+                    self._count("retries")
+                continue
+            self.limiter.recover()
+            return FetchResult(url, res.status_code, dict(res.headers), res.content)
+        raise RateLimited(f"429 after {self.max_retries} attempts: {url}")
+
+    def _retry_after(self, res, attempt):
+        try:
+            return max(0.0, float(res.headers.get("Retry-After", "")))
+        except ValueError:
+            return self.backoff ** attempt + random.uniform(1, 3)
@@ -0,0 +1,48 @@
+# perfumes/importer/csvstream.py
+"""
+Streaming CSV reader that knows the byte offset after every row, so an import can be resumed by
+seeking straight to where it stopped instead of re-reading the file from the top.
+"""
+import codecs
+import csv
+
+
+class _OffsetLines:
+    """Iterate the decoded lines of a binary file while counting the bytes consumed."""
+
+    def __init__(self, f, encoding, errors):
+        self.f = f
+        self.offset = f.tell()
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return self.decoder.decode(line)
+
+
+def read_csv(path, start_offset=0, first_row=1, encoding="utf-8", errors="ignore", delimiter=";"):
+    """
+    Yield (row number, offset after the row, row dict) for every data row of `path`. With
+    `start_offset` (an offset previously yielded) reading continues right after that row;
+    `first_row` is then the number to give the next row.
+    """
+    with open(path, "rb") as f:
+        lines = _OffsetLines(f, encoding, errors)
+        header = next(csv.reader(lines, delimiter=delimiter), None)
+        if header is None:
+            return
+        if header and header[0].startswith("\ufeff"):
+            header[0] = header[0][1:]
+        if start_offset > lines.offset:
+            f.seek(start_offset)
+            lines.offset = start_offset
+
+        reader = csv.reader(lines, delimiter=delimiter)
+        for row_num, values in enumerate(reader, start=first_row):
+            yield row_num, lines.offset, dict(zip(header, values))
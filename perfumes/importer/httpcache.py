@@ -0,0 +1,86 @@
+# perfumes/importer/httpcache.py
+"""
+On-disk cache of raw HTTP responses for the importer.
+
+Metadata (status, headers, fetch time) lives in a small SQLite database keyed by URL; bodies are
+stored once per SHA-256 under `bodies/`, so the same image served from several URLs takes the
+space of one. Re-runs, parser changes and offline replays read from here instead of the network.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .client import FetchResult
+
+# Only responses worth replaying are stored; 429s and server errors are always refetched
+CACHEABLE_STATUSES = {200, 203, 301, 404, 410}
+
+
+class HttpCache:
+    def __init__(self, root, ttl=None):
+        self.root = Path(root)
+        self.bodies = self.root / "bodies"
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "responses.sqlite3", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL,"
+            " body_hash TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _body_path(self, digest):
+        return self.bodies / digest[:2] / digest
+
+    def get(self, url, ignore_ttl=False):
+        """The cached FetchResult for `url`, or None when missing or older than the TTL."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body_hash, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, digest, fetched_at = row
+        if not ignore_ttl and self.ttl is not None and time.time() - fetched_at > self.ttl:
+            return None
+        try:
+            content = self._body_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        return FetchResult(url, status, json.loads(headers), content)
+
+    def put(self, url, result):
+        if result.status not in CACHEABLE_STATUSES:
+            return
+        digest = hashlib.sha256(result.content).hexdigest()
+        path = self._body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # Write then rename, so a crash never leaves a truncated body behind
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(result.content)
+            os.replace(tmp, path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body_hash, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, result.status, json.dumps(dict(result.headers)), digest, time.time()),
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            count, = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        size = sum(path.stat().st_size for path in self.bodies.glob("*/*"))
+        return {"responses": count, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,163 @@
+# perfumes/importer/imagequeue.py
+"""
+Image download queue backed by the ImageJob table, so no broker is needed.
+
+`import_perfumes` only records each perfume's image URL here and moves on; `manage.py
+process_image_queue` works through the queue with a pool of download threads. Jobs are claimed
+with a conditional UPDATE, so several worker processes can share one queue. No host ever has
+more than `per_host` downloads running, failures are retried with exponential backoff, and jobs
+left running by a worker that died are handed out again once their lease expires.
+"""
+import random
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from ..images import attach_image
+from ..models import ImageJob, Perfume
+
+# A running job not finished within this long is assumed lost with its worker
+LEASE = timedelta(minutes=10)
+MAX_BACKOFF = 6 * 60 * 60
+
+
+def enqueue_images(jobs):
+    """Queue (perfume id, image URL) pairs; a perfume already in the queue is reset to queued."""
+    now = timezone.now()
+    ImageJob.objects.bulk_create(
+        [
+            ImageJob(
+                perfume_id=perfume_id, url=url, host=urlsplit(url).hostname or "",
+                state=ImageJob.QUEUED, attempts=0, next_attempt_at=now, last_error="",
+            )
+            for perfume_id, url in jobs
+        ],
+        update_conflicts=True,
+        unique_fields=["perfume"],
+        update_fields=["url", "host", "state", "attempts", "next_attempt_at", "claimed_at", "last_error", "updated_at"],
+    )
+
+
+def is_permanent(error):
+    """Errors retrying won't fix: the image is gone or isn't an image."""
+    return error == "image unreadable" or error in ("image HTTP 404", "image HTTP 410")
+
+
+class ImageQueueWorker:
+    def __init__(self, image_client, download, workers=4, per_host=2, max_attempts=5, backoff=30.0, log=None):
+        self.image_client = image_client
+        # download(client, url) -> (name, content, rendered derivatives, error), run on the pool
+        self.download = download
+        self.workers = workers
+        self.per_host = per_host
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.log = log or (lambda message: None)
+        self.stats = Counter()
+
+    def requeue_stale(self):
+        stale = ImageJob.objects.filter(state=ImageJob.RUNNING, claimed_at__lt=timezone.now() - LEASE)
+        return stale.update(state=ImageJob.QUEUED, claimed_at=None)
+
+    def claim(self, slots):
+        """Mark up to `slots` due jobs as running, respecting the per-host cap across all workers."""
+        now = timezone.now()
+        running = Counter(dict(
+            ImageJob.objects.filter(state=ImageJob.RUNNING)
+            .values_list("host").annotate(Count("id")).order_by()
+        ))
+        due = ImageJob.objects.filter(state=ImageJob.QUEUED, next_attempt_at__lte=now).only("perfume_id", "url", "host")
+        claimed = []
+        # Look past the first few jobs so one saturated host doesn't starve the others
+        for job in due[:slots * 10]:
+            if running[job.host] >= self.per_host:
+                continue
+            taken = ImageJob.objects.filter(pk=job.pk, state=ImageJob.QUEUED).update(
+                state=ImageJob.RUNNING, claimed_at=now, attempts=F("attempts") + 1, updated_at=now
+            )
+            if taken:
+                running[job.host] += 1
+                claimed.append(job)
+                if len(claimed) >= slots:
+                    break
+        return claimed
+
+    def run(self, poll=5.0, exit_when_idle=False):
+        """Process the queue until interrupted, or until nothing is due with `exit_when_idle`."""
+        self.requeue_stale()
+        in_flight = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+        try:
+            while True:
+                if len(in_flight) < self.workers:
+                    for job in self.claim(self.workers - len(in_flight)):
+                        in_flight[pool.submit(self.download, self.image_client, job.url)] = job
+                if not in_flight:
+                    if exit_when_idle:
+                        break
+                    time.sleep(poll)
+                    self.requeue_stale()
+                    continue
+                done, _ = wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.finish(in_flight.pop(future), *future.result())
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            for future, job in in_flight.items():
+                if future.done() and not future.cancelled():
+                    self.finish(job, *future.result())
+                else:
+                    # Give the attempt back; the download never finished
+                    ImageJob.objects.filter(pk=job.pk, state=ImageJob.RUNNING).update(
+                        state=ImageJob.QUEUED, claimed_at=None, attempts=F("attempts") - 1
+                    )
+            raise
+        pool.shutdown()
+        return self.stats
+
+    def finish(self, job, name, content, rendered, error):
+        """Writer side, on the calling thread: store the image or schedule the retry."""
+        job.refresh_from_db(fields=["attempts"])
+        now = timezone.now()
+        if error:
+            self.stats["errors"] += 1
+            if is_permanent(error) or job.attempts >= self.max_attempts:
+                state, next_attempt_at = ImageJob.FAILED, now
+                self.stats["failed"] += 1
+                self.log(f"⚠️ Giving up on perfume {job.perfume_id} after {job.attempts} attempts: {error}")
+            else:
+                # Exponential backoff with jitter so retries of one bad host spread out
+                delay = min(self.backoff * 2 ** (job.attempts - 1), MAX_BACKOFF) * random.uniform(0.5, 1.5)
+                state, next_attempt_at = ImageJob.QUEUED, now + timedelta(seconds=delay)
+            ImageJob.objects.filter(pk=job.pk).update(
+                state=state, next_attempt_at=next_attempt_at, claimed_at=None, last_error=error[:255], updated_at=now
+            )
+            return
+
+        with transaction.atomic():
+            perfume = Perfume.objects.filter(pk=job.perfume_id).first()
+            if perfume is not None and not perfume.image:
+                attach_image(perfume, content, name, rendered)
+                perfume.save(update_fields=["image", "updated_at"])
+                self.stats["images"] += 1
+                self.log(f"🖼️ Added image for {perfume.name}")
+            ImageJob.objects.filter(pk=job.pk).update(
+                state=ImageJob.DONE, claimed_at=None, last_error="", updated_at=now
+            )
+        self.stats["done"] += 1
+
+    @staticmethod
+    def status():
+        """Job counts per state, and the most common errors of the failed ones."""
+        counts = dict(ImageJob.objects.values_list("state").annotate(Count("id")).order_by())
+        errors = list(
+            ImageJob.objects.filter(state=ImageJob.FAILED).values_list("last_error")
+            .annotate(count=Count("id")).order_by("-count")[:10]
+        )
+        return counts, errors
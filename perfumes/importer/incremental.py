@@ -0,0 +1,167 @@
+# perfumes/importer/incremental.py
+"""
+Incremental catalog refresh from a new dataset dump.
+
+The CSV is processed in chunks: every row is normalised and hashed, the chunk's perfumes are looked
+up in one query, and only rows whose hash differs from the stored `row_hash` are written. Every
+perfume the dump mentions is stamped with the run number, so after a complete pass the ones it never
+mentioned can be deleted. A row rejected for a bad value still stamps the perfume it names, so a
+typo in the dump never deletes it. Memory is bounded by the chunk size, not by the file or the catalog.
+"""
+import time
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import Perfume, SimilarPerfume
+from ..search import INDEXED_FIELDS
+from ..similarity import FEATURE_FIELDS, update_similarity_for
+from ..taxonomy import TAXONOMY_FIELDS
+from .indexing import index_batch
+from .pipeline import ScrapeJob
+from .rows import CSV_FIELDS, normalize_row, row_hash, same_value
+
+# Changes to these need the search / taxonomy indexes rebuilt for the perfume
+REINDEX_FIELDS = INDEXED_FIELDS | TAXONOMY_FIELDS
+
+
+class IncrementalImport:
+    def __init__(self, run_id, chunk_size=1000, log=None, on_chunk=None):
+        self.run_id = run_id
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        # Called once a chunk is committed, with its (row number, new Perfume) pairs and its
+        # rejected (row number, row, error) triples
+        self.on_chunk = on_chunk or (lambda new, rejected: None)
+        self.stats = Counter()
+        self.field_changes = Counter()
+        self.created_ids = []
+        # Perfumes whose similar-perfume lists need refreshing at the end of the run
+        self.feature_ids = []
+
+    @staticmethod
+    def next_run_id():
+        """A run number above every stamped one, even for two runs within the same second."""
+        last = Perfume.objects.aggregate(last=Max("last_seen_import"))["last"] or 0
+        return max(int(time.time()), last + 1)
+
+    def process(self, rows):
+        """Apply (row number, row dict) pairs chunk by chunk; yields a ScrapeJob for each inserted perfume."""
+        chunk = []
+        for row_num, row in rows:
+            chunk.append((row_num, row))
+            if len(chunk) >= self.chunk_size:
+                yield from self.apply_chunk(chunk)
+                chunk = []
+        yield from self.apply_chunk(chunk)
+
+    def apply_chunk(self, chunk):
+        incoming, rejected, rejected_keys = {}, [], set()
+        for row_num, row in chunk:
+            name = (row.get("Perfume") or "").strip()
+            brand = (row.get("Brand") or "").strip()
+            if not name or not brand:
+                continue
+            try:
+                values = normalize_row(row)
+            except ValidationError as e:
+                self.stats["errors"] += 1
+                self.log(f"⚠️ Row {row_num} ({name}): {'; '.join(e.messages)}")
+                rejected.append((row_num, row, "; ".join(e.messages)))
+                rejected_keys.add((name, brand))
+                continue
+            if (name, brand) in incoming:
+                self.stats["duplicates"] += 1
+            # Later rows of the dump win
+            incoming[(name, brand)] = (row_num, values, row_hash(name, brand, values))
+        if not incoming and not rejected_keys:
+            self.on_chunk([], rejected)
+            return
+
+        existing = {
+            (perfume.name, perfume.brand): perfume
+            for perfume in Perfume.objects.filter(name__in={name for name, _ in [*incoming, *rejected_keys]}).only(
+                "name", "brand", "row_hash", *CSV_FIELDS
+            )
+        }
+        # Still in the dump, just not readable this time: keep the stored values and the perfume
+        kept = [perfume.pk for key, perfume in existing.items() if key in rejected_keys and key not in incoming]
+
+        new, updated, unchanged, fields, reindex = [], [], [], set(), []
+        now = timezone.now()
+        for key, (row_num, values, digest) in incoming.items():
+            perfume = existing.get(key)
+            if perfume is None:
+                new.append((row_num, Perfume(
+                    name=key[0], brand=key[1], row_hash=digest, last_seen_import=self.run_id, **values
+                )))
+                continue
+            if perfume.row_hash == digest:
+                unchanged.append(perfume.pk)
+                continue
+
+            changed = [field for field in CSV_FIELDS if not same_value(getattr(perfume, field), values[field])]
+            for field in changed:
+                setattr(perfume, field, values[field])
+                self.field_changes[field] += 1
+            perfume.row_hash = digest
+            perfume.last_seen_import = self.run_id
+            fields.update(changed, ["row_hash", "last_seen_import"])
+            if changed:
+                # A first run only fills in the hashes of rows that already match
+                perfume.updated_at = now
+                fields.add("updated_at")
+                self.stats["updated"] += 1
+                if REINDEX_FIELDS.intersection(changed):
+                    reindex.append(perfume.pk)
+                if FEATURE_FIELDS.intersection(changed):
+                    self.feature_ids.append(perfume.pk)
+            else:
+                self.stats["unchanged"] += 1
+            updated.append(perfume)
+
+        with transaction.atomic():
+            Perfume.objects.bulk_create([perfume for _, perfume in new])
+            if updated:
+                Perfume.objects.bulk_update(updated, sorted(fields))
+            if unchanged or kept:
+                Perfume.objects.filter(pk__in=unchanged + kept).update(last_seen_import=self.run_id)
+            index_batch([perfume.pk for _, perfume in new] + reindex)
+
+        self.stats["inserted"] += len(new)
+        self.stats["unchanged"] += len(unchanged)
+        self.created_ids.extend(perfume.pk for _, perfume in new)
+        self.feature_ids.extend(perfume.pk for _, perfume in new)
+        self.log(
+            f"🔄 Chunk ending row {chunk[-1][0]}: {len(new)} new, "
+            f"{len(updated)} rewritten, {len(unchanged)} unchanged"
+        )
+
+        self.on_chunk(new, rejected)
+        for row_num, perfume in new:
+            if perfume.url:
+                yield ScrapeJob(row_num, perfume.pk, perfume.name, perfume.url, True, True)
+
+    def missing(self):
+        """Perfumes this run never saw; only meaningful after a complete pass over the dump."""
+        return Perfume.objects.exclude(last_seen_import=self.run_id)
+
+    def delete_missing(self):
+        ids = list(self.missing().values_list("id", flat=True))
+        dependants = set()
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            with transaction.atomic():
+                # Drop the links first so the delete signals find no dependants to re-score one by one;
+                # the perfumes that listed a deleted one are re-scored together below
+                links = SimilarPerfume.objects.filter(similar_id__in=batch)
+                dependants.update(links.values_list("perfume_id", flat=True))
+                links.delete()
+                Perfume.objects.filter(pk__in=batch).delete()
+        dependants.difference_update(ids)
+        update_similarity_for(dependants, cascade=False)
+        self.stats["deleted"] = len(ids)
+        return len(ids)
@@ -0,0 +1,36 @@
+# perfumes/importer/indexing.py
+"""
+Index maintenance for perfumes written with bulk_create/bulk_update, which skip the model signals.
+Together these do the same work as perfumes.signals, once per batch and once per run.
+"""
+from ..caching import bump_catalog_version
+from ..facets import invalidate_facets
+from ..search import index_perfumes
+from ..similarity import update_similarity_for
+from ..suggest import invalidate_prefix_index
+from ..taxonomy import sync_taxonomy
+
+
+def index_batch(perfume_ids):
+    """Search index and accord/note links for one batch of new or rewritten perfumes."""
+    perfume_ids = list(perfume_ids)
+    index_perfumes(perfume_ids)
+    sync_taxonomy(perfume_ids)
+
+
+def refresh_catalog_indexes(perfume_ids, similarity=True, changed=None):
+    """
+    Finish a bulk run: similar-perfume lists for `perfume_ids` (scored from the link tables
+    `index_batch` filled), then drop the facet, autosuggest and page caches. `changed` says whether
+    the run wrote any perfume at all (default: whether `perfume_ids` is non-empty); ratings,
+    countries and genders feed the facets and the autosuggest ranking but not similarity, so an
+    update to those alone needs the caches dropped with no lists to rescore. Pass
+    `similarity=False` to leave the similar-perfume lists to `manage.py build_similarity_index`.
+    """
+    perfume_ids = list(perfume_ids)
+    if similarity and perfume_ids:
+        update_similarity_for(perfume_ids)
+    if perfume_ids if changed is None else changed:
+        invalidate_prefix_index()
+        invalidate_facets()
+    bump_catalog_version()
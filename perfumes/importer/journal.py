@@ -0,0 +1,136 @@
+# perfumes/importer/journal.py
+"""
+Sidecar SQLite journal for `manage.py import_perfumes`.
+
+Every CSV row the importer acts on gets a line recording whether its perfume was created, its page
+scraped and its image downloaded, and whether it ended done, skipped or failed (with the reason).
+The journal also keeps a checkpoint: the byte offset and number of the last row read. A resumed run
+re-queues the rows that were still in flight, then seeks the CSV to the checkpoint.
+"""
+import os
+import sqlite3
+import time
+
+PENDING = "pending"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class ImportJournal:
+    def __init__(self, path):
+        self.path = str(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                row_num INTEGER PRIMARY KEY,
+                name TEXT, brand TEXT, url TEXT, perfume_id INTEGER,
+                created INTEGER NOT NULL DEFAULT 0,
+                scraped INTEGER NOT NULL DEFAULT 0,
+                image INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS rows_state ON rows (state);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+            """
+        )
+
+    @staticmethod
+    def default_path(csv_path):
+        return f"{csv_path}.journal.sqlite3"
+
+    # --- run bookkeeping ---
+
+    def _get(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def start(self, csv_path, resume=False):
+        """Begin a run. Without `resume` the journal is wiped; with it, the CSV must be the same file."""
+        size = os.path.getsize(csv_path)
+        if resume:
+            if self._get("csv_path") not in (None, os.path.abspath(csv_path)) or size < self.checkpoint()[0]:
+                raise ValueError("the journal belongs to a different or truncated CSV file")
+        else:
+            self.db.execute("DELETE FROM rows")
+            self.db.execute("DELETE FROM meta")
+            self._set("csv_path", os.path.abspath(csv_path))
+        self._set("run_started_at", time.time())
+        self._set("run_rows_done", self.counts().get(DONE, 0))
+        self.db.commit()
+
+    def checkpoint(self):
+        """(offset, row number) of the last row read, or (0, 0) before the first one."""
+        return int(self._get("offset", 0)), int(self._get("row_num", 0))
+
+    def set_checkpoint(self, offset, row_num):
+        self._set("offset", offset)
+        self._set("row_num", row_num)
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # --- per-row state ---
+
+    def record(self, row_num, name, brand, url, perfume_id, state, created=False, error=None):
+        self.db.execute(
+            "INSERT OR REPLACE INTO rows (row_num, name, brand, url, perfume_id, created, state, error, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (row_num, name, brand, url, perfume_id, int(created), state, error, time.time()),
+        )
+
+    def finish(self, row_num, scraped, image, error=None):
+        self.db.execute(
+            "UPDATE rows SET scraped = MAX(scraped, ?), image = MAX(image, ?), state = ?, error = ?, updated_at = ?"
+            " WHERE row_num = ?",
+            (int(scraped), int(image), FAILED if error else DONE, error, time.time(), row_num),
+        )
+
+    def rows_in(self, state):
+        """(row_num, perfume_id, name, url) for every row in `state`, in CSV order."""
+        return self.db.execute(
+            "SELECT row_num, perfume_id, name, url FROM rows WHERE state = ? ORDER BY row_num", (state,)
+        ).fetchall()
+
+    # --- reporting ---
+
+    def counts(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM rows GROUP BY state").fetchall())
+
+    def summary(self):
+        counts = self.counts()
+        created, scraped, images = self.db.execute(
+            "SELECT COALESCE(SUM(created), 0), COALESCE(SUM(scraped), 0), COALESCE(SUM(image), 0) FROM rows"
+        ).fetchone()
+        started = float(self._get("run_started_at", time.time()))
+        elapsed = max(time.time() - started, 1e-6)
+        done_this_run = counts.get(DONE, 0) - int(self._get("run_rows_done", 0))
+        return {
+            "rows": sum(counts.values()),
+            "pending": counts.get(PENDING, 0),
+            "done": counts.get(DONE, 0),
+            "skipped": counts.get(SKIPPED, 0),
+            "failed": counts.get(FAILED, 0),
+            "created": created,
+            "scraped": scraped,
+            "images": images,
+            "last_row": self.checkpoint()[1],
+            "elapsed": elapsed,
+            "rows_per_second": done_this_run / elapsed,
+        }
+
+    def failure_reasons(self, limit=10):
+        return self.db.execute(
+            "SELECT error, COUNT(*) FROM rows WHERE state = ? GROUP BY error ORDER BY COUNT(*) DESC LIMIT ?",
+            (FAILED, limit),
+        ).fetchall()
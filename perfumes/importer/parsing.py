@@ -0,0 +1,38 @@
+# perfumes/importer/parsing.py
+from bs4 import BeautifulSoup
+
+
+def parse_perfume_page(html):
+    """Image URL and description from a Fragrantica perfume page; either may be None."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # --- Image URL ---
+    image_url = None
+    img_tag = soup.select_one('img[itemprop="image"]')
+    if img_tag:
+        image_url = img_tag.get('src') or img_tag.get('data-src')
+
+    # Fallback to Open Graph/Metadata (if primary selector failed)
+    if not image_url:
+        og_image = soup.select_one("meta[property='og:image']")
+        image_url = og_image.get("content") if og_image else None
+
+    # If the image URL is a low-res thumbnail, correct it
+    if image_url and 'perfume-thumbs' in image_url:
+        image_url = image_url.replace('perfume-thumbs', 'perfume')
+
+    # --- Description ---
+    og_desc = soup.select_one("meta[property='og:description']")
+    description = (og_desc.get("content") or "").strip() if og_desc else None
+
+    if description:
+        description = description.replace("&amp;", "&").replace("&quot;", '"')
+
+    if not description:
+        desc_div = soup.select_one("div[itemprop='description']")
+        if not desc_div:
+            desc_div = soup.select_one(".pgridCell p")
+        description = desc_div.get_text(strip=True) if desc_div else None
+
+    return image_url, description
+
@@ -0,0 +1,233 @@
+# perfumes/importer/pipeline.py
+"""
+Concurrent scrape stage plus a single database-writer stage for the CSV importer.
+
+Worker threads only do HTTP and HTML parsing; every database write happens on the calling
+thread, in batches inside a transaction, so SQLite never sees concurrent writers. The number of
+jobs in flight is bounded so a huge CSV never queues more than a few pages ahead of the writer.
+"""
+from collections import Counter, namedtuple
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from ..caching import bump_catalog_version
+from ..images import InvalidImage, attach_image, content_name, render_derivatives, verify_image
+from ..instrumentation import StageTimer
+from ..models import Perfume
+from .client import NotCached, RateLimited
+from .imagequeue import enqueue_images
+from .parsing import parse_perfume_page
+
+ScrapeJob = namedtuple("ScrapeJob", ["row_num", "perfume_id", "name", "url", "want_image", "want_description"])
+ScrapeResult = namedtuple(
+    "ScrapeResult",
+    ["job", "scraped", "image_url", "description", "image_name", "image_content", "derivatives", "error"],
+)
+
+
+def download_image(image_client, image_url, derivatives=True):
+    """
+    Fetch one image, check it decodes and name it by its content hash; with `derivatives`, the
+    resized/re-encoded copies of an image not stored yet are rendered too. Runs off the writer
+    thread. Returns (name, content, rendered derivatives, error).
+    """
+    try:
+        image = image_client.fetch(image_url)
+        if image.status != 200:
+            return None, None, None, f"image HTTP {image.status}"
+        name = content_name(image.content, verify_image(image.content))
+        rendered = None
+        if derivatives and not default_storage.exists(name):
+            rendered = render_derivatives(image.content)
+        return name, image.content, rendered, None
+    except RateLimited:
+        return None, None, None, "image rate limited"
+    except InvalidImage:
+        # Truncated or not an image at all; nothing is stored
+        return None, None, None, "image unreadable"
+    except Exception as e:
+        return None, None, None, f"image error: {e}"
+
+
+def scrape(page_client, image_client, job, derivatives=True, fetch_image=True):
+    """
+    Worker stage: fetch the perfume page and, when still needed, its image (see download_image).
+    Without `fetch_image` only the image URL is returned, for the image queue to download later.
+    """
+    try:
+        page = page_client.fetch(job.url)
+    except RateLimited:
+        return ScrapeResult(job, False, None, None, None, None, None, "page rate limited")
+    except NotCached:
+        return ScrapeResult(job, False, None, None, None, None, None, "page not in the offline cache")
+    except Exception as e:
+        return ScrapeResult(job, False, None, None, None, None, None, f"page error: {e}")
+    if page.status != 200:
+        return ScrapeResult(job, False, None, None, None, None, None, f"page HTTP {page.status}")
+
+    image_url, description = parse_perfume_page(page.text)
+    if not job.want_description:
+        description = None
+
+    image_name = image_content = rendered = error = None
+    if not job.want_image:
+        image_url = None
+    elif image_url and fetch_image:
+        image_name, image_content, rendered, error = download_image(image_client, image_url, derivatives)
+    return ScrapeResult(job, True, image_url, description, image_name, image_content, rendered, error)
+
+
+class PerfumeWriter:
+    """
+    Writer stage: applies scrape results to the database, `batch_size` perfumes per transaction.
+    With `bulk`, each batch is a single bulk_update instead of one save() per perfume. With
+    `queue_images`, image URLs go to the ImageJob queue instead of being downloaded inline.
+    """
+
+    def __init__(self, batch_size=50, log=None, bulk=False, journal=None, queue_images=False, timer=None):
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.bulk = bulk
+        self.journal = journal
+        self.queue_images = queue_images
+        self.timer = timer or StageTimer()
+        self.pending = []
+        self.to_enqueue = []
+        self.stats = Counter()
+
+    def add(self, result):
+        self.pending.append(result)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        with self.timer.stage("write"):
+            self._write(batch)
+
+    def _write(self, batch):
+        changed, fields, outcomes = [], set(), []
+        with transaction.atomic():
+            perfumes = Perfume.objects.in_bulk([result.job.perfume_id for result in batch])
+            for result in batch:
+                perfume = perfumes.get(result.job.perfume_id)
+                if perfume is None:
+                    outcomes.append((result.job.row_num, result.scraped, False, "perfume was deleted"))
+                    continue
+                update_fields = self.apply(perfume, result)
+                outcomes.append((result.job.row_num, result.scraped, "image" in update_fields, result.error))
+                if update_fields and self.bulk:
+                    perfume.updated_at = timezone.now()
+                    changed.append(perfume)
+                    fields.update(update_fields, ["updated_at"])
+            if changed:
+                Perfume.objects.bulk_update(changed, sorted(fields))
+            if self.to_enqueue:
+                enqueue_images(self.to_enqueue)
+                self.to_enqueue = []
+        if changed:
+            bump_catalog_version()
+        # Journal only what is committed, so a crash can never mark unwritten rows as done
+        if self.journal is not None:
+            for outcome in outcomes:
+                self.journal.finish(*outcome)
+            self.journal.commit()
+
+    def apply(self, perfume, result):
+        """Copy the scraped data onto `perfume`; returns the changed fields (saved unless in bulk mode)."""
+        name = result.job.name
+        update_fields = []
+        if result.image_url and not perfume.image:
+            perfume.image_url = result.image_url
+            update_fields.append("image_url")
+            if result.image_content:
+                # Identical bytes already stored for another perfume are shared, not copied
+                attach_image(perfume, result.image_content, result.image_name, result.derivatives)
+                update_fields.append("image")
+                self.stats["images"] += 1
+                self.log(f"🖼️ Added image for {name}")
+            elif self.queue_images:
+                self.to_enqueue.append((perfume.pk, result.image_url))
+                self.stats["queued"] += 1
+
+        if result.description and not perfume.description:
+            perfume.description = result.description
+            update_fields.append("description")
+            self.stats["descriptions"] += 1
+            self.log(f"📝 Added description for {name}")
+
+        if update_fields:
+            if not self.bulk:
+                perfume.save(update_fields=update_fields)
+            self.stats["enriched"] += 1
+        if result.error:
+            self.stats["failed"] += 1
+            self.log(f"⚠️ Row {result.job.row_num} ({name}): {result.error}")
+        return update_fields
+
+
+class ImportPipeline:
+    def __init__(self, page_client, image_client, workers=4, batch_size=50, log=None, bulk=False, journal=None,
+                 derivatives=True, queue_images=False):
+        self.page_client = page_client
+        self.image_client = image_client
+        self.derivatives = derivatives
+        self.queue_images = queue_images
+        self.workers = workers
+        # Time and SQL per stage: reading the CSV (and creating rows), scraping, writing results
+        self.timer = StageTimer()
+        self.writer = PerfumeWriter(
+            batch_size=batch_size, log=log, bulk=bulk, journal=journal, queue_images=queue_images, timer=self.timer
+        )
+        # Enough queued work to keep every worker busy without reading far ahead of the writer
+        self.max_in_flight = workers * 2
+
+    def run(self, jobs, scrape=True):
+        """
+        Scrape every ScrapeJob from `jobs` and write the results. Returns the writer's stats.
+        With `scrape=False` the jobs are only read (the readers insert the CSV rows as they go)
+        and nothing is fetched; their journal rows stay pending for a later --resume.
+        """
+        if not scrape:
+            for _ in self.timer.timed("read", jobs):
+                pass
+            return self.writer.stats
+        pending = set()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scrape")
+        try:
+            for job in self.timer.timed("read", jobs):
+                pending.add(pool.submit(self._scrape, job))
+                if len(pending) >= self.max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(done)
+        except KeyboardInterrupt:
+            # Drop queued work but keep what already finished
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._collect(future for future in pending if future.done() and not future.cancelled())
+            self.writer.flush()
+            raise
+        pool.shutdown()
+        self.writer.flush()
+        self.writer.stats["throttled"] = self.page_client.limiter.throttled + self.image_client.limiter.throttled
+        return self.writer.stats
+
+    def _scrape(self, job):
+        # Workers never touch the database, so only wall time is recorded (summed over workers)
+        start = time.perf_counter()
+        try:
+            return scrape(self.page_client, self.image_client, job, self.derivatives, not self.queue_images)
+        finally:
+            self.timer.add("scrape", time.perf_counter() - start)
+
+    def _collect(self, futures):
+        for future in futures:
+            self.writer.add(future.result())
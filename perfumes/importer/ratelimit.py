@@ -0,0 +1,66 @@
+# perfumes/importer/ratelimit.py
+"""
+Token-bucket rate limiting shared by every fetch worker.
+
+The bucket refills at `rate` tokens per second up to `burst`; each request takes one token. When
+the remote side answers 429 the bucket halves its rate and pauses everyone until the cooldown ends,
+then creeps back up towards the configured rate as requests succeed again.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    MIN_RATE_FACTOR = 1 / 8   # never slow below this fraction of the configured rate
+    RECOVERY_STEP = 0.05      # fraction of the configured rate regained per successful request
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.paused_until = 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.throttled = 0
+        self.waited = 0.0  # seconds callers spent blocked in acquire(), summed over threads
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+            self.sleep(wait)
+
+    def throttle(self, delay):
+        """Back off after a 429: pause the whole pool for `delay` seconds and halve the rate."""
+        with self._lock:
+            now = self.clock()
+            self.paused_until = max(self.paused_until, now + delay)
+            self.rate = max(self.max_rate * self.MIN_RATE_FACTOR, self.rate / 2)
+            self.tokens = 0.0
+            self._updated = max(now, self.paused_until)
+            self.throttled += 1
+
+    def recover(self):
+        """Call after a successful request to win back some of the rate lost to throttling."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP)
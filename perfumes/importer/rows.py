@@ -0,0 +1,54 @@
+# perfumes/importer/rows.py
+"""Mapping from a dataset CSV row to Perfume field values, and the row hash used to spot changes."""
+import hashlib
+import json
+
+from ..models import Perfume
+
+# CSV column -> model field, for every column the dataset provides
+CSV_COLUMNS = {
+    "url": "url",
+    "Country": "country",
+    "Gender": "gender",
+    "Rating Value": "rating_value",
+    "Rating Count": "rating_count",
+    "Year": "year",
+    "Top": "top_notes",
+    "Middle": "middle_notes",
+    "Base": "base_notes",
+    "Perfumer1": "perfumer1",
+    "Perfumer2": "perfumer2",
+    "mainaccord1": "mainaccord1",
+    "mainaccord2": "mainaccord2",
+    "mainaccord3": "mainaccord3",
+    "mainaccord4": "mainaccord4",
+    "mainaccord5": "mainaccord5",
+}
+CSV_FIELDS = list(CSV_COLUMNS.values())
+NUMERIC_FIELDS = ("rating_value", "rating_count")
+
+
+def csv_fields(row):
+    """Field values for one CSV row (name and brand excluded), as the importer has always read them."""
+    values = {field: (row.get(column) or "").strip() for column, field in CSV_COLUMNS.items()}
+    values["rating_value"] = values["rating_value"].replace(",", ".") or None
+    values["rating_count"] = values["rating_count"] or None
+    return values
+
+
+def normalize_row(row):
+    """csv_fields() with numbers converted; raises ValidationError for unparsable ones."""
+    values = csv_fields(row)
+    for field in NUMERIC_FIELDS:
+        values[field] = Perfume._meta.get_field(field).to_python(values[field])
+    return values
+
+
+def row_hash(name, brand, values):
+    payload = json.dumps([name, brand, [values[field] for field in CSV_FIELDS]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def same_value(stored, incoming):
+    """Compare a stored column with a CSV value, treating NULL and "" alike."""
+    return (stored if stored is not None else "") == (incoming if incoming is not None else "")
@@ -0,0 +1,251 @@
+# perfumes/instrumentation.py
+"""
+Per-request performance numbers: SQL query count and time, template render time, response size.
+
+PerformanceMiddleware measures every request, sends the numbers back in a `Server-Timing`
+header (visible in the browser's network panel) and keeps the last few hundred requests per
+view in memory for `performance_stats`. Views can declare a query budget with `@query_budget(n)`;
+going over it raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (the test suite turns it
+on) and logs a warning otherwise, echoed in an `X-Query-Budget-Exceeded` header while DEBUG is on.
+Template render time comes from a wrapper `install_template_timing()` puts around
+`Template.render` once, when the app is ready. StageTimer gives batch jobs the same numbers per
+stage.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("perfumes_request_metrics", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the most SQL queries the decorated view may run (rendering included)."""
+    def decorator(view):
+        # Decorators applied on top copy the attribute along through functools.wraps
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def _strict():
+    return getattr(settings, "QUERY_BUDGET_STRICT", False)
+
+
+def _window():
+    return getattr(settings, "PERFORMANCE_STATS_WINDOW", 500)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: counts and times every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    @contextmanager
+    def tracking(self):
+        previous = _current.get()
+        _current.set(self)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            try:
+                yield self
+            finally:
+                # set() rather than reset(): a streamed body may be finished in another context
+                _current.set(previous)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class StageTimer:
+    """Wall time, SQL queries and SQL time per named stage of a batch job such as the importer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "queries": 0, "sql_seconds": 0.0})
+
+    def add(self, name, seconds, queries=0, sql_seconds=0.0):
+        with self._lock:
+            stage = self.stages[name]
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["queries"] += queries
+            stage["sql_seconds"] += sql_seconds
+
+    @contextmanager
+    def stage(self, name):
+        metrics = RequestMetrics()
+        try:
+            with metrics.tracking():
+                yield
+        finally:
+            self.add(name, metrics.elapsed, metrics.queries, metrics.sql_time)
+
+    def timed(self, name, iterable):
+        """Yield from `iterable`, counting the work done producing each item as stage `name`."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {key: round(value, 3) if isinstance(value, float) else value for key, value in stage.items()}
+                for name, stage in self.stages.items()
+            }
+
+
+_original_render = django_backend.Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    metrics = _current.get()
+    if metrics is None or metrics.template_depth:
+        return _original_render(self, context, request)
+    # Only the outermost render is timed; its {% include %}s are part of it
+    metrics.template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        metrics.template_time += time.perf_counter() - start
+        metrics.template_depth -= 1
+
+
+def install_template_timing():
+    """Time template renders for the request being measured; called once from AppConfig.ready()."""
+    django_backend.Template.render = _timed_render
+
+
+class StatsStore:
+    """Rolling window of recent request numbers per view, shared by the threads of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=_window()))
+
+    def add(self, view, sample):
+        with self._lock:
+            self._samples[view].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = {view: list(rows) for view, rows in self._samples.items()}
+        return {view: _summarize(rows) for view, rows in sorted(samples.items())}
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _summarize(rows):
+    total = sorted(row["total_ms"] for row in rows)
+    queries = [row["queries"] for row in rows]
+    sizes = [row["bytes"] for row in rows if row["bytes"] is not None]
+    return {
+        "requests": len(rows),
+        "total_ms": {"p50": _percentile(total, 0.5), "p95": _percentile(total, 0.95), "max": total[-1]},
+        "queries": {"avg": round(sum(queries) / len(rows), 2), "max": max(queries)},
+        "sql_ms_avg": round(sum(row["sql_ms"] for row in rows) / len(rows), 2),
+        "template_ms_avg": round(sum(row["template_ms"] for row in rows) / len(rows), 2),
+        "bytes_avg": round(sum(sizes) / len(sizes)) if sizes else None,
+    }
+
+
+stats = StatsStore()
+
+
+class PerformanceMiddleware:
+    """Put first in MIDDLEWARE so the numbers cover the whole request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        with metrics.tracking():
+            response = self.get_response(request)
+        view = request.resolver_match.view_name if request.resolver_match else "unresolved"
+        budget = getattr(request, "_query_budget", None)
+
+        if response.streaming:
+            response.streaming_content = self._measure_stream(response.streaming_content, metrics, view, budget)
+        else:
+            exceeded = self._record(metrics, view, budget, len(response.content))
+            if exceeded and settings.DEBUG:
+                response["X-Query-Budget-Exceeded"] = exceeded
+        response["Server-Timing"] = (
+            f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries", '
+            f"tpl;dur={metrics.template_time * 1000:.1f}, "
+            f"total;dur={metrics.elapsed * 1000:.1f}"
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, "query_budget", None)
+        if budget is not None:
+            # Queries made by middleware before the view (session, user) don't count
+            request._query_budget = (budget, _current.get().queries)
+
+    def _measure_stream(self, content, metrics, view, budget):
+        size = 0
+        with metrics.tracking():
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        self._record(metrics, view, budget, size)
+
+    def _record(self, metrics, view, budget, size):
+        """Store the sample; returns the warning when the view went over its budget."""
+        stats.add(view, {
+            "total_ms": round(metrics.elapsed * 1000, 2),
+            "queries": metrics.queries,
+            "sql_ms": round(metrics.sql_time * 1000, 2),
+            "template_ms": round(metrics.template_time * 1000, 2),
+            "bytes": size,
+        })
+        if budget is not None:
+            allowed, before_view = budget
+            used = metrics.queries - before_view
+            if used > allowed:
+                message = f"{view} ran {used} SQL queries; its budget is {allowed}"
+                if _strict():
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+                return message
+        return None
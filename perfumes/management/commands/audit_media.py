@@ -0,0 +1,117 @@
+import hashlib
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from perfumes.caching import bump_catalog_version
+from perfumes.images import DERIVATIVES_DIR, IMAGES_DIR, InvalidImage, delete_derivatives, derivative_dir, verify_image
+from perfumes.models import Perfume
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan the stored perfume images for orphaned, duplicate and corrupt files. "
+        "With --reclaim, repoint perfumes to one copy of each duplicate and delete the rest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reclaim", action="store_true",
+                            help="Delete orphans and duplicates; clear and delete corrupt images so the next import refetches them")
+
+    def handle(self, *args, **options):
+        root = Path(settings.MEDIA_ROOT)
+        referenced = defaultdict(int)
+        for name in Perfume.objects.exclude(image="").exclude(image__isnull=True).values_list("image", flat=True).iterator():
+            referenced[name] += 1
+
+        self.stdout.write(f"🔍 Scanning {root / IMAGES_DIR} ({len(referenced)} image names in use)...")
+        by_hash, corrupt, sizes = defaultdict(list), {}, {}
+        for name in self.stored_images(root):
+            content = (root / name).read_bytes()
+            sizes[name] = len(content)
+            try:
+                verify_image(content)
+            except InvalidImage as e:
+                corrupt[name] = str(e)
+                continue
+            by_hash[hashlib.sha256(content).hexdigest()].append(name)
+
+        orphans = [name for names in by_hash.values() for name in names if name not in referenced]
+        orphans += [name for name in corrupt if name not in referenced]
+        duplicates = {}  # duplicate name -> name of the copy that is kept
+        for names in by_hash.values():
+            # Keep the content-hash name if there is one, otherwise the shortest
+            in_use = sorted(
+                (name for name in names if name in referenced),
+                key=lambda name: (name.count("/") != 2, len(name), name),
+            )
+            for name in in_use[1:]:
+                duplicates[name] = in_use[0]
+        missing = [name for name in referenced if name not in sizes]
+        derivative_orphans = self.orphaned_derivative_dirs(root, referenced)
+
+        def total(names):
+            return sum(sizes[name] for name in names) / 1e6
+
+        self.stdout.write(f"🗂️ {len(sizes)} files, {sum(sizes.values()) / 1e6:.1f} MB")
+        self.stdout.write(f"👻 {len(orphans)} orphaned files ({total(orphans):.1f} MB) no perfume uses")
+        self.stdout.write(f"♊ {len(duplicates)} duplicate files ({total(duplicates):.1f} MB) in use")
+        self.stdout.write(
+            f"💥 {len(corrupt)} corrupt files, used by {sum(referenced[name] for name in corrupt)} perfumes"
+        )
+        for name, error in sorted(corrupt.items())[:10]:
+            self.stdout.write(f"   ⚠️ {name}: {error}")
+        self.stdout.write(f"❓ {len(missing)} image names in use with no file")
+        self.stdout.write(f"🧩 {len(derivative_orphans)} derivative folders for images no perfume uses")
+
+        if not options["reclaim"]:
+            if orphans or duplicates or corrupt or derivative_orphans:
+                self.stdout.write("➡️ Run again with --reclaim to clean up")
+            return
+
+        now = timezone.now()
+        repointed = 0
+        for name, kept in duplicates.items():
+            repointed += Perfume.objects.filter(image=name).update(image=kept, updated_at=now)
+        cleared = Perfume.objects.filter(image__in=[name for name in corrupt if name in referenced]).update(
+            image="", updated_at=now
+        )
+        freed = 0
+        for name in set(orphans) | set(duplicates) | set(corrupt):
+            freed += sizes[name]
+            default_storage.delete(name)
+            delete_derivatives(name)
+        for directory in derivative_orphans:
+            for path in directory.iterdir():
+                freed += path.stat().st_size
+                path.unlink()
+            directory.rmdir()
+        if repointed or cleared:
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Reclaimed {freed / 1e6:.1f} MB: {repointed} perfumes moved to a shared copy, "
+            f"{cleared} corrupt images cleared for re-import"
+        ))
+
+    @staticmethod
+    def stored_images(root):
+        """Storage names of every file under the images folder."""
+        for dirpath, _, files in os.walk(root / IMAGES_DIR):
+            for file_name in files:
+                yield (Path(dirpath) / file_name).relative_to(root).as_posix()
+
+    @staticmethod
+    def orphaned_derivative_dirs(root, referenced):
+        """Derivative folders whose source image is no longer used by any perfume."""
+        wanted = {derivative_dir(name) for name in referenced}
+        orphaned = []
+        for dirpath, dirs, files in os.walk(root / DERIVATIVES_DIR):
+            relative = Path(dirpath).relative_to(root).as_posix()
+            if files and relative not in wanted:
+                orphaned.append(Path(dirpath))
+        return orphaned
@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from perfumes.benchmarks import (
+    SCENARIOS, SIZES, BenchmarkRunner, BenchmarkUnavailable, CatalogGenerator, benchmark_database, compare_to_baseline,
+)
+from perfumes.models import Perfume
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a seeded synthetic catalog in a separate database and benchmark the public views "
+        "against it: latency percentiles, SQL queries, response size and memory, compared with a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", default="1k", help=f"Catalog size: {', '.join(SIZES)} or a number (default: 1k)")
+        parser.add_argument("--seed", type=int, default=42, help="Seed for the catalog and the request mix")
+        parser.add_argument("--reviews", type=float, default=2.0, help="Average reviews per perfume (default: 2)")
+        parser.add_argument("--requests", type=int, default=100, help="Timed requests per scenario and cache state")
+        parser.add_argument("--server", choices=("wsgi", "asgi"), default=None,
+                            help="Send the requests over HTTP to a local server instead of the test client")
+        parser.add_argument("--concurrency", type=int, default=4, help="Concurrent HTTP clients with --server")
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS, dest="scenarios",
+                            help="Only run this scenario (repeatable)")
+        parser.add_argument("--keep-db", action="store_true",
+                            help="Keep the generated catalog and reuse it on the next run of the same size and seed")
+        parser.add_argument("--output", default=None, help="Where to write the results JSON")
+        parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+        parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed p50 slowdown as a fraction of the baseline, twice this for p95 (default: 0.2)")
+        parser.add_argument("--floor-ms", type=float, default=2.0,
+                            help="Slowdowns smaller than this many milliseconds never count (default: 2)")
+
+    def handle(self, *args, **options):
+        size_label = options["size"].lower()
+        if size_label in SIZES:
+            size = SIZES[size_label]
+        elif size_label.isdigit() and int(size_label) > 0:
+            size = int(size_label)
+        else:
+            raise CommandError(f"--size must be one of {', '.join(SIZES)} or a positive number")
+        mode = options["server"] or "client"
+        directory = Path(settings.BENCHMARK_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        output = Path(options["output"] or directory / f"results-{size_label}-{mode}.json")
+        baseline_path = Path(options["baseline"] or directory / f"baseline-{size_label}-{mode}.json")
+
+        keep_path = directory / f"catalog-{size_label}-{options['seed']}.sqlite3" if options["keep_db"] else None
+        with benchmark_database(f"benchmark_{size_label}_{options['seed']}", keep_path):
+            self.build_catalog(size, options)
+            cache.clear()
+            self.stdout.write(f"⏱️ Benchmarking {mode} requests against {size} perfumes...")
+            runner = BenchmarkRunner(
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                server=options["server"],
+                seed=options["seed"],
+                log=self.stdout.write,
+            )
+            hosts = ["testserver", "localhost", "127.0.0.1"]
+            with override_settings(DEBUG=False, QUERY_BUDGET_STRICT=False, ALLOWED_HOSTS=hosts):
+                try:
+                    results = runner.run(options["scenarios"] or SCENARIOS)
+                except BenchmarkUnavailable as e:
+                    raise CommandError(str(e))
+
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"💾 Results written to {output}")
+        if options["save_baseline"]:
+            baseline_path.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"✅ Saved as the baseline in {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(f"➡️ No baseline at {baseline_path}; run with --save-baseline to store one")
+            return
+
+        regressions = compare_to_baseline(
+            results, json.loads(baseline_path.read_text()), options["tolerance"], options["floor_ms"]
+        )
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"   📉 {regression}"))
+            raise CommandError(f"{len(regressions)} regressions against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"✅ No regressions against {baseline_path}"))
+
+    def build_catalog(self, size, options):
+        existing = Perfume.objects.count()
+        if existing == size:
+            self.stdout.write(f"♻️ Reusing the kept catalog of {size} perfumes")
+            return
+        if existing:
+            Perfume.objects.all().delete()
+        self.stdout.write(f"🧪 Generating {size} synthetic perfumes (seed {options['seed']})...")
+        CatalogGenerator(
+            seed=options["seed"], reviews_per_perfume=options["reviews"], log=self.stdout.write
+        ).generate(size)
@@ -0,0 +1,90 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from perfumes.benchmarks import (
+    IMPORT_MODES, FragranticaStub, add_stub_arguments, benchmark_database, run_import, stub_options, write_catalog_csv,
+)
+
+
+def number_list(kind):
+    def parse(value):
+        try:
+            return [kind(part) for part in value.split(",") if part.strip()]
+        except ValueError:
+            raise CommandError(f"Expected comma-separated numbers, got {value!r}")
+    return parse
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure `import_perfumes` throughput against the local Fragrantica stub: rows/s, bytes/s, "
+        "retries and time per stage, for every combination of --workers and --rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=300, help="Synthetic CSV rows to import (default: 300)")
+        parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic CSV")
+        parser.add_argument("--mode", choices=IMPORT_MODES, default="default",
+                            help="Import path: row by row (default), --bulk or --incremental")
+        parser.add_argument("--workers", type=number_list(int), default=[1, 4, 8],
+                            help="Worker counts to try, comma-separated (default: 1,4,8)")
+        parser.add_argument("--rate", type=number_list(float), default=[10.0, 50.0],
+                            help="Page request rates to try, comma-separated (default: 10,50)")
+        parser.add_argument("--burst", type=int, default=1, help="Page requests allowed back to back")
+        parser.add_argument("--image-rate", type=float, default=20.0, help="Image downloads per second")
+        parser.add_argument("--max-retries", type=int, default=5, help="Attempts per URL")
+        parser.add_argument("--batch-size", type=int, default=50, help="Perfumes written per transaction")
+        parser.add_argument("--inline-images", action="store_true", help="Download images during the import")
+        parser.add_argument("--no-derivatives", action="store_true", help="With --inline-images, skip resized copies")
+        parser.add_argument("--output", default=None, help="Where to write the results JSON")
+        add_stub_arguments(parser)
+
+    def handle(self, *args, **options):
+        directory = Path(settings.BENCHMARK_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        output = Path(options["output"] or directory / f"import-{options['mode']}-{options['rows']}.json")
+        runs = []
+        with tempfile.TemporaryDirectory() as scratch, FragranticaStub(**stub_options(options)) as stub:
+            csv_path = Path(scratch) / "perfumes.csv"
+            write_catalog_csv(csv_path, options["rows"], options["seed"])
+            self.stdout.write(f"🧪 Importing {options['rows']} synthetic rows from the stub at {stub.base_url}")
+            # Test database and throwaway media folder, so neither the catalog nor its images are touched
+            with benchmark_database("benchmark_import"), override_settings(MEDIA_ROOT=Path(scratch) / "media"):
+                for workers in options["workers"]:
+                    for rate in options["rate"]:
+                        run = run_import(
+                            csv_path, options["rows"], stub,
+                            mode=options["mode"], workers=workers, rate=rate, burst=options["burst"],
+                            image_rate=options["image_rate"], max_retries=options["max_retries"],
+                            batch_size=options["batch_size"], inline_images=options["inline_images"],
+                            derivatives=not options["no_derivatives"],
+                        )
+                        runs.append(run)
+                        self.report(run)
+
+        output.write_text(json.dumps({"options": {
+            key: options[key] for key in ("rows", "seed", "mode", "burst", "image_rate", "max_retries", "batch_size",
+                                          "inline_images", "latency", "jitter", "rate_429", "retry_after",
+                                          "slow_body", "slow_delay", "malformed", "page_kb")
+        }, "runs": runs}, indent=2))
+        best = max(runs, key=lambda run: run["rows_per_s"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Best: {best['rows_per_s']:.1f} rows/s with {best['workers']} workers at {best['rate']:g} requests/s; "
+            f"results written to {output}"
+        ))
+
+    def report(self, run):
+        self.stdout.write(
+            f"⏱️ {run['workers']} workers, {run['rate']:g}/s: {run['rows_per_s']:.1f} rows/s, "
+            f"{run['bytes_per_s'] / 1e6:.2f} MB/s, {run['requests']} requests, {run['retries']} retries, "
+            f"{run['rate_limit_wait_s']:.1f}s waiting on the rate limiter, {run['outcome'].get('failed', 0)} failed rows"
+        )
+        for name, stage in run["stages"].items():
+            self.stdout.write(
+                f"   {name:<7} {stage['seconds']:>8.2f}s over {stage['calls']} calls, "
+                f"{stage['queries']} queries taking {stage['sql_seconds']:.2f}s"
+            )
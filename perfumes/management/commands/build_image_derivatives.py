@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from perfumes.caching import bump_catalog_version
+from perfumes.images import derivative_formats, derivative_widths, generate_derivatives
+from perfumes.models import Perfume
+
+
+def _generate(args):
+    """Runs in a worker process; errors come back as text so one bad file doesn't stop the pool."""
+    name, force = args
+    try:
+        return name, generate_derivatives(name, force=force), None
+    except Exception as e:
+        return name, 0, str(e) or e.__class__.__name__
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the resized AVIF/WebP/JPEG derivatives of every stored perfume image on a process pool. "
+        "Only missing derivatives are rendered unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (default: one per CPU)")
+        parser.add_argument("--force", action="store_true", help="Re-render derivatives that already exist")
+
+    def handle(self, *args, **options):
+        names = list(
+            Perfume.objects.exclude(image="").exclude(image__isnull=True)
+            .order_by("image").values_list("image", flat=True).distinct()
+        )
+        self.stdout.write(
+            f"🖼️ Rendering {', '.join(derivative_formats())} at widths {', '.join(map(str, derivative_widths()))} "
+            f"for {len(names)} images with {options['workers']} workers..."
+        )
+
+        written = failed = 0
+        # django.setup() makes the workers usable under the spawn start method too
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            jobs = ((name, options["force"]) for name in names)
+            for done, (name, count, error) in enumerate(pool.map(_generate, jobs, chunksize=16), start=1):
+                written += count
+                if error:
+                    failed += 1
+                    self.stderr.write(f"⚠️ {name}: {error}")
+                if done % 500 == 0:
+                    self.stdout.write(f"   {done}/{len(names)} images, {written} files written")
+
+        # Derivative lookups and the card fragments emitting srcset are keyed on the catalog version
+        if written:
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Wrote {written} derivative files for {len(names)} images ({failed} failed)"
+        ))
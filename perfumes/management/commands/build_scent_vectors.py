@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from perfumes.vectors import VectorIndexUnavailable, build_scent_vectors, vectors_dir
+
+
+class Command(BaseCommand):
+    help = "Build the NumPy scent-vector matrix used by the 'smells like' search. Re-run after imports."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"🧪 Building scent vectors into {vectors_dir()}")
+        try:
+            perfumes, features = build_scent_vectors()
+        except VectorIndexUnavailable as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"✅ Encoded {perfumes} perfumes over {features} features"))
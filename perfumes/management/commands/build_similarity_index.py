@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from perfumes.caching import bump_catalog_version
+from perfumes.models import Perfume
+from perfumes.similarity import rebuild_similarity_index, top_k, update_similarity_for
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed similar-perfumes table for the whole catalog. Saves keep it up to date afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--missing", action="store_true",
+                            help="Only score perfumes whose similar perfumes were never computed, e.g. after an interrupted import")
+
+    def handle(self, *args, **options):
+        if options["missing"]:
+            ids = list(Perfume.objects.filter(similar_indexed_at__isnull=True).values_list("id", flat=True))
+            self.stdout.write(f"🧮 Scoring top {top_k()} neighbours for {len(ids)} unindexed perfumes...")
+            update_similarity_for(ids)
+            # Detail fragments, cached pages and API ETags are keyed on the catalog version
+            bump_catalog_version()
+            self.stdout.write(self.style.SUCCESS(f"✅ Similarity index updated for {len(ids)} perfumes"))
+            return
+        self.stdout.write(f"🧮 Scoring top {top_k()} neighbours for every perfume...")
+        written = rebuild_similarity_index()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"✅ Similarity index rebuilt with {written} entries"))
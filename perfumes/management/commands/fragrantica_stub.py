@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from perfumes.benchmarks import FragranticaStub, add_stub_arguments, stub_options
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve synthetic Fragrantica perfume pages and images locally, with configurable latency, "
+        "429s, slow bodies and malformed HTML. Point `import_perfumes --base-url` at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        add_stub_arguments(parser)
+
+    def handle(self, *args, **options):
+        stub = FragranticaStub(options["host"], options["port"], **stub_options(options))
+        self.stdout.write(f"🧪 Fragrantica stub listening on {stub.base_url} (Ctrl-C to stop)")
+        self.stdout.write(f"➡️ manage.py import_perfumes <csv> --base-url {stub.base_url} --no-cache")
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        stats = stub.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Served {stats['requests']} requests ({stats['bytes'] / 1e6:.1f} MB): {stats['throttled']} × 429, "
+            f"{stats['slow']} slow bodies, {stats['malformed']} malformed pages, {stats['not_found']} not found"
+        ))
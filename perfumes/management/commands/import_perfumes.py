@@ -1,216 +1,419 @@
-import csv
-import requests
-import cloudscraper
-import time
-import random
-from bs4 import BeautifulSoup
-from django.core.files.base import ContentFile
-from django.core.management.base import BaseCommand
+from itertools import chain
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from perfumes.caching import bump_catalog_version
+from perfumes.importer import FragranticaClient, HttpCache, ImportPipeline, ScrapeJob, TokenBucket
+from perfumes.importer.csvstream import read_csv
+from perfumes.importer.incremental import IncrementalImport
+from perfumes.importer.indexing import index_batch, refresh_catalog_indexes
+from perfumes.importer.journal import DONE, FAILED, PENDING, SKIPPED, ImportJournal
+from perfumes.importer.rows import csv_fields
 from perfumes.models import Perfume
+from perfumes.similarity import defer_similarity_updates, update_similarity_for
 
 
 class Command(BaseCommand):
-    help = "Import perfumes from CSV into database with image & description from perfume page. Designed to stop and resume cleanly on 429 rate limit errors."
-
-    # Define a list of User Agents for rotation
-    USER_AGENTS = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0',
-    ]
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Initialize the cloudscraper client
-        self.scraper = cloudscraper.create_scraper() 
-        self.base_headers = {
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.google.com/",
-        }
+    help = (
+        "Import perfumes from CSV into database with image & description from perfume page. "
+        "Pages are fetched by a pool of workers sharing a rate limiter; 429s slow the whole pool down. "
+        "Images are queued for `manage.py process_image_queue` unless --inline-images is given."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("csv_file", type=str, help="Path to the CSV file")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent fetch workers (default: 4)")
+        parser.add_argument("--rate", type=float, default=0.1,
+                            help="Page requests per second across all workers (default: 0.1)")
+        parser.add_argument("--burst", type=int, default=1, help="Page requests allowed back to back (default: 1)")
+        parser.add_argument("--image-rate", type=float, default=2.0,
+                            help="Image downloads per second across all workers (default: 2)")
+        parser.add_argument("--max-retries", type=int, default=10, help="Attempts per URL before giving up on it")
+        parser.add_argument("--batch-size", type=int, default=50, help="Perfumes written per transaction")
+        parser.add_argument("--base-url", default=None,
+                            help="Send every request to this host instead, e.g. http://127.0.0.1:8001 for a stub server")
+        parser.add_argument("--bulk", action="store_true",
+                            help="Load existing keys once and write with bulk_create/bulk_update; indexes are refreshed at the end")
+        parser.add_argument("--skip-scrape", action="store_true", help="Only import the CSV columns, fetch nothing")
+        parser.add_argument("--cache-dir", default=None,
+                            help="Where fetched pages and images are kept (default: settings.IMPORT_HTTP_CACHE_DIR)")
+        parser.add_argument("--cache-ttl", type=float, default=None,
+                            help="Refetch cached responses older than this many seconds (default: keep forever)")
+        parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the response cache")
+        parser.add_argument("--refresh-cache", action="store_true", help="Refetch everything and overwrite the cache")
+        parser.add_argument("--offline", action="store_true",
+                            help="Replay from the cache only; URLs that were never fetched are reported as failed")
+        parser.add_argument("--skip-similarity", action="store_true",
+                            help="Leave similar perfumes to a later `manage.py build_similarity_index`")
+        parser.add_argument("--journal", default=None,
+                            help="Journal file recording per-row progress (default: <csv_file>.journal.sqlite3)")
+        parser.add_argument("--no-journal", action="store_true", help="Do not keep a journal")
+        parser.add_argument("--resume", action="store_true",
+                            help="Finish the rows a previous run left in flight, then continue after its last row")
+        parser.add_argument("--retry-failed", action="store_true", help="Only re-run the rows the journal marks as failed")
+        parser.add_argument("--status", action="store_true", help="Print the journal's progress summary and exit")
+        parser.add_argument("--inline-images", action="store_true",
+                            help="Download images during the import instead of queueing them for `manage.py process_image_queue`")
+        parser.add_argument("--no-derivatives", action="store_true",
+                            help="Store downloaded images as they are; leave resized copies to `manage.py build_image_derivatives`")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Diff the CSV against the catalog by row hash: insert new rows, update changed ones, "
+                                 "leave the rest untouched")
+        parser.add_argument("--delete-missing", action="store_true",
+                            help="With --incremental, delete perfumes the CSV no longer contains")
+        parser.add_argument("--encoding", default="utf-8", help="CSV file encoding (default: utf-8)")
+        parser.add_argument("--encoding-errors", default="ignore", choices=["strict", "ignore", "replace"],
+                            help="How undecodable bytes are handled (default: ignore)")
 
     def handle(self, *args, **options):
         file_path = options["csv_file"]
+        if options["delete_missing"] and (not options["incremental"] or options["resume"] or options["retry_failed"]):
+            raise CommandError("--delete-missing needs a complete --incremental pass; drop --resume / --retry-failed")
+        self.encoding = options["encoding"], options["encoding_errors"]
+        self.journal = self.open_journal(options)
+        if options["status"]:
+            self.print_summary()
+            return
         self.stdout.write(f"📖 Reading CSV file: {file_path}")
 
-        imported = 0
-        row_count = 0
+        cache, cache_mode = self.open_cache(options)
+        page_client = FragranticaClient(
+            TokenBucket(options["rate"], options["burst"]),
+            max_retries=options["max_retries"],
+            base_url=options["base_url"],
+            cache=cache,
+            cache_mode=cache_mode,
+        )
+        image_client = FragranticaClient(
+            TokenBucket(options["image_rate"], options["workers"]),
+            max_retries=options["max_retries"],
+            base_url=options["base_url"],
+            cache=cache,
+            cache_mode=cache_mode,
+        )
+        pipeline = ImportPipeline(
+            page_client,
+            image_client,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+            bulk=options["bulk"] or options["incremental"],
+            journal=self.journal,
+            derivatives=not options["no_derivatives"],
+            queue_images=not options["inline_images"],
+        )
+        # Kept for callers running the command programmatically, e.g. `manage.py benchmark_import`
+        self.pipeline, self.clients = pipeline, (page_client, image_client)
 
-        with open(file_path, mode="r", encoding="utf-8", errors="ignore") as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=";")
-            for row in reader:
-                row_count += 1
-                try:
-                    name = (row.get("Perfume") or "").strip()
-                    brand = (row.get("Brand") or "").strip()
-                    url = (row.get("url") or "").strip()
+        self.created = 0
+        self.created_ids = []
+        incremental = None
+        if options["retry_failed"]:
+            jobs = self.journal_jobs(FAILED)
+        else:
+            start = self.journal.checkpoint() if options["resume"] and self.journal else (0, 0)
+            if options["incremental"]:
+                incremental = IncrementalImport(IncrementalImport.next_run_id(), chunk_size=options["batch_size"], log=self.stdout.write)
+                jobs = self.read_jobs_incremental(incremental, file_path, start)
+            elif options["bulk"]:
+                jobs = self.read_jobs_bulk(file_path, options["batch_size"], start)
+            else:
+                jobs = self.read_jobs(file_path, start)
+            if options["resume"]:
+                jobs = chain(self.journal_jobs(PENDING), jobs)
+        try:
+            # Saves would each rescore their perfume's neighbours; collect them for one batch at the end instead
+            with defer_similarity_updates() as similarity_ids:
+                stats = pipeline.run(jobs, scrape=not options["skip_scrape"])
+        except KeyboardInterrupt:
+            # The pipeline has written everything that finished; the journal knows the rest
+            if options["bulk"] or incremental is not None:
+                refresh_catalog_indexes(self.created_ids, similarity=False, changed=True)
+            if similarity_ids or self.created_ids:
+                self.stdout.write("🔗 Similar perfumes were not updated; run `manage.py build_similarity_index --missing`")
+            if self.journal is not None:
+                self.print_summary()
+                self.journal.close()
+            raise CommandError("Interrupted. Run again with --resume to pick up where this run stopped.")
 
-                    if not name or not brand:
-                        continue
+        if incremental is not None:
+            self.finish_incremental(incremental, options)
+        elif options["bulk"]:
+            # bulk_create skipped the signals; search and taxonomy were indexed per batch, similarity is done here
+            self.stdout.write(f"🔄 Updating similar perfumes and caches for {len(self.created_ids)} new perfumes...")
+            with pipeline.timer.stage("index"):
+                refresh_catalog_indexes(self.created_ids, similarity=not options["skip_similarity"])
+        elif similarity_ids and not options["skip_similarity"]:
+            self.stdout.write(f"🔄 Updating similar perfumes for {len(similarity_ids)} perfumes...")
+            with pipeline.timer.stage("index"):
+                update_similarity_for(similarity_ids)
+                # The saves bumped the catalog version before their similar perfumes were written
+                bump_catalog_version()
+        if options["skip_similarity"]:
+            self.stdout.write("🔗 Similar perfumes skipped; run `manage.py build_similarity_index --missing`")
 
-                    # --- RESUME LOGIC: Check if it exists and is complete before proceeding ---
-                    
-                    # 1. Attempt to find an existing entry
-                    existing_perfumes = Perfume.objects.filter(name=name, brand=brand)
-                    
-                    if existing_perfumes.exists():
-                        perfume = existing_perfumes.first()
-                        
-                        # If the description AND image are present, this row is COMPLETE. Skip it.
-                        if perfume.description and perfume.image: 
-                            self.stdout.write(f"➡️ Skipping row {row_count}: {name} ({brand}) already complete.")
-                            continue
-                        
-                        # If it exists but is incomplete (missing data), we treat it as not 'created' 
-                        # so the scraping logic runs to fill in the gaps.
-                        created = False 
-                    
-                    else:
-                        # 2. If it does not exist, create the entry from the CSV data
-                        perfume = Perfume.objects.create(
-                            name=name,
-                            brand=brand,
-                            url=url,
-                            country=(row.get("Country") or "").strip(),
-                            gender=(row.get("Gender") or "").strip(),
-                            rating_value=(row.get("Rating Value") or "").replace(",", ".") or None,
-                            rating_count=row.get("Rating Count") or None,
-                            year=(row.get("Year") or "").strip(),
-                            top_notes=(row.get("Top") or "").strip(),
-                            middle_notes=(row.get("Middle") or "").strip(),
-                            base_notes=(row.get("Base") or "").strip(),
-                            perfumer1=(row.get("Perfumer1") or "").strip(),
-                            perfumer2=(row.get("Perfumer2") or "").strip(),
-                            mainaccord1=(row.get("mainaccord1") or "").strip(),
-                            mainaccord2=(row.get("mainaccord2") or "").strip(),
-                            mainaccord3=(row.get("mainaccord3") or "").strip(),
-                            mainaccord4=(row.get("mainaccord4") or "").strip(),
-                            mainaccord5=(row.get("mainaccord5") or "").strip(),
-                        )
-                        created = True
-                    
-                    # --- Scraping Logic: Runs if newly created OR if existing but incomplete ---
-                    if url:
-                        # Pass row_count for better error tracking
-                        image_url, description = self.scrape_fragrantica(url, name, row_count)
-                        
-                        update_fields = []
-
-                        # Only update if the field is currently missing AND we found data
-                        if image_url and not perfume.image: 
-                            perfume.image_url = image_url
-                            self.download_and_attach_image(perfume, image_url)
-                            self.stdout.write(f"🖼️ Added image for {name}")
-                            update_fields.append("image_url")
-
-                        if description and not perfume.description:
-                            perfume.description = description
-                            self.stdout.write(f"📝 Added description for {name}")
-                            update_fields.append("description")
-                        
-                        if update_fields:
-                            perfume.save(update_fields=update_fields)
-                            if created:
-                                imported += 1
-                    
-                    # --- MODIFIED: LONGER RANDOM DELAY AFTER A SUCCESSFUL/ATTEMPTED SCRAPE (8-15s) ---
-                    time.sleep(random.uniform(8, 15))
-
-                except Exception as e:
-                    self.stderr.write(f"⚠️ Error importing row {row_count} ({row.get('Perfume')}): {e}")
-
-        self.stdout.write(self.style.SUCCESS(f"✅ Imported {imported} new perfumes with images & descriptions"))
-
-    # --- UPDATED SCRAPING METHOD WITH INCREASED RETRY LOGIC AND EXIT ---
-    def scrape_fragrantica(self, url, name, row_num, max_retries=10): # <-- MODIFIED: max_retries=10
-        """Scrape perfume with retry logic for 429 errors and image URL correction. Exits script on max failure."""
-        
-        for attempt in range(max_retries):
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {self.created} new perfumes; enriched {stats['enriched']} "
+            f"({stats['images']} images, {stats['descriptions']} descriptions), "
+            f"{stats['failed']} failed, {stats['throttled']} rate-limit slowdowns"
+        ))
+        if stats["queued"]:
+            self.stdout.write(f"🖼️ {stats['queued']} images queued; run `manage.py process_image_queue` to fetch them")
+        fetched = page_client.stats + image_client.stats
+        self.stdout.write(
+            f"🌐 {fetched['requests']} requests ({fetched['bytes'] / 1e6:.1f} MB), {fetched['retries']} retries, "
+            f"📦 {fetched['cache_hits']} answered from cache"
+        )
+        self.stdout.write("⏱️ " + " | ".join(
+            f"{name} {stage['seconds']:.1f}s ({stage['queries']} queries, {stage['sql_seconds']:.1f}s SQL)"
+            for name, stage in pipeline.timer.summary().items()
+        ))
+        if cache is not None:
+            cache.close()
+        if self.journal is not None:
+            self.print_summary()
+            self.journal.close()
+
+    def open_journal(self, options):
+        needs_journal = options["resume"] or options["retry_failed"] or options["status"]
+        if options["no_journal"]:
+            if needs_journal:
+                raise CommandError("--resume, --retry-failed and --status need the journal; drop --no-journal")
+            return None
+        path = options["journal"] or ImportJournal.default_path(options["csv_file"])
+        journal = ImportJournal(path)
+        if not options["status"]:
             try:
-                # Prepare Headers and Request
-                headers = self.base_headers.copy()
-                headers["User-Agent"] = random.choice(self.USER_AGENTS)
-                res = self.scraper.get(url, headers=headers, timeout=15, allow_redirects=True) 
-                
-                # Check for 429 error and implement exponential backoff
-                if res.status_code == 429:
-                    # --- CRITICAL EXIT LOGIC ---
-                    if attempt == max_retries - 1:
-                        self.stderr.write(f"⛔ CRITICAL 429 at row {row_num}: Max retries hit for {name}. Stopping execution to allow manual cooldown.")
-                        self.stderr.write(self.style.ERROR(f"Script stopped due to persistent rate limiting (429). Last uncompleted row: {row_num}. Wait 30 minutes and run the script again to resume."))
-                        exit(1) # Stop the script execution
-                        
-                    wait_time = (2 ** attempt) + random.uniform(1, 3) 
-                    self.stdout.write(f"⏳ Attempt {attempt+1}/{max_retries}: 429 Rate Limit hit for {name}. Waiting {wait_time:.2f}s...")
-                    time.sleep(wait_time)
-                    continue 
-                
-                if res.status_code != 200:
-                    self.stderr.write(f"🚫 Request failed for {url}. Status code: {res.status_code}")
-                    return None, None
-
-                # Success, proceed to scraping
-                soup = BeautifulSoup(res.text, "html.parser")
-
-                # --- Image URL Correction ---
-                image_url = None
-                img_tag = soup.select_one('img[itemprop="image"]')
-                if img_tag:
-                    image_url = img_tag.get('src') or img_tag.get('data-src')
-                
-                # Fallback to Open Graph/Metadata (if primary selector failed)
-                if not image_url:
-                    og_image = soup.select_one("meta[property='og:image']")
-                    image_url = og_image.get("content") if og_image else None
-                
-                # If the image URL is a low-res thumbnail, correct it
-                if image_url and 'perfume-thumbs' in image_url:
-                    image_url = image_url.replace('perfume-thumbs', 'perfume')
-
-                # --- Description Extraction ---
-                og_desc = soup.select_one("meta[property='og:description']")
-                description = og_desc.get("content").strip() if og_desc else None
-                
-                if description:
-                    description = description.replace("&amp;", "&").replace("&quot;", '"') 
-                
-                if not description:
-                    desc_div = soup.select_one("div[itemprop='description']")
-                    if not desc_div:
-                        desc_div = soup.select_one(".pgridCell p")
-                    description = desc_div.get_text(strip=True) if desc_div else None
-                
-                return image_url, description
+                journal.start(options["csv_file"], resume=needs_journal)
+            except ValueError as e:
+                raise CommandError(f"Cannot resume from {path}: {e}")
+            self.stdout.write(f"📒 Journal: {path}")
+        return journal
+
+    def print_summary(self):
+        summary = self.journal.summary()
+        self.stdout.write(
+            f"📒 {summary['rows']} rows journaled up to row {summary['last_row']}: "
+            f"{summary['done']} done, {summary['pending']} pending, {summary['failed']} failed, "
+            f"{summary['skipped']} skipped | {summary['created']} created, {summary['scraped']} scraped, "
+            f"{summary['images']} images | {summary['rows_per_second']:.2f} rows/s over {summary['elapsed']:.0f}s"
+        )
+        for reason, count in self.journal.failure_reasons():
+            self.stdout.write(f"   ⚠️ {count} × {reason}")
+
+    def journal_jobs(self, state):
+        """Scrape jobs for the journaled rows in `state`, with what each perfume still needs."""
+        rows = self.journal.rows_in(state)
+        self.stdout.write(f"🔁 Re-queuing {len(rows)} {state} rows from the journal")
+        for start in range(0, len(rows), 500):
+            chunk = rows[start:start + 500]
+            perfumes = Perfume.objects.only("image", "description").in_bulk([pk for _, pk, _, _ in chunk if pk])
+            for row_num, pk, name, url in chunk:
+                perfume = perfumes.get(pk)
+                if perfume is None or not url:
+                    self.journal.finish(row_num, False, False, "perfume or URL missing")
+                elif perfume.image and perfume.description:
+                    self.journal.finish(row_num, True, True)
+                else:
+                    yield ScrapeJob(row_num, pk, name, url, not perfume.image, not perfume.description)
+            self.journal.commit()
+
+    def csv_rows(self, file_path, start):
+        """(row number, row) for every CSV row after `start`, moving the journal checkpoint along."""
+        offset, row_num = start
+        if offset:
+            self.stdout.write(f"⏩ Resuming after row {row_num}")
+        self.unwritten = 0
+        encoding, errors = self.encoding
+        rows = read_csv(file_path, start_offset=offset, first_row=row_num + 1, encoding=encoding, errors=errors)
+        for row_count, offset, row in rows:
+            self.position = (offset, row_count)
+            yield row_count, row
+            self.save_checkpoint()
+            if self.journal is not None and row_count % 500 == 0:
+                self.journal.commit()
+        if self.journal is not None:
+            self.journal.commit()
+
+    def save_checkpoint(self):
+        """Move the resume point to the last row read, unless some rows read so far are not in the database yet."""
+        if self.journal is not None and not self.unwritten:
+            self.journal.set_checkpoint(*self.position)
+
+    def journal_row(self, row_count, name, brand, url, perfume_id, state, created=False, error=None):
+        if self.journal is not None:
+            self.journal.record(row_count, name, brand, url, perfume_id, state, created, error)
+
+    def open_cache(self, options):
+        if options["offline"] and options["no_cache"]:
+            raise CommandError("--offline needs the response cache; drop --no-cache")
+        if options["no_cache"]:
+            return None, "use"
+        cache_dir = options["cache_dir"] or settings.IMPORT_HTTP_CACHE_DIR
+        mode = "offline" if options["offline"] else "refresh" if options["refresh_cache"] else "use"
+        self.stdout.write(f"📦 Response cache: {cache_dir} ({mode})")
+        return HttpCache(cache_dir, ttl=options["cache_ttl"]), mode
+
+    def read_jobs(self, file_path, start=(0, 0)):
+        """Create missing perfumes from the CSV and yield a ScrapeJob for every incomplete one."""
+        for row_count, row in self.csv_rows(file_path, start):
+            try:
+                name = (row.get("Perfume") or "").strip()
+                brand = (row.get("Brand") or "").strip()
+                url = (row.get("url") or "").strip()
+
+                if not name or not brand:
+                    continue
+
+                # --- RESUME LOGIC: Check if it exists and is complete before proceeding ---
+                created = False
+                perfume = Perfume.objects.filter(name=name, brand=brand).first()
+                if perfume is not None:
+                    # If the description AND image are present, this row is COMPLETE. Skip it.
+                    if perfume.description and perfume.image:
+                        self.stdout.write(f"➡️ Skipping row {row_count}: {name} ({brand}) already complete.")
+                        self.journal_row(row_count, name, brand, url, perfume.pk, SKIPPED)
+                        continue
+                else:
+                    perfume = Perfume.objects.create(name=name, brand=brand, **csv_fields(row))
+                    self.created += 1
+                    created = True
+
+                # --- Scraping: runs if newly created OR if existing but incomplete ---
+                if url:
+                    self.journal_row(row_count, name, brand, url, perfume.pk, PENDING, created)
+                    yield ScrapeJob(
+                        row_num=row_count,
+                        perfume_id=perfume.pk,
+                        name=name,
+                        url=url,
+                        want_image=not perfume.image,
+                        want_description=not perfume.description,
+                    )
+                else:
+                    self.journal_row(row_count, name, brand, url, perfume.pk, SKIPPED, created)
 
             except Exception as e:
-                self.stderr.write(f"⚠️ Scrape error for {url}: {e}")
-                time.sleep(5) 
+                self.stderr.write(f"⚠️ Error importing row {row_count} ({row.get('Perfume')}): {e}")
+                self.journal_row(row_count, row.get("Perfume"), row.get("Brand"), None, None, FAILED, error=str(e))
+
+    def read_jobs_bulk(self, file_path, batch_size, start=(0, 0)):
+        """
+        Like read_jobs, but existing (name, brand) keys are loaded once up front and new perfumes
+        are inserted with bulk_create, `batch_size` rows per transaction.
+        """
+        # (name, brand) -> (id, needs image, needs description)
+        known = {
+            (name, brand): (pk, not image, not description)
+            for pk, name, brand, image, description in Perfume.objects.values_list(
+                "id", "name", "brand", "image", "description"
+            ).iterator(chunk_size=5000)
+        }
+        self.stdout.write(f"🔑 Loaded {len(known)} existing perfumes")
+
+        new_rows, skipped = [], 0
+        for row_count, row in self.csv_rows(file_path, start):
+            name = (row.get("Perfume") or "").strip()
+            brand = (row.get("Brand") or "").strip()
+            url = (row.get("url") or "").strip()
+            if not name or not brand:
                 continue
 
-        return None, None
+            key = (name, brand)
+            if key in known:
+                pk, want_image, want_description = known[key]
+                if pk is not None and url and (want_image or want_description):
+                    known[key] = (pk, False, False)  # queued once; duplicates further down are skipped
+                    self.journal_row(row_count, name, brand, url, pk, PENDING)
+                    yield ScrapeJob(row_count, pk, name, url, want_image, want_description)
+                else:
+                    skipped += 1
+                    self.journal_row(row_count, name, brand, url, pk, SKIPPED)
+                continue
 
-    # --- DOWNLOAD METHOD ---
-    def download_and_attach_image(self, perfume, image_url):
-        """Download image and attach to Perfume model"""
-        try:
-            # Prepare Headers with Rotating User-Agent
-            headers = self.base_headers.copy()
-            headers["User-Agent"] = random.choice(self.USER_AGENTS)
-
-            # Use the instance scraper for the download request too
-            res = self.scraper.get(image_url, headers=headers, timeout=15)
-            
-            if res.status_code == 200:
-                file_name = image_url.split("/")[-1].split("?")[0]
-                if '.' not in file_name:
-                    file_name += '.jpg' 
-                
-                perfume.image.save(file_name, ContentFile(res.content), save=True)
-            else:
-                self.stderr.write(f"⚠️ Image download failed for {perfume.name}. Status code: {res.status_code} for URL: {image_url}")
+            known[key] = (None, True, True)  # later duplicates of this row are skipped
+            try:
+                perfume = Perfume(name=name, brand=brand, **csv_fields(row))
+                # Convert numbers now: one bad value must not fail the whole bulk_create batch
+                for field in ("rating_value", "rating_count"):
+                    setattr(perfume, field, Perfume._meta.get_field(field).to_python(getattr(perfume, field)))
+                new_rows.append((row_count, perfume))
+                self.unwritten = len(new_rows)
+            except Exception as e:
+                self.stderr.write(f"⚠️ Error importing row {row_count} ({name}): {e}")
+                self.journal_row(row_count, name, brand, url, None, FAILED, error="; ".join(getattr(e, "messages", [str(e)])))
+            if len(new_rows) >= batch_size:
+                yield from self.create_batch(new_rows, known)
+                new_rows = []
+
+        yield from self.create_batch(new_rows, known)
+        self.stdout.write(f"➡️ Skipped {skipped} rows that are already complete or have no URL")
+
+    def create_batch(self, new_rows, known):
+        """bulk_create one batch of new perfumes, then yield their scrape jobs."""
+        if not new_rows:
+            return
+        with transaction.atomic():
+            Perfume.objects.bulk_create([perfume for _, perfume in new_rows])
+            index_batch([perfume.pk for _, perfume in new_rows])
+        self.created += len(new_rows)
+        self.created_ids.extend(perfume.pk for _, perfume in new_rows)
+        self.stdout.write(f"➕ Created {self.created} perfumes so far")
+
+        for row_count, perfume in new_rows:
+            known[(perfume.name, perfume.brand)] = (perfume.pk, False, False)
+            state = PENDING if perfume.url else SKIPPED
+            self.journal_row(row_count, perfume.name, perfume.brand, perfume.url, perfume.pk, state, created=True)
+        self.unwritten = 0
+        self.save_checkpoint()
+        if self.journal is not None:
+            self.journal.commit()
+
+        for row_count, perfume in new_rows:
+            if perfume.url:
+                yield ScrapeJob(row_count, perfume.pk, perfume.name, perfume.url, True, True)
+
+    def read_jobs_incremental(self, incremental, file_path, start=(0, 0)):
+        """Apply the CSV as a diff against the catalog and yield a ScrapeJob for every inserted perfume."""
+        def rows():
+            for row in self.csv_rows(file_path, start):
+                self.unwritten += 1  # held in the current chunk until it is applied
+                yield row
+
+        def chunk_applied(new, rejected):
+            for row_count, perfume in new:
+                state = PENDING if perfume.url else SKIPPED
+                self.journal_row(row_count, perfume.name, perfume.brand, perfume.url, perfume.pk, state, created=True)
+            for row_count, row, error in rejected:
+                self.journal_row(row_count, row.get("Perfume"), row.get("Brand"), row.get("url"), None, FAILED, error=error)
+            self.created = incremental.stats["inserted"]
+            self.created_ids = incremental.created_ids
+            self.unwritten = 0
+            self.save_checkpoint()
+            if self.journal is not None:
+                self.journal.commit()
+
+        incremental.on_chunk = chunk_applied
+        yield from incremental.process(rows())
+
+    def finish_incremental(self, incremental, options):
+        if options["delete_missing"]:
+            self.stdout.write(f"🗑️ Deleting {incremental.missing().count()} perfumes missing from the CSV...")
+            incremental.delete_missing()
+        stats = incremental.stats
+        self.stdout.write(f"🔄 Updating similar perfumes and caches for {len(incremental.feature_ids)} perfumes...")
+        with self.pipeline.timer.stage("index"):
+            refresh_catalog_indexes(
+                incremental.feature_ids,
+                similarity=not options["skip_similarity"],
+                changed=bool(stats["inserted"] or stats["updated"] or stats["deleted"]),
+            )
 
-        except Exception as e:
-            self.stderr.write(f"⚠️ Download error for {perfume.name}: {e}")
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Diff applied: {stats['inserted']} inserted, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['deleted']} deleted, "
+            f"{stats['errors']} bad rows, {stats['duplicates']} duplicate rows"
+        ))
+        for field, count in incremental.field_changes.most_common():
+            self.stdout.write(f"   ✏️ {field}: {count} changed")
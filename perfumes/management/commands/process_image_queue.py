@@ -0,0 +1,83 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from perfumes.importer import FragranticaClient, HttpCache, ImageQueueWorker, TokenBucket
+from perfumes.importer.pipeline import download_image
+from perfumes.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Download, verify, resize and store the perfume images `import_perfumes` queued. "
+        "Runs until interrupted; several of these can work on the same queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent downloads (default: 4)")
+        parser.add_argument("--per-host", type=int, default=2,
+                            help="Most downloads running against one host at once, across all workers (default: 2)")
+        parser.add_argument("--rate", type=float, default=2.0, help="Image requests per second (default: 2)")
+        parser.add_argument("--max-retries", type=int, default=3, help="HTTP attempts per download before it counts as failed")
+        parser.add_argument("--max-attempts", type=int, default=5, help="Failed downloads before a job is given up")
+        parser.add_argument("--backoff", type=float, default=30.0,
+                            help="Seconds before the first retry of a job; doubles every attempt (default: 30)")
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds between looks at an empty queue")
+        parser.add_argument("--once", action="store_true", help="Exit as soon as no job is due instead of waiting")
+        parser.add_argument("--base-url", default=None, help="Send every request to this host instead (stub server)")
+        parser.add_argument("--no-cache", action="store_true", help="Don't read or write the importer's response cache")
+        parser.add_argument("--no-derivatives", action="store_true", help="Store images without rendering resized copies")
+        parser.add_argument("--retry-failed", action="store_true", help="Queue the failed jobs again before starting")
+        parser.add_argument("--status", action="store_true", help="Print the queue's job counts and exit")
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            self.print_status()
+            return
+        if options["retry_failed"]:
+            requeued = ImageJob.objects.filter(state=ImageJob.FAILED).update(
+                state=ImageJob.QUEUED, attempts=0, next_attempt_at=timezone.now(), last_error=""
+            )
+            self.stdout.write(f"🔁 Re-queued {requeued} failed image jobs")
+
+        cache = None if options["no_cache"] else HttpCache(settings.IMPORT_HTTP_CACHE_DIR)
+        client = FragranticaClient(
+            TokenBucket(options["rate"], options["workers"]),
+            max_retries=options["max_retries"],
+            base_url=options["base_url"],
+            cache=cache,
+        )
+        worker = ImageQueueWorker(
+            client,
+            partial(download_image, derivatives=not options["no_derivatives"]),
+            workers=options["workers"],
+            per_host=options["per_host"],
+            max_attempts=options["max_attempts"],
+            backoff=options["backoff"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"🖼️ Processing image queue with {options['workers']} workers, at most {options['per_host']} per host..."
+        )
+        try:
+            stats = worker.run(poll=options["poll"], exit_when_idle=options["once"])
+        except KeyboardInterrupt:
+            self.print_status()
+            raise CommandError("Interrupted; unfinished jobs were put back in the queue.")
+        finally:
+            if cache is not None:
+                cache.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Stored {stats['images']} images; {stats['errors']} downloads failed, {stats['failed']} jobs given up"
+        ))
+        self.print_status()
+
+    def print_status(self):
+        counts, errors = ImageQueueWorker.status()
+        self.stdout.write(
+            "📋 Image queue: " + ", ".join(f"{counts.get(state, 0)} {state}" for state, _ in ImageJob.STATE_CHOICES)
+        )
+        for error, count in errors:
+            self.stdout.write(f"   ⚠️ {count} × {error}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from perfumes.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index (SQLite FTS5 table or PostgreSQL tsvector column) from the catalog."
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend == "fallback":
+            self.stdout.write(self.style.WARNING("⚠️ No full-text index on this database; search uses icontains lookups."))
+            return
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {indexed} perfumes ({backend})"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from perfumes.taxonomy import rebuild_taxonomy
+
+
+class Command(BaseCommand):
+    help = "Rebuild the normalised accord/note tables from the mainaccordN and *_notes columns of every perfume."
+
+    def handle(self, *args, **options):
+        count = rebuild_taxonomy()
+        self.stdout.write(self.style.SUCCESS(f"✅ Synced accords and notes for {count} perfumes"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from perfumes.featured import refresh_featured_pool
+
+
+class Command(BaseCommand):
+    help = "Rotate the pool of featured perfumes shown in the home page slider. Run periodically (e.g. from cron)."
+
+    def handle(self, *args, **options):
+        pool = refresh_featured_pool()
+        self.stdout.write(self.style.SUCCESS(f"✅ Featured pool refreshed with {len(pool)} perfumes"))
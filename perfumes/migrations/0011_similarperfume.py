@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0010_remove_review_user_review_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarPerfume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('perfume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='perfumes.perfume')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='perfumes.perfume')),
+            ],
+            options={
+                'ordering': ['perfume', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('perfume', 'rank'), name='unique_similar_rank')],
+            },
+        ),
+    ]
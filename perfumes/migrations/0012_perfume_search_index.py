@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+COLUMNS = {
+    "name": "COALESCE(name, '')",
+    "brand": "COALESCE(brand, '')",
+    "notes": "COALESCE(top_notes, '') || ' ' || COALESCE(middle_notes, '') || ' ' || COALESCE(base_notes, '')",
+    "perfumers": "COALESCE(perfumer1, '') || ' ' || COALESCE(perfumer2, '')",
+    "accords": (
+        "COALESCE(mainaccord1, '') || ' ' || COALESCE(mainaccord2, '') || ' ' || COALESCE(mainaccord3, '')"
+        " || ' ' || COALESCE(mainaccord4, '') || ' ' || COALESCE(mainaccord5, '')"
+    ),
+}
+TS_LABELS = {"name": "A", "brand": "B", "accords": "C", "notes": "D", "perfumers": "D"}
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE perfumes_perfume_fts USING fts5("
+                "name, brand, notes, perfumers, accords, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains lookups
+            return
+        schema_editor.execute(
+            f"INSERT INTO perfumes_perfume_fts (rowid, {', '.join(COLUMNS)}) "
+            f"SELECT id, {', '.join(COLUMNS.values())} FROM perfumes_perfume"
+        )
+    elif vendor == "postgresql":
+        document = " || ".join(
+            f"setweight(to_tsvector('simple', {expression}), '{TS_LABELS[column]}')"
+            for column, expression in COLUMNS.items()
+        )
+        schema_editor.execute("ALTER TABLE perfumes_perfume ADD COLUMN search_document tsvector")
+        schema_editor.execute(
+            "CREATE INDEX perfumes_perfume_search_gin ON perfumes_perfume USING GIN (search_document)"
+        )
+        schema_editor.execute(f"UPDATE perfumes_perfume SET search_document = {document}")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS perfumes_perfume_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE perfumes_perfume DROP COLUMN IF EXISTS search_document")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0011_similarperfume'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0012_perfume_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Accord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Note',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PerfumeAccord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('accord', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='perfume_links', to='perfumes.accord')),
+                ('perfume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accord_links', to='perfumes.perfume')),
+            ],
+            options={
+                'ordering': ['perfume', 'position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='perfume',
+            name='main_accords',
+            field=models.ManyToManyField(blank=True, related_name='perfumes', through='perfumes.PerfumeAccord', to='perfumes.accord'),
+        ),
+        migrations.CreateModel(
+            name='PerfumeNote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(choices=[('top', 'Top'), ('middle', 'Middle'), ('base', 'Base')], max_length=6)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='perfume_links', to='perfumes.note')),
+                ('perfume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='note_links', to='perfumes.perfume')),
+            ],
+            options={
+                'ordering': ['perfume', 'layer', 'position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='perfume',
+            name='scent_notes',
+            field=models.ManyToManyField(blank=True, related_name='perfumes', through='perfumes.PerfumeNote', to='perfumes.note'),
+        ),
+        migrations.AddIndex(
+            model_name='perfumeaccord',
+            index=models.Index(fields=['accord', 'perfume'], name='perfumeaccord_accord_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='perfumeaccord',
+            constraint=models.UniqueConstraint(fields=('perfume', 'position'), name='unique_accord_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='perfumeaccord',
+            constraint=models.UniqueConstraint(fields=('perfume', 'accord'), name='unique_perfume_accord'),
+        ),
+        migrations.AddIndex(
+            model_name='perfumenote',
+            index=models.Index(fields=['note', 'layer', 'perfume'], name='perfumenote_note_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='perfumenote',
+            constraint=models.UniqueConstraint(fields=('perfume', 'layer', 'note'), name='unique_perfume_note_layer'),
+        ),
+    ]
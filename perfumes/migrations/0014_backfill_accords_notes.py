@@ -0,0 +1,59 @@
+from django.db import migrations
+
+ACCORD_FIELDS = ["mainaccord1", "mainaccord2", "mainaccord3", "mainaccord4", "mainaccord5"]
+LAYER_FIELDS = {"top": "top_notes", "middle": "middle_notes", "base": "base_notes"}
+
+
+def _normalize(value):
+    return " ".join((value or "").split()).lower()
+
+
+def backfill(apps, schema_editor):
+    Perfume = apps.get_model('perfumes', 'Perfume')
+    Accord = apps.get_model('perfumes', 'Accord')
+    Note = apps.get_model('perfumes', 'Note')
+    PerfumeAccord = apps.get_model('perfumes', 'PerfumeAccord')
+    PerfumeNote = apps.get_model('perfumes', 'PerfumeNote')
+
+    accord_ids, note_ids = {}, {}
+    accord_links, note_links = [], []
+    fields = ["id"] + ACCORD_FIELDS + list(LAYER_FIELDS.values())
+
+    for row in Perfume.objects.values(*fields).iterator(chunk_size=2000):
+        seen = set()
+        for position, field in enumerate(ACCORD_FIELDS, start=1):
+            name = _normalize(row[field])
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            if name not in accord_ids:
+                accord_ids[name] = Accord.objects.create(name=name).id
+            accord_links.append(PerfumeAccord(perfume_id=row["id"], accord_id=accord_ids[name], position=position))
+
+        for layer, field in LAYER_FIELDS.items():
+            names = dict.fromkeys(_normalize(n) for n in (row[field] or "").split(",") if n.strip())
+            for position, name in enumerate(names, start=1):
+                if name not in note_ids:
+                    note_ids[name] = Note.objects.create(name=name).id
+                note_links.append(PerfumeNote(perfume_id=row["id"], note_id=note_ids[name], layer=layer, position=position))
+
+    PerfumeAccord.objects.bulk_create(accord_links, batch_size=2000)
+    PerfumeNote.objects.bulk_create(note_links, batch_size=2000)
+
+
+def clear(apps, schema_editor):
+    apps.get_model('perfumes', 'PerfumeAccord').objects.all().delete()
+    apps.get_model('perfumes', 'PerfumeNote').objects.all().delete()
+    apps.get_model('perfumes', 'Accord').objects.all().delete()
+    apps.get_model('perfumes', 'Note').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0013_accord_note_perfumeaccord_perfumenote_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
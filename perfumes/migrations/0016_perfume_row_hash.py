@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0015_perfume_updated_at_review_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfume',
+            name='last_seen_import',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='perfume',
+            name='row_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
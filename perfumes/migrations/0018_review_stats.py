@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    Perfume = apps.get_model('perfumes', 'Perfume')
+    Review = apps.get_model('perfumes', 'Review')
+    approved = Review.objects.filter(perfume=OuterRef('pk'), approved=True).order_by().values('perfume')
+    Perfume.objects.update(
+        approved_review_count=Coalesce(
+            Subquery(approved.annotate(count=Count('id')).values('count')), 0, output_field=IntegerField()
+        ),
+        latest_review_at=Subquery(approved.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0017_imagejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfume',
+            name='approved_review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='perfume',
+            name='latest_review_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('approved', True)), fields=['perfume', 'created_at'], name='review_approved_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:27
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def build_index(apps, schema_editor):
+    # Pages no longer build similar perfumes on demand, so the index is built here once
+    from perfumes.similarity import SimilarityEngine, top_k
+
+    Perfume = apps.get_model('perfumes', 'Perfume')
+    PerfumeAccord = apps.get_model('perfumes', 'PerfumeAccord')
+    PerfumeNote = apps.get_model('perfumes', 'PerfumeNote')
+    SimilarPerfume = apps.get_model('perfumes', 'SimilarPerfume')
+
+    engine = SimilarityEngine(
+        dict(Perfume.objects.values_list('id', 'brand').iterator(chunk_size=5000)),
+        PerfumeAccord.objects.values_list('perfume_id', 'accord_id', 'position').iterator(chunk_size=5000),
+        PerfumeNote.objects.values_list('perfume_id', 'note_id').iterator(chunk_size=5000),
+    )
+    k = top_k()
+    SimilarPerfume.objects.all().delete()
+    SimilarPerfume.objects.bulk_create(
+        (
+            SimilarPerfume(perfume_id=pk, similar_id=other, score=score, rank=rank)
+            for pk in engine.accords
+            for rank, (score, other) in enumerate(engine.neighbours(pk, k), start=1)
+        ),
+        batch_size=1000,
+    )
+    Perfume.objects.update(similar_indexed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0018_review_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfume',
+            name='similar_indexed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perfumes', '0019_similar_indexed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfume',
+            name='reviews_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
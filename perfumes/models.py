@@ -2,6 +2,14 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+
+def split_notes(value):
+    """Split a comma-separated notes field into a list of lowercased notes."""
+    if not value:
+        return []
+    return [note.strip().lower() for note in value.split(",") if note.strip()]
+
+
 class Perfume(models.Model):
     name = models.CharField(max_length=255)
     brand = models.CharField(max_length=255)
@@ -28,21 +36,175 @@ class Perfume(models.Model):
     description = models.TextField(blank=True, null=True) 
     image = models.ImageField(upload_to="perfumes/", blank=True, null=True) 
     image_url = models.URLField(max_length=500, blank=True, null=True)
-    
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Set by `import_perfumes --incremental`: hash of the last imported CSV row, and the run that last saw it
+    row_hash = models.CharField(max_length=64, blank=True, default="")
+    last_seen_import = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+
+    # Copied from the approved reviews by perfumes.reviews.refresh_review_stats, so pages needn't count them
+    approved_review_count = models.PositiveIntegerField(default=0)
+    latest_review_at = models.DateTimeField(blank=True, null=True)
+    # Set with them; keys the cached review list, so review changes leave the rest of the site cached
+    reviews_changed_at = models.DateTimeField(blank=True, null=True)
+
+    # When perfumes.similarity last computed this perfume's similar-perfumes list; null until it has,
+    # since an empty list can also mean the perfume has no neighbours
+    similar_indexed_at = models.DateTimeField(blank=True, null=True)
+
+    # Normalised copies of the mainaccordN / *_notes columns, kept in sync by perfumes.taxonomy
+    main_accords = models.ManyToManyField('Accord', through='PerfumeAccord', related_name='perfumes', blank=True)
+    scent_notes = models.ManyToManyField('Note', through='PerfumeNote', related_name='perfumes', blank=True)
 
     def __str__(self):
         return f"{self.name} by {self.brand}"
-    
+
+    @property
+    def accords(self):
+        """Main accords in order of prominence, lowercased and without blanks."""
+        values = [self.mainaccord1, self.mainaccord2, self.mainaccord3, self.mainaccord4, self.mainaccord5]
+        return [accord.strip().lower() for accord in values if accord and accord.strip()]
+
+    @property
+    def notes(self):
+        """All top, middle and base notes as one de-duplicated list."""
+        notes = split_notes(self.top_notes) + split_notes(self.middle_notes) + split_notes(self.base_notes)
+        return list(dict.fromkeys(notes))
+
+
+class Accord(models.Model):
+    name = models.CharField(max_length=255, unique=True)  # lowercased
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Note(models.Model):
+    name = models.CharField(max_length=255, unique=True)  # lowercased
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class PerfumeAccord(models.Model):
+    perfume = models.ForeignKey('Perfume', on_delete=models.CASCADE, related_name='accord_links')
+    accord = models.ForeignKey('Accord', on_delete=models.CASCADE, related_name='perfume_links')
+    position = models.PositiveSmallIntegerField()  # 1 = most prominent
+
+    class Meta:
+        ordering = ['perfume', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['perfume', 'position'], name='unique_accord_position'),
+            models.UniqueConstraint(fields=['perfume', 'accord'], name='unique_perfume_accord'),
+        ]
+        indexes = [
+            models.Index(fields=['accord', 'perfume'], name='perfumeaccord_accord_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.accord_id} #{self.position} on perfume {self.perfume_id}"
+
+
+class PerfumeNote(models.Model):
+    TOP = 'top'
+    MIDDLE = 'middle'
+    BASE = 'base'
+    LAYER_CHOICES = [
+        (TOP, 'Top'),
+        (MIDDLE, 'Middle'),
+        (BASE, 'Base'),
+    ]
+
+    perfume = models.ForeignKey('Perfume', on_delete=models.CASCADE, related_name='note_links')
+    note = models.ForeignKey('Note', on_delete=models.CASCADE, related_name='perfume_links')
+    layer = models.CharField(max_length=6, choices=LAYER_CHOICES)
+    position = models.PositiveSmallIntegerField()  # order within the layer, from 1
+
+    class Meta:
+        ordering = ['perfume', 'layer', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['perfume', 'layer', 'note'], name='unique_perfume_note_layer'),
+        ]
+        indexes = [
+            models.Index(fields=['note', 'layer', 'perfume'], name='perfumenote_note_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.note_id} ({self.layer}) on perfume {self.perfume_id}"
+
+
 class Review(models.Model):
     perfume = models.ForeignKey('Perfume', on_delete=models.CASCADE, related_name='reviews')
     name = models.CharField(max_length=100) 
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     approved = models.BooleanField(default=False)  # 🔹 New field
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Approved reviews of one perfume, newest first (scanned backwards). Partial on `approved`
+            # because the ORM filters it as a bare boolean, which SQLite can't match to an index column
+            models.Index(fields=['perfume', 'created_at'], condition=models.Q(approved=True), name='review_approved_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.name} on {self.perfume.name}"
-   
\ No newline at end of file
+
+
+class SimilarPerfume(models.Model):
+    """Precomputed top-K neighbours of a perfume, ranked by similarity score."""
+    perfume = models.ForeignKey('Perfume', on_delete=models.CASCADE, related_name='similar_entries')
+    similar = models.ForeignKey('Perfume', on_delete=models.CASCADE, related_name='neighbour_of')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['perfume', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['perfume', 'rank'], name='unique_similar_rank'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} for perfume {self.perfume_id}: {self.similar_id} ({self.score:.3f})"
+
+
+class ImageJob(models.Model):
+    """A perfume image waiting to be downloaded and stored by `manage.py process_image_queue`."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    perfume = models.OneToOneField('Perfume', on_delete=models.CASCADE, related_name='image_job')
+    url = models.URLField(max_length=500)
+    host = models.CharField(max_length=255)  # per-host concurrency caps are counted on this
+    state = models.CharField(max_length=7, choices=STATE_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['state', 'next_attempt_at'], name='imagejob_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.state} image for perfume {self.perfume_id}"
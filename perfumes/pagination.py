@@ -0,0 +1,88 @@
+# perfumes/pagination.py
+"""
+Keyset (cursor) pagination for the infinite-scroll feeds.
+
+Instead of OFFSET and a COUNT(*), each page asks for the rows that sort after the last row
+of the previous page, so page N costs the same as page 1. Cursors are signed tokens holding
+the ordering values of that last row.
+"""
+from datetime import date
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "perfumes.cursor"
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class CursorPaginator:
+    """
+    Paginate `queryset` by `ordering`, e.g. ('-id',) or ('name', 'id'). The last field must be
+    unique so every row has a distinct position; the ordering fields must not be NULL.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        values = self.decode(cursor)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode(rows[-1])
+        return CursorPage(rows, next_cursor)
+
+    def encode(self, obj):
+        values = [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        # Dates and datetimes travel as ISO strings, which their model fields parse back when filtering
+        values = [value.isoformat() if isinstance(value, date) else value for value in values]
+        return signing.dumps(values, salt=CURSOR_SALT)
+
+    def decode(self, cursor):
+        """Ordering values stored in `cursor`, or None (first page) when missing or tampered with."""
+        if not cursor:
+            return None
+        try:
+            values = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        return values
+
+    def _after(self, values):
+        # (a > x) OR (a = x AND b > y) OR ... with < for descending fields
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            clause = Q(**{f"{name}__{lookup}": values[i]})
+            for previous, value in zip(self.ordering[:i], values[:i]):
+                clause &= Q(**{previous.lstrip("-"): value})
+            condition |= clause
+        return condition
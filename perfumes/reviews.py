@@ -0,0 +1,43 @@
+# perfumes/reviews.py
+"""
+Approved reviews for the detail page, and the review aggregates stored on Perfume.
+
+Reviews are paged newest first with a cursor, walking the partial (perfume, created_at) index on
+approved reviews. `approved_review_count` and `latest_review_at` are recomputed from that index
+whenever reviews change, by the Review signals and by the admin's bulk approve (update() skips
+the signals), so a page never counts reviews itself and perfumes without any skip the review
+query entirely. The same update stamps `reviews_changed_at`, which keys the cached review list:
+a review change re-renders that one list instead of bumping the catalog version.
+"""
+from django.conf import settings
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Perfume, Review
+from .pagination import CursorPaginator
+
+
+def _page_size():
+    return getattr(settings, "REVIEWS_PAGE_SIZE", 10)
+
+
+def approved_reviews(perfume, cursor=None):
+    """One page of the perfume's approved reviews, newest first."""
+    reviews = Review.objects.filter(perfume=perfume, approved=True).only("name", "content", "created_at")
+    return CursorPaginator(reviews, ("-created_at", "-id"), _page_size()).page(cursor)
+
+
+def refresh_review_stats(perfume_ids, chunk_size=500):
+    """Recompute `approved_review_count` / `latest_review_at` for these perfumes and stamp `reviews_changed_at`, one UPDATE per chunk."""
+    ids = sorted(set(perfume_ids))
+    now = timezone.now()
+    approved = Review.objects.filter(perfume=OuterRef("pk"), approved=True).order_by().values("perfume")
+    for start in range(0, len(ids), chunk_size):
+        Perfume.objects.filter(pk__in=ids[start:start + chunk_size]).update(
+            approved_review_count=Coalesce(
+                Subquery(approved.annotate(count=Count("id")).values("count")), 0, output_field=IntegerField()
+            ),
+            latest_review_at=Subquery(approved.annotate(latest=Max("created_at")).values("latest")),
+            reviews_changed_at=now,
+        )
@@ -0,0 +1,170 @@
+# perfumes/search.py
+"""
+Full-text search over name, brand, notes, perfumers and accords.
+
+SQLite keeps an FTS5 table (`perfumes_perfume_fts`, rowid = perfume id) and PostgreSQL a weighted
+`search_document` tsvector column with a GIN index; both are created by migration 0012 and kept in
+sync by signals and the importer. Other databases fall back to `icontains` lookups.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "perfumes_perfume_fts"
+PERFUME_TABLE = "perfumes_perfume"
+
+COLUMNS = ("name", "brand", "notes", "perfumers", "accords")
+
+# Relative importance of each column when ranking (bm25 weights / tsvector labels)
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 2.0, 3.0)
+TS_LABELS = {"name": "A", "brand": "B", "accords": "C", "notes": "D", "perfumers": "D"}
+
+# Model fields behind each search column, used by the signal handler and the fallback
+COLUMN_FIELDS = {
+    "name": ("name",),
+    "brand": ("brand",),
+    "notes": ("top_notes", "middle_notes", "base_notes"),
+    "perfumers": ("perfumer1", "perfumer2"),
+    "accords": ("mainaccord1", "mainaccord2", "mainaccord3", "mainaccord4", "mainaccord5"),
+}
+INDEXED_FIELDS = {field for fields in COLUMN_FIELDS.values() for field in fields}
+
+_SQL_COLUMNS = {
+    column: " || ' ' || ".join(f"COALESCE({field}, '')" for field in fields)
+    for column, fields in COLUMN_FIELDS.items()
+}
+
+_fts_state = {}
+
+
+def search_backend():
+    """'fts5', 'postgres' or 'fallback' for the current database."""
+    if connection.vendor == "postgresql":
+        return "postgres"
+    if connection.vendor == "sqlite":
+        alias = connection.settings_dict["NAME"]
+        if alias not in _fts_state:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_state[alias] = cursor.fetchone() is not None
+        if _fts_state[alias]:
+            return "fts5"
+    return "fallback"
+
+
+def tokenize(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def _fts5_query(terms):
+    clauses = []
+    for text, columns in terms:
+        tokens = " AND ".join(f'"{token}"*' for token in tokenize(text))
+        if not tokens:
+            continue
+        clauses.append(f"{{{' '.join(columns)}}} : ({tokens})" if columns else f"({tokens})")
+    return " AND ".join(clauses)
+
+
+def _ts_query(terms):
+    clauses = []
+    for text, columns in terms:
+        labels = "".join(sorted({TS_LABELS[column] for column in columns})) if columns else ""
+        clauses.extend(f"{token}:*{labels}" for token in tokenize(text))
+    return " & ".join(clauses)
+
+
+def search_queryset(queryset, terms):
+    """
+    Restrict `queryset` to perfumes matching every (text, columns) pair in `terms` and annotate
+    `search_rank` (higher is better). `columns=None` searches all columns; empty texts are ignored.
+    """
+    terms = [(text, tuple(columns) if columns else None) for text, columns in terms if tokenize(text)]
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    backend = search_backend()
+    if backend == "fts5":
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {PERFUME_TABLE}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[_fts5_query(terms)],
+        ).annotate(search_rank=RawSQL(f"-bm25({FTS_TABLE}, {weights})", [], output_field=FloatField()))
+
+    if backend == "postgres":
+        query = _ts_query(terms)
+        return queryset.extra(
+            where=[f"{PERFUME_TABLE}.search_document @@ to_tsquery('simple', %s)"],
+            params=[query],
+        ).annotate(search_rank=RawSQL(
+            f"ts_rank({PERFUME_TABLE}.search_document, to_tsquery('simple', %s))", [query], output_field=FloatField()
+        ))
+
+    for text, columns in terms:
+        fields = [field for column in (columns or COLUMNS) for field in COLUMN_FIELDS[column]]
+        for token in tokenize(text):
+            queryset = queryset.filter(reduce(or_, (Q(**{f"{field}__icontains": token}) for field in fields)))
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_perfumes(perfume_ids):
+    """(Re)index the given perfumes from their current database rows."""
+    perfume_ids = list(perfume_ids)
+    backend = search_backend()
+    if not perfume_ids or backend == "fallback":
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(perfume_ids), 500):
+            chunk = perfume_ids[start:start + 500]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            if backend == "fts5":
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk)
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(COLUMNS)}) "
+                    f"SELECT id, {', '.join(_SQL_COLUMNS[c] for c in COLUMNS)} FROM {PERFUME_TABLE} "
+                    f"WHERE id IN ({placeholders})",
+                    chunk,
+                )
+            else:
+                cursor.execute(
+                    f"UPDATE {PERFUME_TABLE} SET search_document = {_ts_document()} WHERE id IN ({placeholders})",
+                    chunk,
+                )
+
+
+def unindex_perfumes(perfume_ids):
+    perfume_ids = list(perfume_ids)
+    if not perfume_ids or search_backend() != "fts5":
+        return
+    with connection.cursor() as cursor:
+        placeholders = ", ".join(["%s"] * len(perfume_ids))
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", perfume_ids)
+
+
+def rebuild_search_index():
+    """Reindex the whole catalog. Returns the number of indexed perfumes."""
+    backend = search_backend()
+    with connection.cursor() as cursor:
+        if backend == "fts5":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(COLUMNS)}) "
+                f"SELECT id, {', '.join(_SQL_COLUMNS[c] for c in COLUMNS)} FROM {PERFUME_TABLE}"
+            )
+        elif backend == "postgres":
+            cursor.execute(f"UPDATE {PERFUME_TABLE} SET search_document = {_ts_document()}")
+        else:
+            return 0
+        cursor.execute(f"SELECT COUNT(*) FROM {PERFUME_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def _ts_document():
+    return " || ".join(
+        f"setweight(to_tsvector('simple', {_SQL_COLUMNS[column]}), '{TS_LABELS[column]}')" for column in COLUMNS
+    )
@@ -0,0 +1,76 @@
+# perfumes/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_catalog_version
+from .facets import FACET_FIELDS, invalidate_facets
+from .models import Perfume, Review, SimilarPerfume
+from .reviews import refresh_review_stats
+from .search import INDEXED_FIELDS, index_perfumes, unindex_perfumes
+from .similarity import FEATURE_FIELDS, update_similarity_for
+from .suggest import SUGGEST_FIELDS, invalidate_prefix_index
+from .taxonomy import TAXONOMY_FIELDS, sync_taxonomy
+
+
+def _touches(fields, update_fields):
+    return update_fields is None or bool(fields.intersection(update_fields))
+
+
+@receiver(post_save, sender=Perfume)
+def perfume_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep the search, autosuggest, facet, accord/note and similar-perfumes indexes in sync with the catalog."""
+    if raw:
+        return
+    bump_catalog_version()
+    if _touches(INDEXED_FIELDS, update_fields):
+        index_perfumes([instance.pk])
+    if _touches(SUGGEST_FIELDS, update_fields):
+        invalidate_prefix_index()
+    if _touches(FACET_FIELDS, update_fields):
+        invalidate_facets()
+    if _touches(TAXONOMY_FIELDS, update_fields):
+        sync_taxonomy([instance.pk])
+    # Runs after the taxonomy sync because similarity is scored from the link tables
+    if _touches(FEATURE_FIELDS, update_fields):
+        update_similarity_for([instance.pk])
+
+
+@receiver(pre_delete, sender=Perfume)
+def perfume_deleting(sender, instance, **kwargs):
+    # Remember who lists this perfume before the cascade wipes those rows
+    instance._similar_dependants = list(
+        SimilarPerfume.objects.filter(similar=instance).values_list("perfume_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Perfume)
+def perfume_deleted(sender, instance, **kwargs):
+    bump_catalog_version()
+    unindex_perfumes([instance.pk])
+    invalidate_prefix_index()
+    invalidate_facets()
+    dependants = getattr(instance, "_similar_dependants", [])
+    if dependants:
+        update_similarity_for(dependants, cascade=False)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, raw=False, **kwargs):
+    # Remember whether the review was showing, to tell an approval change from a pending edit
+    instance._was_approved = (
+        not raw and instance.pk is not None
+        and Review.objects.filter(pk=instance.pk, approved=True).exists()
+    )
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, raw=False, **kwargs):
+    """
+    Only approved reviews show, on their perfume's detail page. Changes to pending ones (like a
+    public submission) touch nothing; the rest refresh that perfume's review stats, which also
+    moves the key of its cached review list.
+    """
+    if raw or not (instance.approved or getattr(instance, "_was_approved", False)):
+        return
+    refresh_review_stats([instance.perfume_id])
@@ -0,0 +1,367 @@
+# perfumes/similarity.py
+import heapq
+import math
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, Sum, Value, When
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+
+from .models import Perfume, PerfumeAccord, PerfumeNote, SimilarPerfume
+
+# Accords are listed by prominence, so the first one weighs the most
+ACCORD_POSITION_WEIGHTS = [1.0, 0.8, 0.6, 0.4, 0.2]
+
+ACCORD_WEIGHT = 0.6
+NOTES_WEIGHT = 0.3
+BRAND_WEIGHT = 0.1
+
+# Fields that influence the score; saves touching only other fields skip the index
+FEATURE_FIELDS = {
+    "brand",
+    "top_notes", "middle_notes", "base_notes",
+    "mainaccord1", "mainaccord2", "mainaccord3", "mainaccord4", "mainaccord5",
+}
+
+# SQL and Python sum in different orders; rounding keeps the two scorers' ties identical
+SCORE_DIGITS = 9
+
+# Up to this many changed perfumes are scored from the link tables; more load the feature table once
+LINK_SCORING_LIMIT = 10
+
+
+def top_k():
+    return getattr(settings, "SIMILAR_PERFUMES_TOP_K", 12)
+
+
+class SimilarityEngine:
+    """In-memory feature table of the catalog with an inverted index for candidate lookup."""
+
+    def __init__(self, brands, accord_links, note_links):
+        """
+        `brands` maps perfume ID to brand, `accord_links` yields (perfume ID, accord ID, position)
+        and `note_links` yields (perfume ID, note ID), as stored in the normalised link tables.
+        """
+        self.brands = {pk: (brand or "").strip().lower() for pk, brand in brands.items()}
+        self.notes = {pk: set() for pk in self.brands}
+        accords = {pk: {} for pk in self.brands}
+        self.postings = defaultdict(set)
+
+        for pk, accord, position in accord_links:
+            if pk in accords:
+                accords[pk][accord] = ACCORD_POSITION_WEIGHTS[position - 1]
+                self.postings[("accord", accord)].add(pk)
+        for pk, note in note_links:
+            if pk in self.notes:
+                self.notes[pk].add(note)
+                self.postings[("note", note)].add(pk)
+        for pk, brand in self.brands.items():
+            if brand:
+                self.postings[("brand", brand)].add(pk)
+
+        self.accords = {
+            pk: (weights, math.sqrt(sum(w * w for w in weights.values())))
+            for pk, weights in accords.items()
+        }
+
+    @classmethod
+    def from_catalog(cls):
+        return cls(
+            dict(Perfume.objects.values_list("id", "brand").iterator(chunk_size=5000)),
+            PerfumeAccord.objects.values_list("perfume_id", "accord_id", "position").iterator(chunk_size=5000),
+            PerfumeNote.objects.values_list("perfume_id", "note_id").iterator(chunk_size=5000),
+        )
+
+    def candidates(self, pk):
+        """IDs sharing at least one accord, note or the brand with `pk`."""
+        found = set()
+        for accord in self.accords[pk][0]:
+            found |= self.postings[("accord", accord)]
+        for note in self.notes[pk]:
+            found |= self.postings[("note", note)]
+        if self.brands[pk]:
+            found |= self.postings[("brand", self.brands[pk])]
+        found.discard(pk)
+        return found
+
+    def score(self, a, b):
+        """Weighted blend of accord cosine, notes Jaccard and same-brand bonus."""
+        accords_a, norm_a = self.accords[a]
+        accords_b, norm_b = self.accords[b]
+        accord_score = 0.0
+        if norm_a and norm_b:
+            dot = sum(weight * accords_b[accord] for accord, weight in accords_a.items() if accord in accords_b)
+            accord_score = dot / (norm_a * norm_b)
+
+        notes_a, notes_b = self.notes[a], self.notes[b]
+        notes_score = 0.0
+        if notes_a and notes_b:
+            notes_score = len(notes_a & notes_b) / len(notes_a | notes_b)
+
+        brand_score = 1.0 if self.brands[a] and self.brands[a] == self.brands[b] else 0.0
+
+        return ACCORD_WEIGHT * accord_score + NOTES_WEIGHT * notes_score + BRAND_WEIGHT * brand_score
+
+    def scores(self, pk):
+        """Every perfume `pk` scores above zero against, with its score; empty for unknown IDs."""
+        if pk not in self.accords:
+            return {}
+        scores = ((other, round(self.score(pk, other), SCORE_DIGITS)) for other in self.candidates(pk))
+        return {other: score for other, score in scores if score > 0}
+
+    def neighbours(self, pk, k):
+        """Top `k` (score, id) pairs for `pk`, best first; ties go to the lower ID."""
+        return top_neighbours(self.scores(pk), k)
+
+
+def top_neighbours(scores, k):
+    """The `k` best (score, id) pairs of an {id: score} mapping, best first; ties go to the lower ID."""
+    return [(score, -neg_id) for score, neg_id in heapq.nlargest(k, ((s, -pk) for pk, s in scores.items()))]
+
+
+def _position_weight():
+    return Case(
+        *(When(position=position, then=Value(weight)) for position, weight in enumerate(ACCORD_POSITION_WEIGHTS, start=1)),
+        output_field=FloatField(),
+    )
+
+
+def link_scores(pk):
+    """
+    Same as `SimilarityEngine.scores`, worked out from the link tables with a handful of aggregate
+    queries (one row per perfume sharing something with `pk`) instead of loading the catalog.
+    """
+    brand = Perfume.objects.filter(pk=pk).values_list("brand", flat=True).first()
+    if brand is None:
+        return {}  # Deleted
+    brand = brand.strip().lower()
+    weights = {
+        accord: ACCORD_POSITION_WEIGHTS[position - 1]
+        for accord, position in PerfumeAccord.objects.filter(perfume_id=pk).values_list("accord_id", "position")
+    }
+    notes = set(PerfumeNote.objects.filter(perfume_id=pk).values_list("note_id", flat=True))
+
+    accord_scores = {}
+    if weights:
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        sharing = PerfumeAccord.objects.filter(accord_id__in=weights).exclude(perfume_id=pk)
+        mine = Case(*(When(accord_id=accord, then=Value(w)) for accord, w in weights.items()), output_field=FloatField())
+        dots = sharing.values("perfume_id").annotate(dot=Sum(mine * _position_weight())).values_list("perfume_id", "dot")
+        norms = dict(
+            PerfumeAccord.objects.filter(perfume_id__in=sharing.values("perfume_id"))
+            .values("perfume_id").annotate(squares=Sum(_position_weight() * _position_weight()))
+            .values_list("perfume_id", "squares")
+        )
+        accord_scores = {other: dot / (norm * math.sqrt(norms[other])) for other, dot in dots}
+
+    note_scores = {}
+    if notes:
+        sharing = PerfumeNote.objects.filter(note_id__in=notes).exclude(perfume_id=pk)
+        shared = sharing.values("perfume_id").annotate(count=Count("note_id", distinct=True)).values_list("perfume_id", "count")
+        sizes = dict(
+            PerfumeNote.objects.filter(perfume_id__in=sharing.values("perfume_id"))
+            .values("perfume_id").annotate(count=Count("note_id", distinct=True))
+            .values_list("perfume_id", "count")
+        )
+        note_scores = {other: count / (len(notes) + sizes[other] - count) for other, count in shared}
+
+    same_brand = set()
+    if brand:
+        same_brand = set(
+            Perfume.objects.annotate(key=Lower(Trim("brand"))).filter(key=brand).exclude(pk=pk).values_list("id", flat=True)
+        )
+
+    scores = {}
+    for other in accord_scores.keys() | note_scores.keys() | same_brand:
+        scores[other] = round(
+            ACCORD_WEIGHT * accord_scores.get(other, 0.0)
+            + NOTES_WEIGHT * note_scores.get(other, 0.0)
+            + BRAND_WEIGHT * (other in same_brand),
+            SCORE_DIGITS,
+        )
+    return {other: score for other, score in scores.items() if score > 0}
+
+
+def _entries_for(engine, pk, k):
+    return [
+        SimilarPerfume(perfume_id=pk, similar_id=other, score=score, rank=rank)
+        for rank, (score, other) in enumerate(engine.neighbours(pk, k), start=1)
+    ]
+
+
+def rebuild_similarity_index(batch_size=1000):
+    """Recompute the neighbour table for the whole catalog. Returns the number of rows written."""
+    engine = SimilarityEngine.from_catalog()
+    k = top_k()
+    written = 0
+    with transaction.atomic():
+        SimilarPerfume.objects.all().delete()
+        batch = []
+        for pk in engine.accords:
+            batch.extend(_entries_for(engine, pk, k))
+            if len(batch) >= batch_size:
+                SimilarPerfume.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        SimilarPerfume.objects.bulk_create(batch)
+        written += len(batch)
+        Perfume.objects.update(similar_indexed_at=timezone.now())
+    return written
+
+
+def _chunks(ids, size=900):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _current_lists(perfume_ids):
+    """Stored (score, id) lists of these perfumes, best first."""
+    lists = defaultdict(list)
+    for chunk in _chunks(perfume_ids):
+        rows = SimilarPerfume.objects.filter(perfume_id__in=chunk).order_by("perfume_id", "rank")
+        for pk, other, score in rows.values_list("perfume_id", "similar_id", "score"):
+            lists[pk].append((score, other))
+    return lists
+
+
+def _list_floors(perfume_ids, k):
+    """Last kept (score, id) of each of these perfumes' lists that is full (ranks run 1..n, so that is its rank-`k` row)."""
+    floors = {}
+    for chunk in _chunks(perfume_ids):
+        rows = SimilarPerfume.objects.filter(perfume_id__in=chunk, rank=k)
+        floors.update((pk, (score, other)) for pk, other, score in rows.values_list("perfume_id", "similar_id", "score"))
+    return floors
+
+
+def _ranks_above(a, b):
+    """Whether (score, id) entry `a` ranks before `b`: higher score first, ties to the lower ID."""
+    return (a[0], -a[1]) > (b[0], -b[1])
+
+
+def _scorer(count):
+    """Score function for `count` perfumes: link-table queries for a few, one catalog load for many."""
+    return SimilarityEngine.from_catalog().scores if count > LINK_SCORING_LIMIT else link_scores
+
+
+def _dependant_lists(scores, k):
+    """
+    New lists for the perfumes whose top-K a changed perfume enters, moves in or leaves. `scores`
+    holds each changed perfume's new {id: score}. Those scores are merged into the stored lists;
+    only a full list that lost an entry it can't refill from what is stored is rescored whole.
+    """
+    changed = set(scores)
+    listing = set()
+    for chunk in _chunks(changed):
+        listing.update(SimilarPerfume.objects.filter(similar_id__in=chunk).values_list("perfume_id", flat=True))
+    # Scores are symmetric, so each changed perfume's scores are also its score in the others' lists
+    entering = defaultdict(list)
+    for pk, scored in scores.items():
+        for other, score in scored.items():
+            if other not in changed:
+                entering[other].append((score, pk))
+
+    # Lists a changed perfume isn't in and doesn't get into are left alone
+    floors = _list_floors(entering.keys() - listing, k)
+    touched = (listing - changed) | {
+        other for other, entries in entering.items()
+        if other not in floors or any(_ranks_above(entry, floors[other]) for entry in entries)
+    }
+
+    updated, stale = {}, set()
+    current = _current_lists(touched)
+    for other in touched:
+        old = current.get(other, [])
+        merged = [(score, pk) for score, pk in old if pk not in changed] + entering.get(other, [])
+        merged = sorted(merged, key=lambda entry: (-entry[0], entry[1]))[:k]
+        # Anything not stored ranks after the old last entry, so a full list stays exact unless it dropped below that
+        if len(old) >= k and (len(merged) < k or _ranks_above(old[-1], merged[-1])):
+            stale.add(other)
+        elif merged != old:
+            updated[other] = merged
+    if stale:
+        scorer = _scorer(len(stale))
+        updated.update({other: top_neighbours(scorer(other), k) for other in stale})
+    return updated
+
+
+def update_similarity_for(perfume_ids, cascade=True):
+    """
+    Incrementally refresh the index after the given perfumes were created, changed or deleted.
+    Recomputes their own neighbours and, with `cascade`, every perfume whose top-K list they enter
+    or leave. A few perfumes are scored straight from the link tables; bigger batches (the end of
+    an import) load the feature table once.
+    """
+    perfume_ids = set(perfume_ids)
+    with _deferred_lock:
+        if _deferred is not None:
+            _deferred.update(perfume_ids)
+            return
+    if not perfume_ids:
+        return
+    k = top_k()
+    scorer = _scorer(len(perfume_ids))
+    scores = {pk: scorer(pk) for pk in perfume_ids}
+    lists = {pk: top_neighbours(scored, k) for pk, scored in scores.items()}
+    if cascade:
+        lists.update(_dependant_lists(scores, k))
+
+    with transaction.atomic():
+        for chunk in _chunks(lists):
+            SimilarPerfume.objects.filter(perfume_id__in=chunk).delete()
+        SimilarPerfume.objects.bulk_create(
+            (
+                SimilarPerfume(perfume_id=pk, similar_id=other, score=score, rank=rank)
+                for pk, entries in lists.items()
+                for rank, (score, other) in enumerate(entries, start=1)
+            ),
+            batch_size=1000,
+        )
+        now = timezone.now()
+        for chunk in _chunks(lists):
+            Perfume.objects.filter(pk__in=chunk).update(similar_indexed_at=now)
+
+
+# IDs collected while updates are deferred; None when they are applied straight away
+_deferred = None
+_deferred_lock = threading.Lock()
+
+
+@contextmanager
+def defer_similarity_updates():
+    """
+    Collect the perfumes `update_similarity_for` is asked to refresh instead of refreshing them
+    save by save, e.g. during an import. Yields the set of IDs; pass it to `update_similarity_for`
+    afterwards (one batch) or leave the index to `manage.py build_similarity_index`.
+    """
+    global _deferred
+    with _deferred_lock:
+        outer = _deferred is not None
+        if not outer:
+            _deferred = set()
+        perfume_ids = _deferred
+    try:
+        yield perfume_ids
+    finally:
+        if not outer:
+            with _deferred_lock:
+                _deferred = None
+
+
+def similar_perfumes(perfume, limit=4, fields=None):
+    """
+    Ranked similar perfumes from the index; empty until the index has been built for this perfume
+    (`manage.py build_similarity_index`). `fields` limits the columns loaded, as with `.only()`.
+    """
+    return list(_ranked(perfume, limit, fields))
+
+
+def _ranked(perfume, limit, fields=None):
+    perfumes = Perfume.objects.filter(neighbour_of__perfume=perfume).order_by("neighbour_of__rank")
+    if fields:
+        perfumes = perfumes.only(*fields)
+    return perfumes[:limit]
@@ -0,0 +1,109 @@
+# perfumes/suggest.py
+"""
+Per-process prefix index for the compare-page autosuggest.
+
+The index is a sorted array of (token, perfume id) pairs over normalised name and brand tokens,
+built lazily on first use. Saving or deleting a perfume bumps a version number in the shared
+catalog state cache (perfumes.caching), and each process rebuilds its copy on the next query after
+the version changes, including after an import run by another process.
+"""
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+from .caching import bump_version, get_version
+from .models import Perfume
+
+SUGGEST_VERSION_KEY = "perfumes:suggest_version"
+
+# Fields whose changes invalidate the index
+SUGGEST_FIELDS = {"name", "brand", "rating_count"}
+
+Suggestion = namedtuple("Suggestion", ["id", "name", "brand", "rating_count"])
+
+_state = {"index": None, "version": None}
+_lock = threading.Lock()
+
+
+def normalize_tokens(text):
+    """Lowercase, strip accents and split on anything that isn't a letter or digit."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return "".join(ch if ch.isalnum() else " " for ch in text).split()
+
+
+class PrefixIndex:
+    # Short prefixes match a large slice of the catalog, so their rankings are memoised
+    MEMO_PREFIX_LENGTH = 2
+
+    def __init__(self, rows):
+        self.entries = {}
+        self.tokens = {}
+        pairs = []
+        for pk, name, brand, rating_count in rows:
+            self.entries[pk] = Suggestion(pk, name, brand, rating_count or 0)
+            tokens = set(normalize_tokens(name)) | set(normalize_tokens(brand))
+            self.tokens[pk] = tokens
+            pairs.extend((token, pk) for token in tokens)
+        pairs.sort()
+        self.keys = [token for token, _ in pairs]
+        self.ids = [pk for _, pk in pairs]
+        self.memo = {}
+
+    @classmethod
+    def from_catalog(cls):
+        return cls(Perfume.objects.values_list("id", "name", "brand", "rating_count").iterator(chunk_size=5000))
+
+    def _ranked_for_prefix(self, prefix):
+        if len(prefix) <= self.MEMO_PREFIX_LENGTH and prefix in self.memo:
+            return self.memo[prefix]
+
+        start = bisect_left(self.keys, prefix)
+        found = set()
+        for position in range(start, len(self.keys)):
+            if not self.keys[position].startswith(prefix):
+                break
+            found.add(self.ids[position])
+        ranked = sorted(found, key=lambda pk: (-self.entries[pk].rating_count, self.entries[pk].name))
+
+        if len(prefix) <= self.MEMO_PREFIX_LENGTH:
+            self.memo[prefix] = ranked
+        return ranked
+
+    def search(self, query, limit=10):
+        """Perfumes whose name/brand tokens start with every word of `query`, most rated first."""
+        words = normalize_tokens(query)
+        if not words:
+            return []
+        # Walk the longest word's range; the other words only filter it
+        words.sort(key=len, reverse=True)
+        head, rest = words[0], words[1:]
+
+        results = []
+        for pk in self._ranked_for_prefix(head):
+            tokens = self.tokens[pk]
+            if all(any(token.startswith(word) for token in tokens) for word in rest):
+                results.append(self.entries[pk])
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def get_prefix_index():
+    """This process's index, rebuilt when another save has bumped the version."""
+    version = get_version(SUGGEST_VERSION_KEY)
+    if _state["index"] is None or _state["version"] != version:
+        with _lock:
+            if _state["index"] is None or _state["version"] != version:
+                _state["index"] = PrefixIndex.from_catalog()
+                _state["version"] = version
+    return _state["index"]
+
+
+def invalidate_prefix_index():
+    bump_version(SUGGEST_VERSION_KEY)
+
+
+def suggest_perfumes(query, limit=10):
+    return get_prefix_index().search(query, limit)
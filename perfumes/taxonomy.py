@@ -0,0 +1,79 @@
+# perfumes/taxonomy.py
+from django.db import transaction
+
+from .models import Accord, Note, Perfume, PerfumeAccord, PerfumeNote, split_notes
+
+ACCORD_FIELDS = ["mainaccord1", "mainaccord2", "mainaccord3", "mainaccord4", "mainaccord5"]
+LAYER_FIELDS = {
+    PerfumeNote.TOP: "top_notes",
+    PerfumeNote.MIDDLE: "middle_notes",
+    PerfumeNote.BASE: "base_notes",
+}
+
+# Saves touching any of these fields need the link tables refreshed
+TAXONOMY_FIELDS = set(ACCORD_FIELDS) | set(LAYER_FIELDS.values())
+
+
+def normalize_name(value):
+    return " ".join((value or "").split()).lower()
+
+
+def parse_taxonomy(row):
+    """Accords as [(position, name)] and notes as [(layer, position, name)] for one values() row."""
+    accords, seen = [], set()
+    for position, field in enumerate(ACCORD_FIELDS, start=1):
+        name = normalize_name(row[field])
+        if name and name not in seen:
+            seen.add(name)
+            accords.append((position, name))
+
+    notes = []
+    for layer, field in LAYER_FIELDS.items():
+        layer_notes = dict.fromkeys(normalize_name(note) for note in split_notes(row[field]))
+        notes.extend((layer, position, name) for position, name in enumerate(layer_notes, start=1))
+    return accords, notes
+
+
+def _ensure(model, names):
+    """Map each name to the ID of its row, creating the missing ones."""
+    names = set(names)
+    ids = dict(model.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names - ids.keys()
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(model.objects.filter(name__in=missing).values_list("name", "id"))
+    return ids
+
+
+def sync_taxonomy(perfume_ids, chunk_size=500):
+    """Rewrite the accord/note link rows of the given perfumes from their text columns."""
+    perfume_ids = list(perfume_ids)
+    for start in range(0, len(perfume_ids), chunk_size):
+        chunk = perfume_ids[start:start + chunk_size]
+        parsed = {
+            row["id"]: parse_taxonomy(row)
+            for row in Perfume.objects.filter(pk__in=chunk).values("id", *TAXONOMY_FIELDS)
+        }
+        accord_ids = _ensure(Accord, {name for accords, _ in parsed.values() for _, name in accords})
+        note_ids = _ensure(Note, {name for _, notes in parsed.values() for _, _, name in notes})
+
+        with transaction.atomic():
+            PerfumeAccord.objects.filter(perfume_id__in=chunk).delete()
+            PerfumeNote.objects.filter(perfume_id__in=chunk).delete()
+            PerfumeAccord.objects.bulk_create([
+                PerfumeAccord(perfume_id=pk, accord_id=accord_ids[name], position=position)
+                for pk, (accords, _) in parsed.items()
+                for position, name in accords
+            ])
+            PerfumeNote.objects.bulk_create([
+                PerfumeNote(perfume_id=pk, note_id=note_ids[name], layer=layer, position=position)
+                for pk, (_, notes) in parsed.items()
+                for layer, position, name in notes
+            ])
+
+
+def rebuild_taxonomy():
+    """Resync every perfume. Returns the number of perfumes processed."""
+    ids = list(Perfume.objects.values_list("id", flat=True))
+    sync_taxonomy(ids)
+    return len(ids)
@@ -0,0 +1,51 @@
+# perfumes/templatetags/perfume_images.py
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..images import FORMATS, available_derivatives
+
+register = template.Library()
+
+
+@register.simple_tag
+def perfume_image(image, alt="", sizes="100vw", css_class="", loading="lazy"):
+    """
+    <picture> for a stored perfume image, offering the AVIF/WebP/JPEG derivatives as `srcset`
+    so the browser downloads the smallest file that fills `sizes`. Falls back to a plain <img>
+    of the original while no derivatives exist.
+    """
+    if not image:
+        return ""
+    found = available_derivatives(image.name)
+    jpegs = list(found.get("jpeg", []))
+    # The full-width AVIF/WebP tells the original's width without opening the file
+    full_width = max((width for fmt in ("avif", "webp") for width, _ in found.get(fmt, [])), default=None)
+    if jpegs and full_width and full_width > jpegs[-1][0]:
+        jpegs.append((full_width, image.url))
+    img = format_html(
+        '<img src="{}"{} sizes="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+        image.url,
+        _srcset(jpegs),
+        sizes,
+        alt,
+        css_class,
+        loading,
+    )
+    sources = [
+        (FORMATS[fmt][2], _srcset(found[fmt]), sizes)
+        for fmt in ("avif", "webp")
+        if found.get(fmt)
+    ]
+    if not sources:
+        return img
+    return format_html(
+        "<picture>{}{}</picture>",
+        format_html_join("", '<source type="{}"{} sizes="{}">', sources),
+        img,
+    )
+
+
+def _srcset(widths):
+    if not widths:
+        return ""
+    return format_html(' srcset="{}"', ", ".join(f"{url} {width}w" for width, url in widths))
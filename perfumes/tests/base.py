@@ -0,0 +1,24 @@
+# perfumes/tests/base.py
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from perfumes import facets, suggest
+from perfumes.benchmarks.catalog import CatalogGenerator
+
+
+# Versions live in the per-test LocMemCache rather than the on-disk state of a dev checkout
+@override_settings(CATALOG_STATE_CACHE="default", QUERY_BUDGET_STRICT=True)
+class CatalogTestCase(TestCase):
+    """A small seeded synthetic catalog, with every cache and in-process index cold before each test."""
+
+    catalog_size = 40
+    seed = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        CatalogGenerator(seed=cls.seed).generate(cls.catalog_size)
+
+    def setUp(self):
+        cache.clear()
+        for module in (facets, suggest):
+            module._state.update(index=None, version=None)
@@ -0,0 +1,66 @@
+# perfumes/tests/test_api.py
+from django.urls import reverse
+
+from perfumes.models import Perfume
+
+from .base import CatalogTestCase
+
+
+class ApiTests(CatalogTestCase):
+    def get_json(self, name, status=200, args=(), **params):
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            data = self.get_json("api_perfume_search", limit=7, fields="name", **params, **({"cursor": cursor} if cursor else {}))
+            ids += [perfume["id"] for perfume in data["results"]]
+            cursor = data["next"]
+            if not cursor:
+                return ids
+
+    def test_sparse_fields(self):
+        data = self.get_json("api_perfume_search", fields="brand,year", limit=3)
+        self.assertEqual(len(data["results"]), 3)
+        for perfume in data["results"]:
+            self.assertEqual(list(perfume), ["id", "brand", "year"])
+
+    def test_invalid_parameters(self):
+        for name, params in [
+            ("api_perfume_search", {"fields": "name,secret"}),
+            ("api_perfume_search", {"limit": "0"}),
+            ("api_perfume_search", {"limit": "ten"}),
+            ("api_perfume_search", {"rating": "high"}),
+            ("api_perfume_bulk", {"ids": "1,two"}),
+            ("api_perfume_bulk", {"ids": ",".join(str(pk) for pk in range(1, 200))}),
+        ]:
+            with self.subTest(name=name, params=params):
+                self.assertIn("error", self.get_json(name, status=400, **params))
+
+    def test_bulk_keeps_request_order(self):
+        first, second = Perfume.objects.order_by("pk").values_list("pk", flat=True)[:2]
+        data = self.get_json("api_perfume_bulk", ids=f"{second},999999,{first},{second}", fields="name")
+        self.assertEqual([perfume["id"] for perfume in data["results"]], [second, first])
+        self.assertEqual(data["missing"], [999999])
+        self.assertEqual(set(data["results"][0]), {"id", "name"})
+
+    def test_cursor_walk_covers_catalog(self):
+        every = sorted(Perfume.objects.values_list("pk", flat=True))
+        for params in ({}, {"q": "house"}):
+            with self.subTest(**params):
+                ids = self.walk(**params)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(sorted(ids), every)
+
+    def test_filtered_walk(self):
+        expected = set(Perfume.objects.filter(rating_value__gte=3.9).values_list("pk", flat=True))
+        self.assertEqual(set(self.walk(rating="3.9")), expected)
+
+    def test_similar(self):
+        perfume = Perfume.objects.first()
+        data = self.get_json("api_perfume_similar", args=[perfume.pk], limit=2, fields="name")
+        self.assertEqual(data["perfume"], perfume.pk)
+        self.assertLessEqual(len(data["results"]), 2)
+        self.assertIn("error", self.get_json("api_perfume_similar", status=404, args=[999999]))
@@ -0,0 +1,56 @@
+# perfumes/tests/test_benchmarks.py
+from django.test import TestCase
+
+from perfumes.benchmarks.catalog import CatalogGenerator
+from perfumes.benchmarks.runner import SCENARIOS, ScenarioData
+from perfumes.models import Perfume, PerfumeAccord, PerfumeNote, Review, SimilarPerfume
+
+
+def snapshot():
+    """The generated catalog with IDs swapped for names, so two runs can be compared."""
+    names = dict(Perfume.objects.values_list("id", "name"))
+    return {
+        "perfumes": list(Perfume.objects.order_by("id").values_list(
+            "name", "brand", "country", "gender", "year", "rating_value", "rating_count",
+            "top_notes", "middle_notes", "base_notes", "mainaccord1", "mainaccord5", "approved_review_count",
+        )),
+        "reviews": list(Review.objects.order_by("id").values_list("perfume__name", "name", "content", "approved")),
+        "accords": sorted(PerfumeAccord.objects.values_list("perfume__name", "accord__name", "position")),
+        "notes": sorted(PerfumeNote.objects.values_list("perfume__name", "note__name", "layer", "position")),
+        "similar": sorted(
+            (names[pk], names[other], rank)
+            for pk, other, rank in SimilarPerfume.objects.values_list("perfume_id", "similar_id", "rank")
+        ),
+    }
+
+
+class CatalogGeneratorTests(TestCase):
+    def generate(self, seed, size=30):
+        Perfume.objects.all().delete()
+        CatalogGenerator(seed=seed, batch_size=12).generate(size)
+        return snapshot()
+
+    def test_same_seed_same_catalog(self):
+        first = self.generate(5)
+        self.assertEqual(len(first["perfumes"]), 30)
+        self.assertTrue(first["reviews"] and first["similar"])
+        self.assertEqual(self.generate(5), first)
+
+    def test_other_seed_other_catalog(self):
+        self.assertNotEqual(self.generate(5)["perfumes"], self.generate(6)["perfumes"])
+
+    def test_review_stats_match_generated_reviews(self):
+        self.generate(5)
+        for perfume in Perfume.objects.all():
+            approved = perfume.reviews.filter(approved=True)
+            self.assertEqual(perfume.approved_review_count, approved.count())
+
+    def test_scenario_urls_repeat_per_seed(self):
+        CatalogGenerator(seed=5).generate(30)
+
+        def urls(seed):
+            data = ScenarioData(seed=seed)
+            return [data.url(scenario) for scenario in SCENARIOS for _ in range(3)]
+
+        self.assertEqual(urls(1), urls(1))
+        self.assertNotEqual(urls(1), urls(2))
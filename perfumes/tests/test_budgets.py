@@ -0,0 +1,72 @@
+# perfumes/tests/test_budgets.py
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from perfumes.models import Perfume
+from perfumes.pagination import CursorPaginator
+from perfumes.reviews import approved_reviews
+
+from .base import CatalogTestCase
+
+HX = {"HTTP_HX_REQUEST": "true"}
+
+
+class QueryBudgetTests(CatalogTestCase):
+    """Every view with a @query_budget, rendered on cold caches, stays within it (over budget raises)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ids = list(Perfume.objects.order_by("id").values_list("id", flat=True))
+        cls.reviewed = Perfume.objects.filter(approved_review_count__gt=0).order_by("-approved_review_count").first()
+        cls.sample = Perfume.objects.get(pk=cls.ids[0])
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200, url)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    def test_home(self):
+        page = CursorPaginator(Perfume.objects.all(), ("-id",), 10).page(None)
+        self.get(reverse("home"))
+        self.get(f"{reverse('home')}?cursor={page.next_cursor}", **HX)
+
+    def test_perfume_list(self):
+        self.get(reverse("perfume_list"))
+        query = {"gender": self.sample.gender, "accord": self.sample.mainaccord1, "rating": 3}
+        self.get(f"{reverse('perfume_list')}?{urlencode(query)}")
+        self.get(f"{reverse('perfume_list')}?{urlencode({'brand': self.sample.brand.split()[0]})}")
+
+    def test_perfume_detail(self):
+        self.get(reverse("perfume_detail", args=[self.sample.pk]))
+        self.get(reverse("perfume_detail", args=[self.reviewed.pk]))
+        cursor = approved_reviews(self.reviewed).next_cursor or ""
+        self.get(f"{reverse('perfume_detail', args=[self.reviewed.pk])}?{urlencode({'reviews': cursor})}", **HX)
+
+    def test_compare(self):
+        query = urlencode([("perfumes", pk) for pk in self.ids[:4]])
+        self.get(f"{reverse('compare_perfumes')}?{query}")
+        self.get(f"{reverse('compare_perfumes')}?{query}", **HX)
+
+    def test_smells_like(self):
+        self.get(f"{reverse('smells_like')}?{urlencode([('perfumes', pk) for pk in self.ids[:2]])}")
+
+    def test_suggestions(self):
+        self.get(f"{reverse('perfume_suggestions')}?q={self.sample.name[:3]}")
+
+    def test_filter(self):
+        self.get(f"{reverse('filter_perfumes')}?gender={self.sample.gender}")
+        self.get(f"{reverse('filter_perfumes')}?brand={self.sample.brand.split()[0]}")
+        self.get(f"{reverse('filter_perfumes')}?gender={self.sample.gender}&stream=1")
+
+    def test_api(self):
+        ids = ",".join(map(str, self.ids[:10]))
+        self.get(reverse("api_perfume_search"))
+        self.get(f"{reverse('api_perfume_search')}?q={self.sample.brand.split()[0]}&fields=name,brand,description")
+        self.get(f"{reverse('api_perfume_bulk')}?ids={ids}")
+        self.get(reverse("api_perfume_similar", args=[self.sample.pk]))
+        self.get(f"{reverse('api_compare')}?perfumes={self.ids[0]}&perfumes={self.ids[1]}")
+        self.get(f"{reverse('api_suggestions')}?q={self.sample.name[:3]}")
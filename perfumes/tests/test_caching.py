@@ -0,0 +1,49 @@
+# perfumes/tests/test_caching.py
+from django.urls import reverse
+
+from perfumes.models import Perfume
+
+from .base import CatalogTestCase
+
+
+class ConditionalTests(CatalogTestCase):
+    def test_errors_carry_no_validators(self):
+        response = self.client.get(reverse("api_perfume_search"), {"fields": "secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        missing = self.client.get(reverse("api_perfume_similar", args=[999999]))
+        self.assertEqual(missing.status_code, 404)
+        self.assertNotIn("ETag", missing)
+
+    def test_matching_validators_get_304(self):
+        url = reverse("perfume_list")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            by_etag = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(by_etag.status_code, 304)
+        by_date = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_catalog_change_gives_fresh_response(self):
+        url = reverse("api_perfume_search")
+        first = self.client.get(url, {"fields": "name", "limit": 100})
+        perfume = Perfume.objects.order_by("pk").first()
+        perfume.name = "Renamed Perfume"
+        perfume.save()
+        again = self.client.get(url, {"fields": "name", "limit": 100}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again["ETag"], first["ETag"])
+        self.assertIn("Renamed Perfume", [row["name"] for row in again.json()["results"]])
+
+    def test_partials_have_their_own_etag(self):
+        page = self.client.get(reverse("home"))
+        partial = self.client.get(reverse("home"), HTTP_HX_REQUEST="true")
+        self.assertNotEqual(page["ETag"], partial["ETag"])
+        self.assertEqual(self.client.get(reverse("home"), HTTP_IF_NONE_MATCH=page["ETag"], HTTP_HX_REQUEST="true").status_code, 200)
+
+    def test_detail_page_is_not_conditional(self):
+        response = self.client.get(reverse("perfume_detail", args=[Perfume.objects.order_by("pk").first().pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
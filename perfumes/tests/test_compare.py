@@ -0,0 +1,84 @@
+# perfumes/tests/test_compare.py
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from perfumes.compare import compare, parse_compare_ids
+from perfumes.models import Perfume
+
+
+@override_settings(CATALOG_STATE_CACHE="default", QUERY_BUDGET_STRICT=True)
+class CompareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        common = {"country": "France", "year": "2020", "base_notes": "Musk, Amber"}
+        cls.rose = Perfume.objects.create(
+            name="Rose One", brand="Acme", gender="women", rating_value=4.1, rating_count=10,
+            top_notes="Rose, Bergamot", mainaccord1="floral", mainaccord2="musky", **common,
+        )
+        cls.oud = Perfume.objects.create(
+            name="Oud Two", brand="Acme", gender="men", rating_value=4.1, rating_count=99,
+            top_notes="Oud, <b>Pepper</b>", middle_notes="Rose", mainaccord1="woody", mainaccord2="musky", **common,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def row(self, comparison, key):
+        return next(row for row in comparison.rows if row["key"] == key)
+
+    def test_parse_ids(self):
+        self.assertEqual(parse_compare_ids(["3", " 1", "x", "3", "-2", "٣", "7", "8", "9"]), [3, 1, 7, 8])
+        with self.settings(COMPARE_MAX_PERFUMES=2):
+            self.assertEqual(parse_compare_ids(["5", "6", "7"]), [5, 6])
+
+    def test_cached_per_id_set_in_any_order(self):
+        with self.assertNumQueries(1):
+            first = compare([self.rose.pk, self.oud.pk])
+        with self.assertNumQueries(0):
+            swapped = compare([self.oud.pk, self.rose.pk])
+        self.assertEqual([p.pk for p in first.perfumes], [self.rose.pk, self.oud.pk])
+        self.assertEqual([p.pk for p in swapped.perfumes], [self.oud.pk, self.rose.pk])
+        self.assertEqual(self.row(swapped, "gender")["cells"], ["men", "women"])
+        self.assertNotEqual(first.key, swapped.key)
+
+    def test_catalog_change_rebuilds(self):
+        compare([self.rose.pk, self.oud.pk])
+        self.oud.country = "Italy"
+        self.oud.save()
+        with self.assertNumQueries(1):
+            comparison = compare([self.rose.pk, self.oud.pk])
+        self.assertTrue(self.row(comparison, "country")["differs"])
+
+    def test_differences(self):
+        comparison = compare([self.rose.pk, self.oud.pk])
+        differs = {row["key"]: row["differs"] for row in comparison.rows}
+        self.assertFalse(differs["country"])
+        self.assertFalse(differs["base_notes"])  # same notes, same order
+        self.assertFalse(differs["rating"])  # same score, only the number of ratings differs
+        self.assertTrue(differs["gender"])
+        self.assertTrue(differs["accords"])
+        self.assertEqual(comparison.differing_rows, sum(differs.values()))
+
+    def test_shared_tags(self):
+        comparison = compare([self.rose.pk, self.oud.pk])
+        rose_top, oud_top = self.row(comparison, "top_notes")["cells"]
+        # Rose is a top note of one and a heart note of the other: still shared
+        self.assertIn('shared-tag" title="Shared with another perfume here">rose<', rose_top)
+        self.assertIn('<span class="accord-badge">bergamot</span>', rose_top)
+        self.assertIn("&lt;b&gt;pepper&lt;/b&gt;", oud_top)
+        self.assertIn('shared-tag" title="Shared with another perfume here">musky<', self.row(comparison, "accords")["cells"][1])
+        shared = {item["note"]: item["layers"] for item in comparison.shared_notes}
+        self.assertEqual(shared["rose"], ["top", "heart"])
+        self.assertEqual(shared["musk"], ["base", "base"])
+        self.assertNotIn("bergamot", shared)
+
+    def test_missing_ids_are_left_out(self):
+        comparison = compare([self.rose.pk, 999999])
+        self.assertEqual([p.pk for p in comparison.perfumes], [self.rose.pk])
+
+    def test_page(self):
+        url = f"{reverse('compare_perfumes')}?perfumes={self.rose.pk}&perfumes={self.oud.pk}"
+        response = self.client.get(url)
+        self.assertContains(response, "shared-tag")
+        self.assertContains(response, "Oud Two")
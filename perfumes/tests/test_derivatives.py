@@ -0,0 +1,46 @@
+# perfumes/tests/test_derivatives.py
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+
+from perfumes.caching import bump_catalog_version
+from perfumes.images import (
+    available_derivatives, derivative_name, derivative_url, generate_derivatives, render_derivatives, store_image,
+)
+from perfumes.models import Perfume
+
+from .test_images import ImageTestCase, jpeg
+
+
+class ImageDerivativeTests(ImageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.name, _ = store_image(jpeg(size=(200, 100)))
+
+    def test_missing_widths_and_formats_are_rendered_once(self):
+        self.assertEqual(generate_derivatives(self.name), 5)  # 80 and 160 in both formats, plus 200 as WebP
+        self.assertEqual(generate_derivatives(self.name), 0)
+        found = available_derivatives(self.name)
+        self.assertEqual([width for width, _ in found["jpeg"]], [80, 160])
+        self.assertEqual([width for width, _ in found["webp"]], [80, 160, 200])
+        self.assertTrue(derivative_url(self.name, 100).endswith("160w.jpg"))
+        self.assertIsNone(derivative_url(self.name, 500))
+
+    def test_files_from_another_process_show_after_a_catalog_bump(self):
+        self.assertEqual(available_derivatives(self.name), {})
+        # Written the way build_image_derivatives' workers do, without this process's cache
+        for width, fmt, data in render_derivatives(default_storage.open(self.name).read()):
+            default_storage.save(derivative_name(self.name, width, fmt), BytesIO(data))
+        self.assertEqual(available_derivatives(self.name), {})
+        bump_catalog_version()
+        self.assertEqual(sorted(available_derivatives(self.name)), ["jpeg", "webp"])
+
+    def test_picture_tag_offers_srcsets(self):
+        perfume = Perfume(name="Pictured", brand="Acme", image=self.name)
+        template = Template("{% load perfume_images %}{% perfume_image perfume.image alt='x' sizes='80px' %}")
+        self.assertNotIn("<picture>", template.render(Context({"perfume": perfume})))
+        generate_derivatives(self.name)
+        html = template.render(Context({"perfume": perfume}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn("160w.jpg 160w", html)
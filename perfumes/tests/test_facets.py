@@ -0,0 +1,65 @@
+# perfumes/tests/test_facets.py
+from collections import Counter
+
+from django.http import QueryDict
+
+from perfumes.facets import FACET_LIMITS, facet_counts
+from perfumes.models import Perfume, PerfumeAccord
+from perfumes.taxonomy import normalize_name
+
+from .base import CatalogTestCase
+
+
+class FacetCountTests(CatalogTestCase):
+    catalog_size = 80
+
+    def options(self, facets, facet):
+        return {option["key"]: option["count"] for option in facets[facet]}
+
+    def assert_counts(self, facets, facet, perfumes):
+        """The facet's options are its most common values among `perfumes`, with their counts."""
+        if facet == "accord":
+            counts = Counter(PerfumeAccord.objects.filter(perfume__in=perfumes).values_list("accord__name", flat=True))
+        else:
+            counts = Counter(normalize_name(value) for value in perfumes.values_list(facet, flat=True))
+        counts.pop("", None)
+        options = self.options(facets, facet)
+        self.assertEqual(len(options), min(len(counts), FACET_LIMITS.get(facet, len(counts))))
+        self.assertEqual(options, {key: counts[key] for key in options})
+        left_out = [counts[key] for key in counts.keys() - options.keys()]
+        if left_out:
+            self.assertGreaterEqual(min(options.values()), max(left_out))
+
+    def test_combined_filters_match_the_database(self):
+        sample = Perfume.objects.exclude(rating_value=None).order_by("pk")[3]
+        accord = sample.mainaccord1
+        facets = facet_counts(QueryDict(f"gender={sample.gender.upper()}&accord={accord}&rating=3"))
+
+        by_gender = Perfume.objects.filter(gender__iexact=sample.gender)
+        by_accord = Perfume.objects.filter(main_accords__name=accord)
+        rated = Perfume.objects.filter(rating_value__gte=3)
+        self.assertEqual(facets["total"], (by_gender & by_accord & rated).count())
+        # Each facet is counted without its own filter
+        self.assert_counts(facets, "gender", by_accord & rated)
+        self.assert_counts(facets, "country", by_gender & by_accord & rated)
+        self.assert_counts(facets, "accord", by_gender & rated)
+        bands = {option["key"]: option["count"] for option in facets["rating"]}
+        base = by_gender & by_accord
+        self.assertEqual(bands.get("4", 0), base.filter(rating_value__gte=4).count())
+        self.assertEqual(bands["3"], base.filter(rating_value__gte=3).count())
+        selected = [option["key"] for facet in ("gender", "accord") for option in facets[facet] if option["selected"]]
+        self.assertEqual(selected, [normalize_name(sample.gender), accord])
+
+    def test_contains_and_extra_filters(self):
+        first = Perfume.objects.order_by("pk").first()
+        part = first.country[1:4]
+        facets = facet_counts(QueryDict(f"country={part}&brand=anything"), contains=["country"], extra={
+            "brand": Perfume.objects.filter(brand=first.brand),
+        })
+        self.assertEqual(facets["total"], Perfume.objects.filter(country__icontains=part, brand=first.brand).count())
+        self.assert_counts(facets, "brand", Perfume.objects.filter(country__icontains=part))
+
+    def test_unknown_value_filters_nothing(self):
+        facets = facet_counts(QueryDict("gender=nobody"))
+        self.assertEqual(facets["total"], Perfume.objects.count())
+        self.assertNotIn("nobody", self.options(facets, "gender"))
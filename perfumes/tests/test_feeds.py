@@ -0,0 +1,54 @@
+# perfumes/tests/test_feeds.py
+import re
+from html import unescape
+
+from django.urls import reverse
+
+from perfumes.models import Perfume
+from perfumes.search import search_queryset
+
+from .base import CatalogTestCase
+
+HX = {"HTTP_HX_REQUEST": "true"}
+NEXT_PAGE = re.compile(r'hx-get="([^"]*cursor=[^"]*)"')
+CARD = re.compile(r'href="/(\d+)/"')
+
+
+class CursorFeedTests(CatalogTestCase):
+    catalog_size = 60
+
+    def walk(self, url, params=None):
+        """Perfume IDs in feed order, following each page's `revealed` trigger; also returns the page count."""
+        response = self.client.get(url, params or {}, **HX)
+        ids, pages = [], 0
+        while True:
+            self.assertEqual(response.status_code, 200)
+            html = response.content.decode()
+            ids += [int(pk) for pk in CARD.findall(html)]
+            pages += 1
+            found = NEXT_PAGE.search(html)
+            if not found:
+                return ids, pages
+            response = self.client.get(unescape(found.group(1)), **HX)
+
+    def test_home_is_newest_first(self):
+        ids, pages = self.walk(reverse("home"))
+        self.assertEqual(ids, list(Perfume.objects.order_by("-id").values_list("id", flat=True)))
+        self.assertEqual(pages, 6)
+
+    def test_list_keeps_its_filters(self):
+        gender = Perfume.objects.order_by("pk").first().gender
+        ids, _ = self.walk(reverse("perfume_list"), {"gender": gender})
+        self.assertEqual(ids, list(Perfume.objects.filter(gender__iexact=gender).order_by("name", "id").values_list("id", flat=True)))
+
+    def test_ranked_search_pages_cover_every_match(self):
+        # Every brand is "<word> House <n>", so all perfumes match with many equal ranks
+        ids, pages = self.walk(reverse("filter_perfumes"), {"brand": "house"})
+        expected = search_queryset(Perfume.objects.all(), [("house", ["name", "brand"])])
+        self.assertGreater(pages, 1)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), sorted(expected.values_list("id", flat=True)))
+
+    def test_tampered_cursor_starts_over(self):
+        first = self.client.get(reverse("home"), **HX).content
+        self.assertEqual(self.client.get(reverse("home"), {"cursor": "forged"}, **HX).content, first)
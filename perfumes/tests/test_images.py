@@ -0,0 +1,84 @@
+# perfumes/tests/test_images.py
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from perfumes.caching import catalog_version
+from perfumes.images import InvalidImage, attach_image, content_name, store_image, verify_image
+from perfumes.models import Perfume
+
+
+def jpeg(color="red", size=(300, 400)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@override_settings(CATALOG_STATE_CACHE="default", IMAGE_DERIVATIVE_WIDTHS=(80, 160), IMAGE_DERIVATIVE_FORMATS=("webp", "jpeg"))
+class ImageTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = Path(directory.name)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        cache.clear()
+
+    def files(self, folder="perfumes"):
+        return sorted(path.relative_to(self.media).as_posix() for path in (self.media / folder).rglob("*") if path.is_file())
+
+
+class ImageDedupTests(ImageTestCase):
+    def test_same_bytes_are_stored_once(self):
+        content = jpeg()
+        name, written = store_image(content)
+        self.assertEqual(name, content_name(content, "jpg"))
+        self.assertTrue(written)
+        self.assertEqual(store_image(content), (name, False))
+        self.assertEqual(self.files(), [name])
+
+    def test_perfumes_share_one_copy(self):
+        content = jpeg("blue")
+        perfumes = [Perfume(name=f"Twin {number}", brand="Acme") for number in range(2)]
+        for perfume in perfumes:
+            attach_image(perfume, content)
+            perfume.save()
+        self.assertEqual(perfumes[0].image.name, perfumes[1].image.name)
+        self.assertEqual(len(self.files()), 1)
+
+    def test_broken_downloads_are_rejected(self):
+        for content in (jpeg()[:200], b"<html>not an image</html>"):
+            with self.assertRaises(InvalidImage):
+                verify_image(content)
+        self.assertEqual(verify_image(jpeg()), "jpg")
+
+    def test_audit_reclaims_duplicates_orphans_and_corrupt_files(self):
+        kept, _ = store_image(jpeg("green"))
+        duplicate = default_storage.save("perfumes/legacy-green.jpg", BytesIO(jpeg("green")))
+        orphan, _ = store_image(jpeg("black"))
+        corrupt = default_storage.save("perfumes/broken.jpg", BytesIO(jpeg()[:300]))
+        sharing = Perfume.objects.create(name="Shared", brand="Acme", image=kept)
+        copy = Perfume.objects.create(name="Copy", brand="Acme", image=duplicate)
+        broken = Perfume.objects.create(name="Broken", brand="Acme", image=corrupt)
+
+        report = StringIO()
+        call_command("audit_media", stdout=report)
+        self.assertIn("👻 1 orphaned files", report.getvalue())
+        self.assertIn("♊ 1 duplicate files", report.getvalue())
+        self.assertIn("💥 1 corrupt files, used by 1 perfumes", report.getvalue())
+        self.assertEqual(len(self.files()), 4)
+
+        version = catalog_version()
+        call_command("audit_media", reclaim=True, stdout=StringIO())
+        self.assertEqual(self.files(), [kept])
+        copy.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(copy.image.name, sharing.image.name)
+        self.assertEqual(broken.image.name, "")
+        self.assertNotEqual(catalog_version(), version)
+        self.assertNotIn(orphan, self.files())
@@ -0,0 +1,134 @@
+# perfumes/tests/test_import.py
+import csv
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+
+from perfumes import facets, suggest
+from perfumes.facets import facet_counts
+from perfumes.benchmarks.stubserver import FragranticaStub
+from perfumes.importer.journal import DONE, FAILED, ImportJournal
+from perfumes.importer.rows import CSV_COLUMNS
+from perfumes.models import Perfume
+from perfumes.suggest import suggest_perfumes
+
+
+def write_csv(path, rows):
+    """Dataset-style `;` CSV; each row is a dict of Perfume, Brand and any CSV_COLUMNS."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Perfume", "Brand", *CSV_COLUMNS])
+        for row in rows:
+            writer.writerow([row.get(column, "") for column in ["Perfume", "Brand", *CSV_COLUMNS]])
+
+
+@override_settings(CATALOG_STATE_CACHE="default")
+class ImportTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+        self.csv = self.dir / "catalog.csv"
+        cache.clear()
+        for module in (facets, suggest):
+            module._state.update(index=None, version=None)
+
+    def run_import(self, rows, **options):
+        write_csv(self.csv, rows)
+        options.setdefault("no_journal", True)
+        options.setdefault("skip_scrape", True)
+        stdout = StringIO()
+        call_command("import_perfumes", str(self.csv), no_cache=True, stdout=stdout, stderr=StringIO(), **options)
+        return stdout.getvalue()
+
+
+class IncrementalImportTests(ImportTestCase):
+    rows = [
+        {"Perfume": "Rose One", "Brand": "Acme", "Rating Value": "4,1", "Rating Count": "10", "Top": "Rose", "mainaccord1": "floral"},
+        {"Perfume": "Oud Two", "Brand": "Acme", "Rating Value": "3,9", "Rating Count": "5", "Top": "Oud", "mainaccord1": "woody"},
+        {"Perfume": "Gone Three", "Brand": "Acme", "Country": "Italy"},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.run_import(self.rows, incremental=True)
+
+    def test_diff_and_delete_missing(self):
+        changed = [dict(self.rows[0], Country="France"), self.rows[1]]
+        self.run_import(changed, incremental=True, delete_missing=True)
+        self.assertEqual(sorted(Perfume.objects.values_list("name", flat=True)), ["Oud Two", "Rose One"])
+        self.assertEqual(Perfume.objects.get(name="Rose One").country, "France")
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        before = dict(Perfume.objects.values_list("name", "updated_at"))
+        output = self.run_import(self.rows, incremental=True, delete_missing=True)
+        self.assertIn("0 inserted, 0 updated, 3 unchanged, 0 deleted", output)
+        self.assertEqual(dict(Perfume.objects.values_list("name", "updated_at")), before)
+
+    def test_delete_missing_needs_a_complete_incremental_pass(self):
+        for options in ({}, {"incremental": True, "resume": True, "no_journal": False}):
+            with self.subTest(**options), self.assertRaisesMessage(CommandError, "--delete-missing needs"):
+                self.run_import(self.rows[:1], delete_missing=True, **options)
+        self.assertEqual(Perfume.objects.count(), 3)
+
+    def test_rejected_row_keeps_its_perfume(self):
+        bad = [dict(self.rows[0], **{"Rating Value": "n/a"}), *self.rows[1:]]
+        self.run_import(bad, incremental=True, delete_missing=True)
+        rose = Perfume.objects.get(name="Rose One")
+        self.assertEqual(rose.rating_value, 4.1)
+        self.assertEqual(Perfume.objects.count(), 3)
+
+    def test_rating_only_changes_refresh_facets_and_suggestions(self):
+        self.assertEqual([s.name for s in suggest_perfumes("acme")][:1], ["Rose One"])
+        self.assertEqual(facet_counts(QueryDict("rating=4"))["total"], 1)
+        rerated = [self.rows[0], dict(self.rows[1], **{"Rating Value": "4,5", "Rating Count": "900"}), self.rows[2]]
+        self.run_import(rerated, incremental=True)
+        self.assertEqual([s.name for s in suggest_perfumes("acme")][:1], ["Oud Two"])
+        self.assertEqual(facet_counts(QueryDict("rating=4"))["total"], 2)
+
+
+class JournalTests(ImportTestCase):
+    rows = [
+        {"Perfume": f"Scent {number}", "Brand": "Acme", "url": f"https://www.fragrantica.com/perfume/acme/scent-{number}.html"}
+        for number in range(1, 6)
+    ]
+
+    def journal(self):
+        journal = ImportJournal(ImportJournal.default_path(self.csv))
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_resume_seeks_past_the_checkpoint(self):
+        self.run_import(self.rows[:3], no_journal=False)
+        # Rows before the checkpoint are not read again, so a perfume deleted since stays deleted
+        Perfume.objects.filter(name="Scent 1").delete()
+        output = self.run_import(self.rows, no_journal=False, resume=True)
+        self.assertIn("Resuming after row 3", output)
+        self.assertEqual(sorted(Perfume.objects.values_list("name", flat=True)), [f"Scent {n}" for n in range(2, 6)])
+        summary = self.journal().summary()
+        self.assertEqual((summary["rows"], summary["last_row"], summary["created"]), (5, 5, 5))
+
+    def test_resume_refuses_another_file(self):
+        self.run_import(self.rows[:3], no_journal=False)
+        with self.assertRaisesMessage(Exception, "different or truncated CSV"):
+            self.run_import(self.rows[:1], no_journal=False, resume=True)
+
+    def test_retry_failed_reruns_the_failed_rows(self):
+        scrape = {"skip_scrape": False, "no_journal": False, "workers": 2, "rate": 500, "image_rate": 500}
+        with FragranticaStub(latency=0, jitter=0, rate_429=1.0, retry_after=0.01, page_kb=1) as stub:
+            self.run_import(self.rows, base_url=stub.base_url, max_retries=1, **scrape)
+        journal = self.journal()
+        self.assertEqual(journal.counts(), {FAILED: 5})
+        self.assertEqual(journal.failure_reasons(), [("page rate limited", 5)])
+
+        with FragranticaStub(latency=0, jitter=0, page_kb=1) as stub:
+            self.run_import(self.rows, base_url=stub.base_url, retry_failed=True, **scrape)
+            requests = stub.stats["requests"]
+        self.assertEqual(requests, 5)
+        self.assertEqual(self.journal().counts(), {DONE: 5})
+        self.assertFalse(Perfume.objects.filter(description="").exists())
@@ -0,0 +1,89 @@
+# perfumes/tests/test_importbench.py
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from perfumes.benchmarks.importbench import run_import, write_catalog_csv
+from perfumes.benchmarks.stubserver import FragranticaStub
+from perfumes.models import ImageJob, Perfume
+
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+class FragranticaStubTests(TestCase):
+    def test_pages_are_stable_per_path(self):
+        with FragranticaStub(latency=0, jitter=0, page_kb=4) as stub:
+            status, headers, body = fetch(f"{stub.base_url}/perfume/acme/rose-one-1.html")
+            again = fetch(f"{stub.base_url}/perfume/acme/rose-one-1.html")[2]
+            image_status, image_headers, image = fetch(f"{stub.base_url}/mdimg/perfume/o.12.jpg")
+            missing = fetch(f"{stub.base_url}/robots.txt")[0]
+        self.assertEqual(status, 200)
+        self.assertEqual(body, again)
+        self.assertIn(b'property="og:description"', body)
+        self.assertGreater(len(body), 4 * 1024)
+        self.assertEqual((image_status, image_headers["Content-Type"]), (200, "image/jpeg"))
+        self.assertTrue(image.startswith(b"\xff\xd8"))
+        self.assertEqual(missing, 404)
+        self.assertEqual(stub.stats["requests"], 4)
+
+    def test_throttles_with_retry_after(self):
+        with FragranticaStub(latency=0, jitter=0, rate_429=1.0, retry_after=2.5) as stub:
+            status, headers, _ = fetch(f"{stub.base_url}/perfume/acme/rose-one-1.html")
+        self.assertEqual((status, headers["Retry-After"]), (429, "2.5"))
+        self.assertEqual(stub.stats["throttled"], 1)
+
+    def test_malformed_pages_are_counted(self):
+        with FragranticaStub(latency=0, jitter=0, malformed=1.0, page_kb=1) as stub:
+            for number in range(5):
+                fetch(f"{stub.base_url}/perfume/acme/broken-{number}.html")
+        self.assertEqual(stub.stats["malformed"], 5)
+
+
+@override_settings(CATALOG_STATE_CACHE="default")
+class ImportBenchmarkTests(TestCase):
+    rows = 12
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.csv = Path(directory.name) / "catalog.csv"
+        write_catalog_csv(self.csv, self.rows, seed=3)
+
+    def run_mode(self, mode):
+        with FragranticaStub(latency=0, jitter=0, page_kb=2) as stub:
+            return run_import(self.csv, self.rows, stub, mode=mode, workers=2, rate=500, image_rate=500)
+
+    def assert_imported(self, result):
+        self.assertEqual(Perfume.objects.count(), self.rows)
+        self.assertEqual(result["requests"], self.rows)
+        self.assertEqual(result["stub"]["requests"], self.rows)
+        self.assertEqual(result["outcome"]["descriptions"], self.rows)
+        self.assertEqual(result["outcome"].get("failed", 0), 0)
+        # Images are queued for process_image_queue rather than fetched
+        self.assertEqual(result["outcome"]["queued"], self.rows)
+        self.assertEqual(ImageJob.objects.count(), self.rows)
+        self.assertGreater(result["rows_per_s"], 0)
+        self.assertIn("read", result["stages"])
+        self.assertFalse(Perfume.objects.filter(similar_indexed_at__isnull=True).exists())
+
+    def test_default_mode(self):
+        self.assert_imported(self.run_mode("default"))
+
+    def test_bulk_mode(self):
+        self.assert_imported(self.run_mode("bulk"))
+
+    def test_csv_round_trips(self):
+        self.run_mode("bulk")
+        self.assertEqual(
+            sorted(Perfume.objects.values_list("name", flat=True)),
+            sorted(line.split(";")[0] for line in self.csv.read_text(encoding="utf-8").splitlines()[1:]),
+        )
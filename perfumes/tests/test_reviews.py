@@ -0,0 +1,83 @@
+# perfumes/tests/test_reviews.py
+from django.contrib import admin
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from perfumes.models import Perfume, Review
+from perfumes.reviews import approved_reviews
+
+
+@override_settings(CATALOG_STATE_CACHE="default", QUERY_BUDGET_STRICT=True)
+class ReviewStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.perfume = Perfume.objects.create(name="Review Me", brand="Acme")
+        cls.other = Perfume.objects.create(name="Bystander", brand="Acme")
+
+    def stats(self, perfume=None):
+        perfume = Perfume.objects.get(pk=(perfume or self.perfume).pk)
+        return perfume.approved_review_count, perfume.latest_review_at, perfume.reviews_changed_at
+
+    def review(self, approved=True, **kwargs):
+        return Review.objects.create(perfume=self.perfume, name="Ann", content="Lovely", approved=approved, **kwargs)
+
+    def test_approve_unapprove_delete(self):
+        first = self.review()
+        second = self.review()
+        count, latest, _ = self.stats()
+        self.assertEqual((count, latest), (2, second.created_at))
+
+        second.approved = False
+        second.save()
+        self.assertEqual(self.stats()[:2], (1, first.created_at))
+
+        second.approved = True
+        second.save()
+        self.assertEqual(self.stats()[:2], (2, second.created_at))
+
+        second.delete()
+        self.assertEqual(self.stats()[:2], (1, first.created_at))
+        first.delete()
+        self.assertEqual(self.stats()[:2], (0, None))
+        self.assertEqual(self.stats(self.other), (0, None, None))
+
+    def test_editing_approved_review_rekeys_list(self):
+        review = self.review()
+        before = self.stats()[2]
+        review.content = "Even better"
+        review.save()
+        self.assertGreater(self.stats()[2], before)
+
+    def test_pending_reviews_change_nothing(self):
+        self.review()
+        before = self.stats()
+        pending = self.review(approved=False)
+        pending.content = "Edited"
+        pending.save()
+        pending.delete()
+        response = self.client.post(reverse("perfume_detail", args=[self.perfume.pk]), {"name": "Bo", "content": "Hi"})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Review.objects.filter(name="Bo", approved=False).exists())
+        self.assertEqual(self.stats(), before)
+
+    def test_admin_approve_action(self):
+        self.review()
+        pending = [self.review(approved=False) for _ in range(2)]
+        Review.objects.create(perfume=self.other, name="Cy", content="Ok", approved=False)
+        model_admin = admin.site._registry[Review]
+        model_admin.approve_reviews(None, Review.objects.filter(pk__in=[review.pk for review in pending]))
+        self.assertEqual(self.stats()[:2], (3, pending[-1].created_at))
+        self.assertEqual(self.stats(self.other)[0], 0)
+
+    def test_pages_cover_every_approved_review(self):
+        approved = {self.review().pk for _ in range(23)}
+        self.review(approved=False)
+        seen, cursor = [], None
+        while True:
+            page = approved_reviews(self.perfume, cursor)
+            seen += [review.pk for review in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), approved)
@@ -0,0 +1,57 @@
+# perfumes/tests/test_search.py
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from perfumes.models import Perfume
+from perfumes.search import search_backend, search_queryset
+
+
+@override_settings(CATALOG_STATE_CACHE="default")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.in_name = Perfume.objects.create(name="Vanilla Sky", brand="Acme", base_notes="Musk")
+        cls.in_notes = Perfume.objects.create(name="Night Walk", brand="Bolt", base_notes="Vanilla, Amber")
+        cls.in_accords = Perfume.objects.create(name="Dune", brand="Acme", mainaccord1="vanilla")
+        cls.other = Perfume.objects.create(name="Sea Salt", brand="Bolt", top_notes="Sea Notes", perfumer1="Ann Vale")
+
+    def search(self, terms, queryset=None):
+        return list(search_queryset(queryset or Perfume.objects.all(), terms).order_by("-search_rank", "id"))
+
+    def test_uses_the_sqlite_index(self):
+        self.assertEqual(search_backend(), "fts5")
+
+    def test_name_outranks_accords_and_notes(self):
+        self.assertEqual(self.search([("vanilla", None)]), [self.in_name, self.in_accords, self.in_notes])
+
+    def test_prefixes_columns_and_every_term(self):
+        self.assertEqual(self.search([("vani sky", None)]), [self.in_name])
+        self.assertEqual(self.search([("vanilla", ["name", "brand"])]), [self.in_name])
+        self.assertEqual(self.search([("vanilla", None), ("bolt", ["brand"])]), [self.in_notes])
+        self.assertEqual(self.search([("vale", ["perfumers"])]), [self.other])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search([('"sea" OR (dune*', None)]), [])
+        self.assertEqual(self.search([("  ", None)]), self.search([]))
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.name = "Vanilla Salt"
+        self.other.save()
+        self.assertIn(self.other, self.search([("vanilla", ["name"])]))
+        self.assertEqual(self.search([("sea", ["name"])]), [])
+        self.in_name.delete()
+        self.assertNotIn("Vanilla Sky", [p.name for p in self.search([("vanilla", None)])])
+
+    def test_fallback_matches_the_same_perfumes(self):
+        for terms in ([("vanilla", None)], [("vani sky", None)], [("vanilla", None), ("bolt", ["brand"])]):
+            expected = set(self.search(terms))
+            with mock.patch("perfumes.search.search_backend", return_value="fallback"):
+                self.assertEqual(set(self.search(terms)), expected, terms)
+
+    def test_admin_search_is_ordered_by_rank(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        response = self.client.get(reverse("admin:perfumes_perfume_changelist"), {"q": "vanilla"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.in_name, self.in_accords, self.in_notes])
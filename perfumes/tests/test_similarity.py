@@ -0,0 +1,73 @@
+# perfumes/tests/test_similarity.py
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from perfumes.caching import catalog_version
+from perfumes.models import Perfume, SimilarPerfume
+from perfumes.similarity import LINK_SCORING_LIMIT, rebuild_similarity_index, update_similarity_for
+from perfumes.taxonomy import sync_taxonomy
+
+from .base import CatalogTestCase
+
+
+class IncrementalSimilarityTests(CatalogTestCase):
+    catalog_size = 60
+
+    def setUp(self):
+        super().setUp()
+        rebuild_similarity_index()
+        self.perfumes = list(Perfume.objects.order_by("pk"))
+
+    def lists(self):
+        return list(SimilarPerfume.objects.order_by("perfume_id", "rank").values_list("perfume_id", "rank", "similar_id", "score"))
+
+    def assert_matches_rebuild(self):
+        incremental = self.lists()
+        rebuild_similarity_index()
+        self.assertEqual(incremental, self.lists())
+
+    def test_saves_match_rebuild(self):
+        # Brand-only matches all score the same, so these lists are full of ties
+        for perfume, donor in zip(self.perfumes[:6], self.perfumes[30:36]):
+            perfume.brand = donor.brand
+            perfume.base_notes = donor.base_notes
+            perfume.mainaccord1 = donor.mainaccord2
+            perfume.save()
+        self.assert_matches_rebuild()
+
+    def test_deletes_match_rebuild(self):
+        for perfume in self.perfumes[10:14]:
+            perfume.delete()
+        self.assert_matches_rebuild()
+
+    def test_batch_update_matches_rebuild(self):
+        changed = self.perfumes[20:20 + LINK_SCORING_LIMIT + 5]
+        for perfume, donor in zip(changed, reversed(self.perfumes)):
+            perfume.top_notes = donor.top_notes
+            perfume.mainaccord2 = donor.mainaccord1
+        Perfume.objects.bulk_update(changed, ["top_notes", "mainaccord2"])
+        sync_taxonomy([perfume.pk for perfume in changed])
+        update_similarity_for([perfume.pk for perfume in changed])
+        self.assert_matches_rebuild()
+
+    def test_build_command_bumps_catalog_version(self):
+        for options in ({}, {"missing": True}):
+            with self.subTest(**options):
+                before = catalog_version()
+                call_command("build_similarity_index", stdout=StringIO(), **options)
+                self.assertNotEqual(catalog_version(), before)
+
+
+@override_settings(SIMILAR_PERFUMES_TOP_K=2, CATALOG_STATE_CACHE="default")
+class TieBreakTests(TestCase):
+    def test_equal_score_entry_with_lower_id_enters_full_list(self):
+        outsider = Perfume.objects.create(name="Outsider", brand="Other")
+        house = [Perfume.objects.create(name=f"House {number}", brand="Acme") for number in range(4)]
+        # Same brand and nothing else: every pair scores the same, so the lowest IDs are kept
+        self.assertEqual(list(house[3].similar_entries.order_by("rank").values_list("similar_id", flat=True)), [house[0].pk, house[1].pk])
+
+        outsider.brand = "Acme"
+        outsider.save()
+        self.assertEqual(list(house[3].similar_entries.order_by("rank").values_list("similar_id", flat=True)), [outsider.pk, house[0].pk])
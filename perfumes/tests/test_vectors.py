@@ -0,0 +1,62 @@
+# perfumes/tests/test_vectors.py
+import tempfile
+from unittest import skipIf
+
+from django.test import override_settings
+
+from perfumes import vectors
+from perfumes.models import Perfume, PerfumeAccord
+
+from .base import CatalogTestCase
+
+try:
+    import numpy as np
+except ImportError:  # Scent vectors are optional
+    np = None
+
+
+@skipIf(np is None, "NumPy is not installed")
+class ScentVectorTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(SCENT_VECTORS_DIR=directory.name))
+        vectors._loaded.update(version=None, ids=None, matrix=None, columns=0)
+        self.perfumes, self.features = vectors.build_scent_vectors()
+
+    def dense(self):
+        ids, (indptr, indices, data), columns = vectors.load_scent_vectors()
+        matrix = np.zeros((len(ids), columns))
+        for row in range(len(ids)):
+            matrix[row, indices[indptr[row]:indptr[row + 1]]] = data[indptr[row]:indptr[row + 1]]
+        return ids, matrix
+
+    def test_rows_are_sparse_and_normalised(self):
+        ids, (indptr, indices, data), _ = vectors.load_scent_vectors()
+        self.assertEqual(list(ids), sorted(Perfume.objects.values_list("id", flat=True)))
+        self.assertEqual(self.perfumes, len(ids))
+        self.assertLess(len(data), self.perfumes * self.features / 4)
+        self.assertGreaterEqual(len(data), PerfumeAccord.objects.count())
+        _, matrix = self.dense()
+        np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1, rtol=1e-5)
+
+    def test_nearest_matches_dense_cosine(self):
+        ids, matrix = self.dense()
+        seeds = [int(ids[3]), int(ids[17])]
+        query = matrix[[3, 17]].sum(axis=0)
+        scores = matrix @ (query / np.linalg.norm(query))
+        expected = sorted(
+            ((-round(score, 6), int(pk)) for pk, score in zip(ids, scores) if int(pk) not in seeds and score > 0)
+        )[:8]
+        found = vectors.nearest_perfumes(seeds + [999999], limit=8)
+        self.assertEqual([pk for pk, _ in found], [pk for _, pk in expected])
+        for (_, score), (negative, _) in zip(found, expected):
+            self.assertAlmostEqual(score, -negative, places=5)
+
+    def test_rebuild_is_picked_up(self):
+        vectors.load_scent_vectors()
+        version = vectors._loaded["version"]
+        vectors.build_scent_vectors()
+        vectors.load_scent_vectors()
+        self.assertNotEqual(vectors._loaded["version"], version)
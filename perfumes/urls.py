@@ -1,12 +1,21 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('list/', views.perfume_list, name='perfume_list'),
     path('<int:pk>/', views.perfume_detail, name='perfume_detail'),
+    path('smells-like/', views.smells_like, name='smells_like'),
     path('compare/', views.compare_perfumes, name='compare_perfumes'),
     path('compare/suggestions/', views.perfume_suggestions, name='perfume_suggestions'),
     path('perfume-suggestions/', views.perfume_suggestions, name='perfume_suggestions'),
     path('filter/', views.filter_perfumes, name='filter_perfumes'),
-]
\ No newline at end of file
+    path('_perf/', views.performance_stats, name='performance_stats'),
+
+    # 🔌 Read-only JSON API
+    path('api/perfumes/', api.perfume_search, name='api_perfume_search'),
+    path('api/perfumes/bulk/', api.perfume_bulk, name='api_perfume_bulk'),
+    path('api/perfumes/<int:pk>/similar/', api.perfume_similar, name='api_perfume_similar'),
+    path('api/compare/', api.compare_api, name='api_compare'),
+    path('api/suggestions/', api.suggestions_api, name='api_suggestions'),
+]
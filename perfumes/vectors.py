@@ -0,0 +1,224 @@
+# perfumes/vectors.py
+"""
+Scent vectors for "smells like" search.
+
+`build_scent_vectors()` turns the accord/note link tables into a sparse float32 matrix (TF-IDF over
+notes plus position-weighted accords, one L2-normalised row per perfume) and writes it to disk in
+CSR form: each row's nonzero column indices and values, plus row offsets. A perfume has a few
+dozen nonzeros out of a vocabulary of thousands, so the files grow with the number of links
+rather than perfumes × vocabulary. Workers memory-map them, and a nearest-neighbour query is one
+pass over the nonzeros. NumPy is only needed when building or querying.
+
+Each build goes into its own version directory and is published by replacing the one-line
+CURRENT file, so a worker always loads a matrix and the IDs that go with it.
+"""
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from .models import Accord, Note, Perfume, PerfumeAccord, PerfumeNote
+from .similarity import ACCORD_POSITION_WEIGHTS
+
+CURRENT_FILE = "CURRENT"
+INDPTR_FILE = "indptr.npy"
+INDICES_FILE = "indices.npy"
+DATA_FILE = "data.npy"
+IDS_FILE = "ids.npy"
+VOCAB_FILE = "vocab.json"
+
+# Relative weight of each block before the final row normalisation
+NOTES_BLOCK_WEIGHT = 0.6
+ACCORDS_BLOCK_WEIGHT = 0.8
+
+SCORE_DIGITS = 6
+
+# Versions kept besides the current one, for workers still mapping the previous build
+KEEP_VERSIONS = 1
+
+# Files of the dense layout earlier builds wrote
+LEGACY_FILES = ("matrix.npy", IDS_FILE, VOCAB_FILE)
+
+_loaded = {"version": None, "ids": None, "matrix": None, "columns": 0}
+_lock = threading.Lock()
+
+
+class VectorIndexUnavailable(Exception):
+    """Raised when NumPy is missing or the vector files have not been built yet."""
+
+
+def vectors_dir():
+    return getattr(settings, "SCENT_VECTORS_DIR", settings.BASE_DIR / "var" / "scent_vectors")
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise VectorIndexUnavailable("NumPy is required for scent vectors (pip install numpy)") from exc
+    return numpy
+
+
+def build_scent_vectors(directory=None):
+    """Compute the feature matrix for the whole catalog and save it. Returns (perfumes, features)."""
+    np = _numpy()
+    directory = directory or vectors_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    ids = list(Perfume.objects.order_by("id").values_list("id", flat=True))
+
+    # Term frequency of a note = number of layers (top/middle/base) it appears in
+    notes = defaultdict(Counter)
+    for pk, note in PerfumeNote.objects.values_list("perfume_id", "note_id").iterator(chunk_size=5000):
+        notes[pk][note] += 1
+    accords = defaultdict(dict)
+    for pk, accord, position in PerfumeAccord.objects.values_list("perfume_id", "accord_id", "position").iterator(chunk_size=5000):
+        accords[pk][accord] = ACCORD_POSITION_WEIGHTS[position - 1]
+
+    document_frequency = Counter()
+    for counts in notes.values():
+        document_frequency.update(counts.keys())
+    notes_vocab = sorted(document_frequency)
+    accords_vocab = sorted({accord for weights in accords.values() for accord in weights})
+    note_column = {note: i for i, note in enumerate(notes_vocab)}
+    accord_column = {accord: len(notes_vocab) + i for i, accord in enumerate(accords_vocab)}
+    total = len(ids)
+    idf = {note: math.log((1 + total) / (1 + df)) + 1 for note, df in document_frequency.items()}
+
+    indptr, indices, data = [0], [], []
+    for pk in ids:
+        cols, values = [], []
+        counts = notes.get(pk)
+        if counts:
+            block = np.array([count * idf[note] for note, count in counts.items()], dtype=np.float32)
+            cols += [note_column[note] for note in counts]
+            values.append(NOTES_BLOCK_WEIGHT * block / np.linalg.norm(block))
+        weights = accords.get(pk)
+        if weights:
+            block = np.array(list(weights.values()), dtype=np.float32)
+            cols += [accord_column[accord] for accord in weights]
+            values.append(ACCORDS_BLOCK_WEIGHT * block / np.linalg.norm(block))
+        if values:
+            row = np.concatenate(values)
+            indices += cols
+            data.append(row / np.linalg.norm(row))
+        indptr.append(len(indices))
+    matrix = (
+        np.array(indptr, dtype=np.int64),
+        np.array(indices, dtype=np.int32),
+        np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+    )
+    features = len(notes_vocab) + len(accords_vocab)
+
+    # Everything goes into a fresh version directory, published in one step below
+    version = f"v{time.time_ns()}"
+    target = os.path.join(directory, version)
+    os.makedirs(target)
+    for name, array in zip((INDPTR_FILE, INDICES_FILE, DATA_FILE), matrix):
+        np.save(os.path.join(target, name), array)
+    np.save(os.path.join(target, IDS_FILE), np.array(ids, dtype=np.int64))
+    with open(os.path.join(target, VOCAB_FILE), "w", encoding="utf-8") as fh:
+        json.dump({
+            "notes": dict(Note.objects.filter(pk__in=notes_vocab).values_list("id", "name")),
+            "accords": dict(Accord.objects.filter(pk__in=accords_vocab).values_list("id", "name")),
+            "columns": [("note", pk) for pk in notes_vocab] + [("accord", pk) for pk in accords_vocab],
+        }, fh)
+
+    tmp = os.path.join(directory, CURRENT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(version)
+    os.replace(tmp, os.path.join(directory, CURRENT_FILE))
+    _prune(directory, version)
+    return total, features
+
+
+def _prune(directory, current):
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if name != current and name[1:].isdigit() and os.path.isdir(os.path.join(directory, name))
+    )
+    for name in versions[:max(0, len(versions) - KEEP_VERSIONS)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    # Files of the single-directory layout earlier builds wrote
+    for name in LEGACY_FILES:
+        if os.path.isfile(os.path.join(directory, name)):
+            os.remove(os.path.join(directory, name))
+
+
+def load_scent_vectors():
+    """
+    Memory-map the current build once per process, reloading it after a rebuild. Returns the
+    perfume IDs, the (indptr, indices, data) CSR arrays and the number of columns.
+    """
+    np = _numpy()
+    directory = vectors_dir()
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding="utf-8") as fh:
+            version = fh.read().strip()
+    except FileNotFoundError as exc:
+        raise VectorIndexUnavailable("Scent vectors not built yet (manage.py build_scent_vectors)") from exc
+
+    with _lock:
+        if _loaded["version"] != version:
+            target = os.path.join(directory, version)
+            try:
+                matrix = tuple(
+                    np.load(os.path.join(target, name), mmap_mode="r") for name in (INDPTR_FILE, INDICES_FILE, DATA_FILE)
+                )
+                ids = np.load(os.path.join(target, IDS_FILE))
+            except FileNotFoundError as exc:
+                raise VectorIndexUnavailable(f"Scent vectors {version} are missing or outdated; rebuild them") from exc
+            indptr, indices, data = matrix
+            if len(indptr) != len(ids) + 1 or len(indices) != len(data) or indptr[-1] != len(data):
+                raise VectorIndexUnavailable(f"Scent vectors {version} are inconsistent; rebuild them")
+            # Every column holds some perfume's nonzero, so the largest index gives the width
+            columns = int(indices.max()) + 1 if len(indices) else 0
+            _loaded.update(version=version, matrix=matrix, ids=ids, columns=columns)
+        return _loaded["ids"], _loaded["matrix"], _loaded["columns"]
+
+
+def nearest_perfumes(seed_ids, limit=12):
+    """
+    IDs and cosine scores of the perfumes closest to the blend of `seed_ids`, best first.
+    Seeds unknown to the index are ignored; the seeds themselves are never returned.
+    """
+    np = _numpy()
+    ids, matrix, columns = load_scent_vectors()
+    seeds = np.array(sorted({int(pk) for pk in seed_ids}), dtype=np.int64)
+    positions = np.searchsorted(ids, seeds)
+    in_range = positions < len(ids)
+    positions, seeds = positions[in_range], seeds[in_range]
+    positions = positions[ids[positions] == seeds]
+    if not len(positions):
+        return []
+
+    indptr, indices, data = matrix
+    # Blend of the seed rows, as a dense vector over the (small) vocabulary
+    query = np.zeros(columns, dtype=np.float64)
+    for position in positions:
+        start, end = indptr[position], indptr[position + 1]
+        np.add.at(query, indices[start:end], data[start:end])
+    norm = np.linalg.norm(query)
+    if not norm:
+        return []
+    query /= norm
+
+    # Row sums of the products, from running totals at the row offsets (empty rows come out as 0)
+    totals = np.concatenate(([0.0], np.cumsum(data * query[indices], dtype=np.float64)))
+    # Rounded to float32 precision so equal rows tie exactly, whatever the summation order
+    scores = np.round(totals[indptr[1:]] - totals[indptr[:-1]], SCORE_DIGITS)
+    scores[positions] = -np.inf
+
+    limit = min(limit, len(ids) - len(positions))
+    if limit <= 0:
+        return []
+    # Everything scoring at least the limit-th best, best first; ties go to the lower ID
+    floor = -np.partition(-scores, limit - 1)[limit - 1]
+    top = np.flatnonzero(scores >= floor)
+    top = top[np.lexsort((top, -scores[top]))][:limit]
+    return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0]
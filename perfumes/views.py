@@ -1,30 +1,47 @@
-from .models import Perfume
+from django.conf import settings
 from django.http import JsonResponse
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from django.db.models import Q
-from django.db import models
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from .models import Perfume, Review
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.vary import vary_on_headers
+from .models import Perfume
 from .forms import ReviewForm
-from django.core.paginator import Paginator
-import random
+from .caching import cache_anonymous_page, catalog_conditional
+from .compare import compare, parse_compare_ids
+from .facets import facet_counts
+from .instrumentation import query_budget, stats as performance_samples
+from .featured import get_featured_perfumes
+from .pagination import CursorPaginator
+from .reviews import approved_reviews
+from .search import search_queryset
+from .similarity import similar_perfumes as similar_perfumes_for
+from .suggest import suggest_perfumes
+from .taxonomy import normalize_name
+from .vectors import VectorIndexUnavailable, nearest_perfumes
 
 
 
-def home(request):
-    perfumes = Perfume.objects.all().order_by('-id')  # Show newest first
-    paginator = Paginator(perfumes, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def _is_scroll_request(request):
+    return bool(request.headers.get('HX-Request')) or request.headers.get('x-requested-with') == 'XMLHttpRequest'
 
-    # Random 5 featured perfumes for the slider
-    featured_perfumes = random.sample(list(perfumes), min(5, len(perfumes)))
+
+@catalog_conditional
+@cache_anonymous_page
+@vary_on_headers('HX-Request', 'X-Requested-With')
+@query_budget(6)
+def home(request):
+    # Show newest first; keyset pagination so deep scrolling stays as cheap as page 1
+    paginator = CursorPaginator(Perfume.objects.all(), ('-id',), 10)
+    page_obj = paginator.page(request.GET.get('cursor'))
 
     # If infinite scroll request
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        return render(request, 'partials/perfume_list.html', {'perfumes': page_obj})
+    if _is_scroll_request(request):
+        return render(request, 'perfumes/partials/perfume_cards.html', {'perfumes': page_obj})
+
+    # Random 5 featured perfumes for the slider, picked from the precomputed pool
+    featured_perfumes = get_featured_perfumes(5)
 
     return render(request, 'perfumes/home.html', {
         'perfumes': page_obj,
@@ -32,8 +49,12 @@ def home(request):
     })
 
 
+@catalog_conditional
+@cache_anonymous_page
+@vary_on_headers('HX-Request', 'X-Requested-With')
+@query_budget(6)
 def perfume_list(request):
-    perfumes = Perfume.objects.all().order_by('name')
+    perfumes = Perfume.objects.all()
 
     # Optional filters
     gender = request.GET.get('gender')
@@ -46,25 +67,48 @@ def perfume_list(request):
         perfumes = perfumes.filter(gender__iexact=gender)
     if country:
         perfumes = perfumes.filter(country__iexact=country)
-    if brand:
-        perfumes = perfumes.filter(brand__icontains=brand)
-    if accord:
-        perfumes = perfumes.filter(
-            mainaccord1__icontains=accord
-        ) | perfumes.filter(mainaccord2__icontains=accord)
     if rating:
         perfumes = perfumes.filter(rating_value__gte=rating)
+    if accord:
+        perfumes = perfumes.filter(main_accords__name=normalize_name(accord))
 
-    paginator = Paginator(perfumes, 12)  # show 12 perfumes per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # 🔎 Brand text goes through the full-text index, best matches first
+    if brand:
+        perfumes = search_queryset(perfumes, [(brand, ['brand'])])
+        ordering = ('-search_rank', 'name', 'id')
+    else:
+        ordering = ('name', 'id')
 
-    return render(request, 'perfumes/perfume_list.html', {'perfumes': page_obj})
+    paginator = CursorPaginator(perfumes, ordering, 12)  # show 12 perfumes per page
+    page_obj = paginator.page(request.GET.get('cursor'))
 
+    # Infinite scroll: just the next cards, no facets and no count query
+    if _is_scroll_request(request):
+        return render(request, 'perfumes/partials/perfume_cards.html', {'perfumes': page_obj})
+
+    # 📊 Per-option counts for the filter sidebar, from the in-memory facet index
+    facets = facet_counts(request.GET, extra={
+        'brand': search_queryset(Perfume.objects.all(), [(brand, ['brand'])]),
+    })
 
+    return render(request, 'perfumes/perfume_list.html', {'perfumes': page_obj, 'facets': facets})
+
+
+# No catalog_conditional here: the page embeds the review form's per-session CSRF token,
+# so a 304 could hand one visitor a page cached with another's
+@query_budget(6)
 def perfume_detail(request, pk):
     perfume = get_object_or_404(Perfume, pk=pk)
-    reviews = perfume.reviews.filter(approved=True).order_by('-created_at')  # ✅ Only show approved reviews
+
+    # 💬 "Show more reviews" only needs the next page of reviews
+    if request.GET.get('reviews') and _is_scroll_request(request):
+        return render(request, 'perfumes/partials/review_list.html', {
+            'perfume': perfume,
+            'reviews': approved_reviews(perfume, request.GET['reviews']),
+        })
+
+    # ✅ Only approved reviews, a page at a time; perfumes without any skip the query
+    reviews = SimpleLazyObject(lambda: approved_reviews(perfume)) if perfume.approved_review_count else []
 
     # ✅ Handle public review submission (no login required)
     if request.method == 'POST':
@@ -79,27 +123,8 @@ def perfume_detail(request, pk):
     else:
         form = ReviewForm()
 
-    # 🔹 Find similar perfumes
-    main_accords = [
-        perfume.mainaccord1,
-        perfume.mainaccord2,
-        perfume.mainaccord3,
-        perfume.mainaccord4,
-        perfume.mainaccord5,
-    ]
-    
-    query = Q(brand__iexact=perfume.brand)
-    for accord in main_accords:
-        if accord:
-            query |= (
-                Q(mainaccord1__icontains=accord)
-                | Q(mainaccord2__icontains=accord)
-                | Q(mainaccord3__icontains=accord)
-                | Q(mainaccord4__icontains=accord)
-                | Q(mainaccord5__icontains=accord)
-            )
-    
-    similar_perfumes = Perfume.objects.filter(query).exclude(pk=perfume.pk)[:4]
+    # 🔹 Similar perfumes, ranked, from the precomputed index (only queried when the fragment cache misses)
+    similar_perfumes = SimpleLazyObject(lambda: similar_perfumes_for(perfume, limit=4))
 
     context = {
         'perfume': perfume,
@@ -112,17 +137,19 @@ def perfume_detail(request, pk):
     return render(request, 'perfumes/perfume_detail.html', context)
 
 
-
-from django.http import JsonResponse
-
+@catalog_conditional
+@cache_anonymous_page
+@query_budget(3)
 def compare_perfumes(request):
-    perfume_ids = request.GET.getlist('perfumes')
-    perfumes = Perfume.objects.filter(id__in=perfume_ids)
-    all_perfumes = Perfume.objects.all().order_by('brand', 'name')
+    # ⚖️ One query for the selected perfumes, in the order asked for; the table is cached per ID set
+    comparison = compare(parse_compare_ids(request.GET.getlist('perfumes')))
+    perfumes = comparison.perfumes
 
     context = {
         'perfumes': perfumes,
-        'all_perfumes': all_perfumes,
+        'comparison': comparison,
+        # Numbers of the empty search boxes shown next to the selected ones (at least two boxes)
+        'empty_slots': range(len(perfumes) + 1, max(2, len(perfumes)) + 1),
     }
 
     # ✅ HTMX partial response for live updates
@@ -132,13 +159,44 @@ def compare_perfumes(request):
     return render(request, 'perfumes/compare.html', context)
 
 
+# 👃 "Smells like" search over the precomputed scent vectors
+@query_budget(3)
+def smells_like(request):
+    seed_ids = [pk for pk in request.GET.getlist('perfumes') if pk.isdigit()][:4]
+    seeds = Perfume.objects.in_bulk(seed_ids)
+    seeds = [seeds[int(pk)] for pk in seed_ids if int(pk) in seeds]
+
+    results = []
+    if seeds:
+        try:
+            matches = nearest_perfumes([p.pk for p in seeds], limit=12)
+        except VectorIndexUnavailable:
+            matches = []
+        found = Perfume.objects.in_bulk([pk for pk, _ in matches])
+        results = [found[pk] for pk, _ in matches if pk in found]
+
+    return render(request, 'perfumes/smells_like.html', {
+        'seeds': seeds,
+        'perfumes': results,
+    })
+
+
 # 🔍 Live Suggestions for Autosuggest dropdowns
+@query_budget(1)
 def perfume_suggestions(request):
     query = request.GET.get('q', '').strip()
-    perfumes = Perfume.objects.filter(name__istartswith=query)[:10] if query else []
+    # Served from the in-process prefix index, no database hit per keystroke
+    perfumes = suggest_perfumes(query, limit=10) if query else []
     return render(request, 'perfumes/partials/suggestions.html', {'perfumes': perfumes})
 
 
+# Cards per filter page, and per flushed chunk in streaming mode
+FILTER_PAGE_SIZE = 24
+STREAM_CHUNK_SIZE = 50
+
+
+@catalog_conditional
+@query_budget(6)
 def filter_perfumes(request):
     gender = request.GET.get('gender')
     country = request.GET.get('country')
@@ -154,24 +212,59 @@ def filter_perfumes(request):
     if country:
         perfumes = perfumes.filter(country__icontains=country)
 
-    # ✅ Search by brand OR perfume name
-    if brand_or_name:
-        perfumes = perfumes.filter(
-            models.Q(brand__icontains=brand_or_name) |
-            models.Q(name__icontains=brand_or_name)
-        )
-
     if accord:
-        perfumes = perfumes.filter(
-            models.Q(mainaccord1__icontains=accord) |
-            models.Q(mainaccord2__icontains=accord) |
-            models.Q(mainaccord3__icontains=accord) |
-            models.Q(mainaccord4__icontains=accord) |
-            models.Q(mainaccord5__icontains=accord)
-        )
+        perfumes = perfumes.filter(main_accords__name=normalize_name(accord))
 
     if min_rating:
         perfumes = perfumes.filter(rating_value__gte=float(min_rating))
 
-    html = render_to_string("perfumes/partials/perfume_list.html", {"perfumes": perfumes})
+    # ✅ Search by brand OR perfume name (full-text index, ranked by relevance)
+    if brand_or_name:
+        perfumes = search_queryset(perfumes, [(brand_or_name, ['name', 'brand'])])
+        ordering = ('-search_rank', 'name', 'id')
+    else:
+        ordering = ('name', 'id')
+
+    # 🌊 Optional streaming mode: cards are rendered and flushed in chunks
+    if request.GET.get('stream'):
+        response = StreamingHttpResponse(_stream_perfume_rows(request, perfumes.order_by(*ordering), brand_or_name))
+        response['Content-Type'] = 'text/html; charset=utf-8'
+        return response
+
+    # Bounded pages with a continuation cursor for the `revealed` trigger
+    page_obj = CursorPaginator(perfumes, ordering, FILTER_PAGE_SIZE).page(request.GET.get('cursor'))
+    html = render_to_string("perfumes/partials/perfume_list.html", {"perfumes": page_obj}, request=request)
+
+    # 📊 Refresh the sidebar counts out-of-band so htmx swaps them next to the first page
+    if not request.GET.get('cursor'):
+        html += _facets_oob(request, brand_or_name)
     return HttpResponse(html)
+
+
+def _facets_oob(request, brand_or_name):
+    facets = facet_counts(request.GET, contains=['country'], extra={
+        'brand': search_queryset(Perfume.objects.all(), [(brand_or_name, ['name', 'brand'])]),
+    })
+    return render_to_string("perfumes/partials/filter_facets.html", {"facets": facets, "oob": True}, request=request)
+
+
+def _stream_perfume_rows(request, perfumes, brand_or_name):
+    """Yield the filter results as HTML, one chunk of rows at a time."""
+    rows = get_template("perfumes/partials/perfume_rows.html")
+    chunk, sent = [], 0
+    for perfume in perfumes.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        chunk.append(perfume)
+        if len(chunk) == STREAM_CHUNK_SIZE:
+            yield rows.render({"perfumes": chunk}, request)
+            sent += len(chunk)
+            chunk = []
+    if chunk or not sent:
+        yield render_to_string("perfumes/partials/perfume_list.html", {"perfumes": chunk}, request=request)
+    yield _facets_oob(request, brand_or_name)
+
+
+# 📈 Rolling per-view request numbers from PerformanceMiddleware (this process only)
+def performance_stats(request):
+    if not (settings.DEBUG or request.user.is_staff):
+        raise Http404
+    return JsonResponse(performance_samples.summary())